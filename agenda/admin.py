@@ -1,36 +1,139 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
 from .models import (PlanSubscription, BarberShop, Service, Client, WorkDayConfig, Appointment, Cancellation, Product, ProductSale,
+    NotificationOutbox, ReportJob, RecurringBlock, ClientMerge, FechamentoDiario, Payment,
+    MovimentoEstoque,
 )
 
 
+# ==========================
+# ESCALA (listas com milhões de linhas)
+# ==========================
+
+class ContagemEstimadaPaginator(Paginator):
+    """
+    Lista sem filtro no Postgres: total vem da estimativa do planner
+    (pg_class.reltuples) em vez de COUNT(*) na tabela inteira.
+    Com filtro, ou tabela pequena/sem ANALYZE, conta de verdade.
+    """
+    MINIMO_ESTIMADO = 10_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        conexao = connections[qs.db]
+        if conexao.vendor == "postgresql" and not qs.query.where:
+            with conexao.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [qs.model._meta.db_table],
+                )
+                linha = cursor.fetchone()
+            if linha and linha[0] >= self.MINIMO_ESTIMADO:
+                return int(linha[0])
+        return super().count
+
+
+class FiltroPorId(admin.FieldListFilter):
+    """Filtro de FK por id digitado: não monta um <select> com a tabela relacionada inteira."""
+    template = "admin/agenda/filtro_por_id.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.parametro = f"{field_path}__id__exact"
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.valor = (self.used_parameters.get(self.parametro) or [""])[-1]
+
+    def expected_parameters(self):
+        return [self.parametro]
+
+    def choices(self, changelist):
+        yield {
+            "selected": not self.valor,
+            "query_string": changelist.get_query_string(remove=[self.parametro]),
+            "display": "Todos",
+            "parametro": self.parametro,
+            "valor": self.valor,
+            # o form GET reenvia os outros filtros/busca/ordenação (menos a página)
+            "ocultos": [
+                (k, v)
+                for k, valores in changelist.filter_params.items()
+                if k not in (self.parametro, "p")
+                for v in valores
+            ],
+        }
+
+
+class EscalaAdmin(admin.ModelAdmin):
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False  # sem o 2º COUNT(*) ("x de N") quando há filtro
+
+
+# ==========================
+# CADASTROS
+# ==========================
+
 @admin.register(BarberShop)
 class BarberShopAdmin(admin.ModelAdmin):
     list_display = ('nome', 'dono', 'telefone', 'slug')
+    list_select_related = ('dono',)
     search_fields = ('nome', 'slug')
+    autocomplete_fields = ('dono',)
 
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('nome', 'barbearia', 'preco', 'duracao_minutos', 'ativo')
-    list_filter = ('barbearia', 'ativo')
+    list_select_related = ('barbearia',)
+    list_filter = (('barbearia', FiltroPorId), 'ativo')
     search_fields = ('nome',)
+    autocomplete_fields = ('barbearia',)
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(EscalaAdmin):
     list_display = ('nome', 'barbearia', 'telefone', 'bloqueado_online')
-    list_filter = ('barbearia', 'bloqueado_online')
+    list_select_related = ('barbearia',)
+    list_filter = (('barbearia', FiltroPorId), 'bloqueado_online')
     search_fields = ('nome', 'telefone')
+    ordering = ('nome', 'id')  # paginação estável (lista e autocomplete)
+    autocomplete_fields = ('barbearia',)
 
 
 @admin.register(WorkDayConfig)
 class WorkDayConfigAdmin(admin.ModelAdmin):
     list_display = ('barbearia', 'dia_semana', 'inicio', 'fim', 'ativo')
-    list_filter = ('barbearia', 'dia_semana', 'ativo')
+    list_select_related = ('barbearia',)
+    list_filter = (('barbearia', FiltroPorId), 'dia_semana', 'ativo')
+    autocomplete_fields = ('barbearia',)
+
 
+@admin.register(RecurringBlock)
+class RecurringBlockAdmin(admin.ModelAdmin):
+    list_display = ('titulo', 'barbearia', 'kind', 'dia_semana', 'inicio', 'fim', 'ativo')
+    list_select_related = ('barbearia',)
+    list_filter = (('barbearia', FiltroPorId), 'kind', 'dia_semana', 'ativo')
+    search_fields = ('titulo',)
+    autocomplete_fields = ('barbearia', 'servico')
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'preco', 'ativo', 'controla_estoque', 'estoque', 'barbearia')
+    list_select_related = ('barbearia',)
+    list_filter = (('barbearia', FiltroPorId), 'ativo', 'controla_estoque')
+    search_fields = ('nome',)
+    autocomplete_fields = ('barbearia',)
+
+
+# ==========================
+# MOVIMENTO (tabelas grandes)
+# ==========================
 
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(EscalaAdmin):
     list_display = (
         'barbearia',
         'inicio',
@@ -40,29 +143,115 @@ class AppointmentAdmin(admin.ModelAdmin):
         'valor_no_momento',
         'criado_via',
     )
-    list_filter = ('barbearia', 'status', 'criado_via')
+    # Service.__str__ mostra a barbearia do serviço
+    list_select_related = ('barbearia', 'cliente', 'servico__barbearia')
+    list_filter = (('barbearia', FiltroPorId), 'status', 'criado_via')
+    date_hierarchy = 'inicio'
     search_fields = ('cliente__nome',)
+    autocomplete_fields = ('barbearia', 'cliente', 'servico')
 
 
 @admin.register(Cancellation)
-class CancellationAdmin(admin.ModelAdmin):
+class CancellationAdmin(EscalaAdmin):
     list_display = ('agendamento', 'motivo', 'aprovado_por', 'criado_em')
+    list_select_related = ('aprovado_por',)
     list_filter = ('motivo',)
+    date_hierarchy = 'criado_em'
+    autocomplete_fields = ('agendamento', 'aprovado_por')
 
-@admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'preco', 'ativo', 'barbearia')
-    list_filter = ('barbearia', 'ativo')
-    search_fields = ('nome',)
 
 @admin.register(ProductSale)
-class ProductSaleAdmin(admin.ModelAdmin):
+class ProductSaleAdmin(EscalaAdmin):
     list_display = ('produto', 'quantidade', 'valor_total', 'data_hora', 'barbearia')
-    list_filter = ('barbearia', 'produto', 'data_hora')
+    list_select_related = ('produto', 'barbearia')
+    list_filter = (('barbearia', FiltroPorId), ('produto', FiltroPorId))
+    date_hierarchy = 'data_hora'
     search_fields = ('produto__nome',)
+    autocomplete_fields = ('barbearia', 'produto')
+
 
 @admin.register(PlanSubscription)
 class PlanSubscriptionAdmin(admin.ModelAdmin):
     list_display = ("shop", "current_plan", "requested_plan", "next_due_date", "is_exempt", "updated_at")
+    list_select_related = ("shop",)
     list_filter = ("current_plan", "requested_plan", "is_exempt")
     search_fields = ("shop__nome", "shop__slug", "shop__dono__username")
+    autocomplete_fields = ("shop",)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(EscalaAdmin):
+    list_display = ("id", "barbearia", "evento", "destino", "telefone", "status", "tentativas", "proxima_tentativa_em")
+    list_select_related = ("barbearia",)
+    list_filter = (("barbearia", FiltroPorId), "status", "evento", "destino")
+    date_hierarchy = "criado_em"
+    search_fields = ("telefone", "barbearia__nome")
+    readonly_fields = ("criado_em", "enviado_em")
+    autocomplete_fields = ("barbearia", "agendamento")
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(EscalaAdmin):
+    list_display = ("id", "barbearia", "relatorio", "status", "criado_em", "concluido_em", "expira_em")
+    list_select_related = ("barbearia",)
+    list_filter = (("barbearia", FiltroPorId), "status", "relatorio")
+    date_hierarchy = "criado_em"
+    readonly_fields = ("chave", "resultado", "erro", "criado_em", "iniciado_em", "concluido_em")
+    autocomplete_fields = ("barbearia",)
+
+
+@admin.register(ClientMerge)
+class ClientMergeAdmin(EscalaAdmin):
+    list_display = ("id", "barbearia", "removido_nome", "removido_telefone", "mantido", "criterio", "origem", "criado_em")
+    list_select_related = ("barbearia", "mantido")
+    list_filter = (("barbearia", FiltroPorId), "criterio", "origem")
+    date_hierarchy = "criado_em"
+    search_fields = ("removido_nome", "removido_telefone")
+    readonly_fields = [f.name for f in ClientMerge._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(FechamentoDiario)
+class FechamentoDiarioAdmin(EscalaAdmin):
+    list_display = ("dia", "barbearia", "agendamentos", "confirmados", "cancelados", "servicos_receita", "produtos_receita", "fechado_em")
+    list_select_related = ("barbearia",)
+    list_filter = (("barbearia", FiltroPorId),)
+    date_hierarchy = "dia"
+    readonly_fields = [f.name for f in FechamentoDiario._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Payment)
+class PaymentAdmin(EscalaAdmin):
+    list_display = ("id", "barbearia", "metodo", "valor", "desconto", "gorjeta", "pago_em", "conferido_em")
+    list_select_related = ("barbearia",)
+    list_filter = (("barbearia", FiltroPorId), "metodo")
+    date_hierarchy = "pago_em"
+    raw_id_fields = ("agendamento", "venda")
+    autocomplete_fields = ("barbearia",)
+
+
+@admin.register(MovimentoEstoque)
+class MovimentoEstoqueAdmin(EscalaAdmin):
+    list_display = ("criado_em", "barbearia", "produto", "tipo", "quantidade", "saldo", "usuario")
+    list_select_related = ("barbearia", "produto", "usuario")
+    list_filter = (("barbearia", FiltroPorId), "tipo")
+    date_hierarchy = "criado_em"
+    # o livro só cresce: saldo do produto é a soma dele
+    readonly_fields = [f.name for f in MovimentoEstoque._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class AgendaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'agenda'
\ No newline at end of file
+    name = 'agenda'
+
+    def ready(self):
+        from . import signals  # noqa: F401
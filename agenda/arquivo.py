@@ -0,0 +1,195 @@
+"""
+Arquivo do histórico frio (agendamentos e vendas de produto antigos).
+
+- `manage.py archive_history` move em lotes o que começou antes do corte
+  (primeiro dia do mês, MESES_QUENTES atrás) de Appointment/ProductSale pras
+  tabelas ArchivedAppointment/ArchivedProductSale, mantendo o id
+- no Postgres as tabelas de arquivo são particionadas por mês (RANGE na data,
+  migration 0114); a partição do mês é criada aqui antes de mover. As tabelas
+  quentes continuam normais: são alvo de FK (Cancellation, NotificationOutbox, Payment)
+  e ficam pequenas porque o frio sai delas
+- leitura: `agendamentos()` / `vendas()` devolvem os querysets a somar. Período
+  que não chega no arquivo = só a tabela quente (caso comum: hoje, semana, mês)
+
+O corte é sempre meia-noite local do dia 1º, então um dia nunca fica dividido
+entre as duas tabelas (os rankings por dia dependem disso).
+"""
+from datetime import datetime, time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedProductSale, Cancellation, MovimentoEstoque, NotificationOutbox, Payment,
+    ProductSale,
+)
+
+LOTE = 2000
+MESES_QUENTES = 13  # mês atual + 12 anteriores (comparação com o mesmo mês do ano passado)
+
+CAMPOS_AGENDAMENTO = (
+    "id", "barbearia_id", "cliente_id", "servico_id", "inicio", "fim",
+    "status", "criado_via", "valor_no_momento", "criado_em",
+)
+CAMPOS_VENDA = (
+    "id", "barbearia_id", "produto_id", "produto_nome", "quantidade", "valor_unitario",
+    "valor_total", "data_hora", "observacao", "produto_chave",
+)
+
+
+def _inicio_do_mes(ano, mes):
+    return timezone.make_aware(datetime.combine(datetime(ano, mes, 1), time.min))
+
+
+def _somar_meses(ano, mes, n):
+    total = ano * 12 + (mes - 1) + n
+    return total // 12, total % 12 + 1
+
+
+def corte_padrao(meses=MESES_QUENTES, hoje=None):
+    """Meia-noite do dia 1º de `meses - 1` meses atrás: tudo antes disso é frio."""
+    hoje = hoje or timezone.localdate()
+    return _inicio_do_mes(*_somar_meses(hoje.year, hoje.month, -(meses - 1)))
+
+
+def pode_estar_arquivado(dia, hoje=None):
+    """O dia pode estar no arquivo? (o menor corte possível é o dia 1º do mês atual)"""
+    return dia < (hoje or timezone.localdate()).replace(day=1)
+
+
+# ==========================
+# PARTIÇÕES (só Postgres)
+# ==========================
+
+def garantir_particoes(modelo, desde, ate):
+    """Cria as partições mensais de `modelo` que cobrem [desde, ate)."""
+    if connection.vendor != "postgresql" or not desde or desde >= ate:
+        return
+    tabela = modelo._meta.db_table
+    desde = timezone.localtime(desde)
+    ano, mes = desde.year, desde.month
+    with connection.cursor() as cursor:
+        while _inicio_do_mes(ano, mes) < ate:
+            prox = _somar_meses(ano, mes, 1)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{tabela}_{ano}_{mes:02d}" PARTITION OF "{tabela}" '
+                "FOR VALUES FROM (%s) TO (%s)",
+                [_inicio_do_mes(ano, mes), _inicio_do_mes(*prox)],
+            )
+            ano, mes = prox
+
+
+# ==========================
+# MOVER
+# ==========================
+
+def _mover(qs, modelo_arquivo, campo_data, campos, preparar, apagar_dependentes, corte):
+    primeiro = qs.order_by(campo_data).values_list(campo_data, flat=True).first()
+    garantir_particoes(modelo_arquivo, primeiro, corte)
+    agora = timezone.now()
+    movidos = 0
+    while True:
+        with transaction.atomic():
+            linhas = list(qs.order_by("id").values(*campos)[:LOTE])
+            if not linhas:
+                break
+            ids = [r["id"] for r in linhas]
+            extras = preparar(ids)
+            modelo_arquivo.objects.bulk_create(
+                [modelo_arquivo(**r, **extras.get(r["id"], {}), arquivado_em=agora) for r in linhas]
+            )
+            apagar_dependentes(ids)
+            # sem sinais: os totais não mudam (a linha só trocou de tabela), então
+            # rankings, histórico do cliente e caches continuam valendo
+            apagados = qs.model.objects.filter(id__in=ids)
+            apagados._raw_delete(apagados.db)
+        movidos += len(linhas)
+    return movidos
+
+
+def _motivos_cancelamento(ids):
+    return {
+        ag_id: {"cancelamento_motivo": motivo}
+        for ag_id, motivo in Cancellation.objects.filter(agendamento_id__in=ids).values_list("agendamento_id", "motivo")
+    }
+
+
+def _soltar_agendamentos(ids):
+    Cancellation.objects.filter(agendamento_id__in=ids).delete()
+    NotificationOutbox.objects.filter(agendamento_id__in=ids).update(agendamento=None)
+    Payment.objects.filter(agendamento_id__in=ids).update(agendamento=None)
+
+
+def _soltar_vendas(ids):
+    Payment.objects.filter(venda_id__in=ids).update(venda=None)
+    MovimentoEstoque.objects.filter(venda_id__in=ids).update(venda=None)
+
+
+def arquivar(corte=None, barbearia_ids=None):
+    """Move agendamentos e vendas anteriores a `corte` pro arquivo. Devolve (agendamentos, vendas)."""
+    corte = corte or corte_padrao()
+    agendamentos = Appointment.objects.filter(inicio__lt=corte)
+    vendas = ProductSale.objects.filter(data_hora__lt=corte)
+    if barbearia_ids is not None:
+        agendamentos = agendamentos.filter(barbearia_id__in=barbearia_ids)
+        vendas = vendas.filter(barbearia_id__in=barbearia_ids)
+
+    n_agendamentos = _mover(
+        agendamentos, ArchivedAppointment, "inicio", CAMPOS_AGENDAMENTO,
+        _motivos_cancelamento, _soltar_agendamentos, corte,
+    )
+    n_vendas = _mover(vendas, ArchivedProductSale, "data_hora", CAMPOS_VENDA, lambda ids: {}, _soltar_vendas, corte)
+    return n_agendamentos, n_vendas
+
+
+def contar(corte=None, barbearia_ids=None):
+    """Quanto `arquivar()` moveria (sem mexer em nada)."""
+    corte = corte or corte_padrao()
+    agendamentos = Appointment.objects.filter(inicio__lt=corte)
+    vendas = ProductSale.objects.filter(data_hora__lt=corte)
+    if barbearia_ids is not None:
+        agendamentos = agendamentos.filter(barbearia_id__in=barbearia_ids)
+        vendas = vendas.filter(barbearia_id__in=barbearia_ids)
+    return agendamentos.count(), vendas.count()
+
+
+# ==========================
+# LEITURA (quente + arquivo)
+# ==========================
+
+def _arquivado_ate(modelo, campo_data, barbearia_id):
+    """Data local do registro arquivado mais recente da barbearia (índice (barbearia, data))."""
+    ultimo = (
+        modelo.objects.filter(barbearia_id=barbearia_id)
+        .order_by(f"-{campo_data}")
+        .values_list(campo_data, flat=True)
+        .first()
+    )
+    return timezone.localdate(ultimo) if ultimo else None
+
+
+def agendamentos(barbearia_id, data_inicio):
+    """Querysets de agendamentos da barbearia a consultar pra um período que começa em `data_inicio`."""
+    fontes = [Appointment.objects.filter(barbearia_id=barbearia_id)]
+    ate = _arquivado_ate(ArchivedAppointment, "inicio", barbearia_id)
+    if ate and data_inicio <= ate:
+        fontes.append(ArchivedAppointment.objects.filter(barbearia_id=barbearia_id))
+    return fontes
+
+
+def vendas(barbearia_id, data_inicio):
+    """Mesma coisa pras vendas de produto."""
+    fontes = [ProductSale.objects.filter(barbearia_id=barbearia_id)]
+    ate = _arquivado_ate(ArchivedProductSale, "data_hora", barbearia_id)
+    if ate and data_inicio <= ate:
+        fontes.append(ArchivedProductSale.objects.filter(barbearia_id=barbearia_id))
+    return fontes
+
+
+def somar(resultados):
+    """Soma chave a chave os dicts de `.aggregate()` de cada fonte."""
+    total = {}
+    for r in resultados:
+        for k, v in r.items():
+            total[k] = total.get(k, 0) + (v or 0)
+    return total
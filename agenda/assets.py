@@ -0,0 +1,79 @@
+"""
+Assets de front-end de terceiros (Bootstrap, fonte Inter) servidos pelo próprio app.
+
+Os arquivos das versões fixadas abaixo vão commitados em static/vendor/; o
+collectstatic gera os nomes com hash + .gz/.br e o WhiteNoise serve com cache
+"immutable" de longo prazo. O build não baixa nada.
+
+Pra vendorizar / trocar de versão: muda aqui, roda `manage.py vendor_assets
+--force` (baixa e confere o SRI quando existe) e commita o static/vendor/
+resultante. Enquanto um asset não está commitado, `asset_url()` cai pro CDN
+de origem (a página não fica sem CSS) e o `check_static` avisa;
+`check_static --exigir-vendor` transforma o aviso em erro.
+"""
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+BOOTSTRAP_VERSAO = "5.3.3"
+INTER_VERSAO = "5.1.0"
+INTER_PESOS = (400, 500, 600, 700)
+
+_BOOTSTRAP_CDN = f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSAO}/dist"
+_INTER_CDN = f"https://cdn.jsdelivr.net/npm/@fontsource/inter@{INTER_VERSAO}/files"
+
+# nome -> (caminho em static/, url de origem, sha384 base64 ou None)
+ASSETS = {
+    "bootstrap_css": (
+        "vendor/bootstrap/bootstrap.min.css",
+        f"{_BOOTSTRAP_CDN}/css/bootstrap.min.css",
+        "QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH",
+    ),
+    "bootstrap_js": (
+        "vendor/bootstrap/bootstrap.bundle.min.js",
+        f"{_BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js",
+        "YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz",
+    ),
+    **{
+        f"inter_{peso}": (
+            f"vendor/inter/inter-latin-{peso}-normal.woff2",
+            f"{_INTER_CDN}/inter-latin-{peso}-normal.woff2",
+            None,
+        )
+        for peso in INTER_PESOS
+    },
+    # gerado pelo vendor_assets (aponta pros .woff2 acima com url() relativa)
+    "inter_css": (
+        "vendor/inter/inter.css",
+        "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap",
+        None,
+    ),
+}
+
+
+def inter_css():
+    faces = []
+    for peso in INTER_PESOS:
+        faces.append(
+            "@font-face{font-family:Inter;font-style:normal;font-display:swap;"
+            f"font-weight:{peso};src:url(inter-latin-{peso}-normal.woff2) format('woff2')}}"
+        )
+    return "\n".join(faces) + "\n"
+
+
+def arquivos(nome):
+    """Arquivos de static/vendor/ que o asset precisa (o inter.css aponta pros .woff2)."""
+    if nome == "inter_css":
+        return [ASSETS[nome][0]] + [ASSETS[f"inter_{peso}"][0] for peso in INTER_PESOS]
+    return [ASSETS[nome][0]]
+
+
+@lru_cache(maxsize=None)
+def vendorizado(nome):
+    return all(finders.find(caminho) for caminho in arquivos(nome))
+
+
+def asset_url(nome):
+    caminho, origem, _ = ASSETS[nome]
+    return static(caminho) if vendorizado(nome) else origem
@@ -0,0 +1,71 @@
+"""
+Reserva de horário pelo link público (e remarcação pelo portal do cliente).
+
+Checagem de conflito + INSERT + outbox na mesma transação, serializada por
+barbearia: no Postgres trava a linha da barbearia (SELECT ... FOR UPDATE); no
+SQLite a transação já abre com BEGIN IMMEDIATE (settings: transaction_mode),
+então só um escritor por vez e quem chega depois espera o busy timeout em vez
+de estourar "database is locked" no meio da transação.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Appointment, BarberShop
+from .notifications import EVENTO_CRIADO, EVENTO_REMARCADO, notificar
+
+
+class HorarioIndisponivel(Exception):
+    """Outro cliente reservou o horário entre a listagem e a confirmação."""
+
+
+def travar_barbearia(barbearia):
+    """Fila única de escritas da barbearia na transação atual (no SQLite o BEGIN IMMEDIATE já garante)."""
+    list(BarberShop.objects.select_for_update().filter(id=barbearia.id).values_list("id", flat=True))
+
+
+def horario_ocupado(barbearia, inicio, fim, ignorar_id=None):
+    # mesma regra da listagem de horários livres: tudo que não foi cancelado ocupa
+    qs = Appointment.objects.filter(barbearia=barbearia, inicio__lt=fim, fim__gt=inicio).exclude(status="cancelado")
+    if ignorar_id:
+        qs = qs.exclude(id=ignorar_id)
+    return qs.exists()
+
+
+def reservar(barbearia, cliente, servico, inicio, remarcar_id=None):
+    """
+    Cria o agendamento "aguardando" (e cancela o antigo, se for remarcação).
+    Devolve (agendamento, remarcou); levanta HorarioIndisponivel se o horário já foi tomado.
+    """
+    fim = inicio + timedelta(minutes=servico.duracao_minutos or 30)
+
+    with transaction.atomic():
+        travar_barbearia(barbearia)
+
+        if horario_ocupado(barbearia, inicio, fim, ignorar_id=remarcar_id):
+            raise HorarioIndisponivel
+
+        agendamento = Appointment.objects.create(
+            barbearia=barbearia,
+            cliente=cliente,
+            servico=servico,
+            inicio=inicio,
+            fim=fim,
+            status="aguardando",
+            criado_via="cliente_link",
+            valor_no_momento=servico.preco,
+        )
+
+        # veio do Portal do Cliente em modo "remarcar": cancela o agendamento antigo
+        remarcou = False
+        if remarcar_id:
+            antigo = Appointment.objects.filter(id=remarcar_id, barbearia=barbearia, cliente=cliente).first()
+            if antigo:
+                antigo.status = "cancelado"
+                antigo.save(update_fields=["status"])
+                remarcou = True
+
+        # agendamento + notificações na mesma transação (outbox)
+        notificar(agendamento, EVENTO_REMARCADO if remarcou else EVENTO_CRIADO)
+
+    return agendamento, remarcou
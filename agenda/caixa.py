@@ -0,0 +1,131 @@
+"""
+Caixa do dia: como cada agendamento/venda foi pago (Pix, dinheiro, cartão).
+
+- `resumo_dia()`: total por método numa query agrupada (faixa do índice
+  (barbearia, pago_em)) + o esperado do dia (fechamento.totais)
+- `pendentes()`: confirmados e vendas do dia ainda sem Payment
+- `pagar_pendentes()`: "marcar dia pago" — um Payment por pendente num INSERT só
+- `conferir()`: conciliação — um UPDATE só em todos os pagamentos do dia/método
+
+O pagamento entra no dia do item (pago_em = horário do agendamento/venda),
+então registrar amanhã o que foi pago hoje não muda o caixa de dia nenhum.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from . import fechamento
+from .booking import travar_barbearia
+from .models import Appointment, Payment, ProductSale
+
+ZERO = Decimal("0")
+METODOS = dict(Payment.METODO_CHOICES)
+
+
+def _do_dia(barbearia, dia):
+    inicio, fim = fechamento.limites_do_dia(dia)
+    return Payment.objects.filter(barbearia=barbearia, pago_em__gte=inicio, pago_em__lt=fim)
+
+
+# ==========================
+# LEITURA
+# ==========================
+
+def resumo_dia(barbearia, dia):
+    metodos = list(
+        _do_dia(barbearia, dia)
+        .values("metodo")
+        .annotate(
+            qtd=Count("id"),
+            valor=Sum("valor"),
+            desconto=Sum("desconto"),
+            gorjeta=Sum("gorjeta"),
+            conferidos=Count("id", filter=Q(conferido_em__isnull=False)),
+        )
+        .order_by("metodo")
+    )
+    for m in metodos:
+        m["rotulo"] = METODOS.get(m["metodo"], m["metodo"])
+
+    recebido = sum((m["valor"] for m in metodos), ZERO)
+    descontos = sum((m["desconto"] for m in metodos), ZERO)
+    totais = fechamento.totais(barbearia, dia, dia)
+    esperado = Decimal(totais["servicos_receita"]) + Decimal(totais["produtos_receita"])
+    return {
+        "metodos": metodos,
+        "recebido": recebido,
+        "descontos": descontos,
+        "gorjetas": sum((m["gorjeta"] for m in metodos), ZERO),
+        "esperado": esperado,
+        "a_receber": esperado - descontos - recebido,
+        "pendentes_conferir": sum(m["qtd"] - m["conferidos"] for m in metodos),
+    }
+
+
+def pendentes(barbearia, dia):
+    """(agendamentos, vendas) do dia sem nenhum pagamento registrado."""
+    inicio, fim = fechamento.limites_do_dia(dia)
+    agendamentos = (
+        Appointment.objects.filter(barbearia=barbearia, status="confirmado", inicio__gte=inicio, inicio__lt=fim)
+        .exclude(Exists(Payment.objects.filter(agendamento=OuterRef("pk"))))
+        .select_related("cliente", "servico")
+        .order_by("inicio")
+    )
+    vendas = (
+        ProductSale.objects.filter(barbearia=barbearia, data_hora__gte=inicio, data_hora__lt=fim)
+        .exclude(Exists(Payment.objects.filter(venda=OuterRef("pk"))))
+        .select_related("produto")
+        .order_by("data_hora")
+    )
+    return agendamentos, vendas
+
+
+# ==========================
+# ESCRITA
+# ==========================
+
+def preco(agendamento=None, venda=None):
+    """Quanto o item custa (o que o pagamento cobre sem desconto)."""
+    return (agendamento.valor_no_momento if agendamento else venda.valor_total) or ZERO
+
+
+def registrar(barbearia, metodo, agendamento=None, venda=None, desconto=ZERO, gorjeta=ZERO):
+    """Registra o pagamento de um item (valor = preço do item - desconto)."""
+    item = agendamento or venda
+    return Payment.objects.create(
+        barbearia=barbearia,
+        agendamento=agendamento,
+        venda=venda,
+        metodo=metodo,
+        valor=max(preco(agendamento, venda) - desconto, ZERO),
+        desconto=desconto,
+        gorjeta=gorjeta,
+        pago_em=item.inicio if agendamento else item.data_hora,
+    )
+
+
+def pagar_pendentes(barbearia, dia, metodo):
+    """Marca o dia como pago: todo pendente recebe um Payment de `metodo` com o valor cheio."""
+    with transaction.atomic():
+        # dois cliques / duas abas: o segundo espera e já não vê pendente nenhum
+        travar_barbearia(barbearia)
+        agendamentos, vendas = pendentes(barbearia, dia)
+        novos = [
+            Payment(barbearia=barbearia, agendamento_id=ag_id, metodo=metodo, valor=valor or ZERO, pago_em=inicio)
+            for ag_id, valor, inicio in agendamentos.values_list("id", "valor_no_momento", "inicio")
+        ] + [
+            Payment(barbearia=barbearia, venda_id=venda_id, metodo=metodo, valor=valor or ZERO, pago_em=data_hora)
+            for venda_id, valor, data_hora in vendas.values_list("id", "valor_total", "data_hora")
+        ]
+        Payment.objects.bulk_create(novos)
+    return len(novos)
+
+
+def conferir(barbearia, dia, metodo=None):
+    """Conciliação: marca como conferidos os pagamentos do dia (de um método ou todos)."""
+    qs = _do_dia(barbearia, dia).filter(conferido_em__isnull=True)
+    if metodo:
+        qs = qs.filter(metodo=metodo)
+    return qs.update(conferido_em=timezone.now())
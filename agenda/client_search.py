@@ -0,0 +1,169 @@
+"""
+Busca de clientes do dono (autocomplete do novo agendamento).
+
+- `Client.nome_normalizado`: nome minúsculo e sem acento (gravado no save), então
+  "João", "joao" e "JOÃO " são o mesmo cliente
+- Postgres: pg_trgm (índice GIN da migração 0110) acha pedaço do nome e tolera
+  erro de digitação ("joao slva")
+- SQLite/dev: índice de prefixos em memória do processo, por barbearia (palavras
+  distintas ordenadas + bisect), refeito quando os clientes da barbearia mudam (sinais)
+- termo com 3+ dígitos também procura no telefone
+"""
+import difflib
+import heapq
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F, FloatField, Func, Lookup, Q, Value
+
+from .models import Client, _digits_only, normalizar_texto
+
+LIMITE = 8
+MIN_DIGITOS = 3
+SEMELHANCA_MINIMA = 0.75  # fallback do SQLite (difflib) pra erro de digitação
+
+
+# ==========================
+# POSTGRES (pg_trgm)
+# ==========================
+
+class TrigramPalavra(Lookup):
+    """`nome %> termo`: alguma palavra do nome parece com o termo (usa o índice GIN)."""
+    lookup_name = "trgm_palavra"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %%> {rhs}", lhs_params + rhs_params
+
+
+# só no campo da busca (índice GIN da 0110), não em todo CharField do projeto
+Client._meta.get_field("nome_normalizado").register_lookup(TrigramPalavra)
+
+
+class SemelhancaPalavra(Func):
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+
+def _buscar_postgres(barbearia, termo, digitos, limite):
+    filtro = Q(nome_normalizado__contains=termo) | Q(nome_normalizado__trgm_palavra=termo)
+    if digitos:
+        filtro |= Q(telefone__contains=digitos)
+    return list(
+        Client.objects.filter(filtro, barbearia=barbearia)
+        .annotate(semelhanca=SemelhancaPalavra(Value(termo), F("nome_normalizado")))
+        .order_by("-semelhanca", "nome_normalizado", "id")
+        .values("id", "nome", "telefone")[:limite]
+    )
+
+
+# ==========================
+# SQLITE (índice em memória)
+# ==========================
+
+class IndicePrefixos:
+    def __init__(self, linhas):
+        self.clientes = {}
+        self.ids_por_palavra = defaultdict(list)
+        for id_, nome, normalizado, telefone in linhas:
+            self.clientes[id_] = (nome, normalizado, telefone or "")
+            for palavra in set(normalizado.split()):
+                self.ids_por_palavra[palavra].append(id_)
+        self.palavras = sorted(self.ids_por_palavra)
+
+    def _com_prefixo(self, prefixo):
+        i = bisect_left(self.palavras, prefixo)
+        while i < len(self.palavras) and self.palavras[i].startswith(prefixo):
+            yield self.palavras[i]
+            i += 1
+
+    def _ids_da_palavra(self, token):
+        palavras = list(self._com_prefixo(token))
+        if not palavras and len(token) >= 3:
+            # nenhum prefixo bate: tenta erro de digitação entre palavras com a mesma inicial
+            candidatas = list(self._com_prefixo(token[0]))
+            palavras = difflib.get_close_matches(token, candidatas, n=5, cutoff=SEMELHANCA_MINIMA)
+        return {id_ for palavra in palavras for id_ in self.ids_por_palavra[palavra]}
+
+    def buscar(self, termo, digitos, limite):
+        ids = None
+        for token in termo.split():
+            achados = self._ids_da_palavra(token)
+            ids = achados if ids is None else ids & achados
+            if not ids:
+                break
+        ids = set(ids or ())
+        if digitos:
+            ids.update(i for i, (_, _, tel) in self.clientes.items() if digitos in tel)
+
+        def ordem(id_):
+            _, normalizado, telefone = self.clientes[id_]
+            comeca = normalizado.startswith(termo) or (digitos and telefone.startswith(digitos))
+            return (not comeca, normalizado, id_)
+
+        return [
+            {"id": i, "nome": self.clientes[i][0], "telefone": self.clientes[i][2]}
+            for i in heapq.nsmallest(limite, ids, key=ordem)
+        ]
+
+
+# barbearia_id -> (versão, índice)
+_indices = {}
+
+
+def _chave_versao(barbearia_id):
+    return f"clientes:versao:{barbearia_id}"
+
+
+def versao_clientes(barbearia_id):
+    versao = cache.get(_chave_versao(barbearia_id))
+    if versao is None:
+        cache.add(_chave_versao(barbearia_id), time.time_ns(), None)
+        versao = cache.get(_chave_versao(barbearia_id))
+    return versao
+
+
+def invalidar(barbearia_id):
+    """Cliente criado/alterado/apagado: o índice da barbearia é refeito na próxima busca (todo processo)."""
+    cache.set(_chave_versao(barbearia_id), time.time_ns(), None)
+
+
+def indice(barbearia):
+    versao = versao_clientes(barbearia.id)
+    atual = _indices.get(barbearia.id)
+    if atual and atual[0] == versao:
+        return atual[1]
+    linhas = Client.objects.filter(barbearia=barbearia).values_list("id", "nome", "nome_normalizado", "telefone")
+    novo = IndicePrefixos(linhas.iterator(chunk_size=2000))
+    _indices[barbearia.id] = (versao, novo)
+    return novo
+
+
+# ==========================
+# API
+# ==========================
+
+def buscar(barbearia, q, limite=LIMITE):
+    """Melhores clientes da barbearia pelo nome (ou telefone): [{id, nome, telefone}]."""
+    termo = normalizar_texto(q)
+    if not termo:
+        return []
+    digitos = _digits_only(q)
+    digitos = digitos if len(digitos) >= MIN_DIGITOS else ""
+
+    if connections[Client.objects.db].vendor == "postgresql":
+        return _buscar_postgres(barbearia, termo, digitos, limite)
+    return indice(barbearia).buscar(termo, digitos, limite)
+
+
+def cliente_por_nome(barbearia, nome):
+    """Cliente com exatamente esse nome (ignorando acento/caixa/espaços), ou None."""
+    return (
+        Client.objects.filter(barbearia=barbearia, nome_normalizado=normalizar_texto(nome))
+        .order_by("id")
+        .first()
+    )
@@ -0,0 +1,242 @@
+"""
+Histórico materializado do cliente (visitas, gasto, cancelamentos, intervalo médio).
+
+Visita = agendamento confirmado que já começou (na tabela quente ou no
+arquivo, agenda/arquivo.py). Cada escrita de Appointment (agenda/signals.py,
+ou o lote em agenda/lote_agenda.py) passa a mudança pra `aplicar_mudancas()`:
+
+- cancelamento entrou/saiu: `UPDATE ... SET cancelamentos = cancelamentos ± 1`
+  na mesma transação (uma linha, sem reler o histórico)
+- mudou alguma visita (confirmou/cancelou/editou um horário que já passou):
+  o cliente é recalculado depois do commit (`on_commit`), fora da trava de
+  escrita da reserva
+- o resto (reserva/confirmação/remarcação de horário futuro) não custa nada
+  aqui: vira visita quando o horário passa, e `manage.py rebuild_client_stats
+  --recentes` no cron (1x por dia) recalcula quem teve horário confirmado nas
+  últimas horas
+
+`recalcular_clientes()` / `reconstruir()` refazem do zero (comando e conserto).
+
+Com isso "melhores clientes", "mais frequentes" e "sumidos" são ordenação nos
+índices de Client, sem GROUP BY em todos os agendamentos.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import retorno
+from .models import Appointment, ArchivedAppointment, Client
+
+DECIMAL0 = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+LOTE = 1000
+HORAS_RECENTES = 26  # cron diário + folga
+
+CAMPOS = ("visitas", "primeira_visita", "ultima_visita", "total_gasto", "cancelamentos", "intervalo_medio_dias")
+VAZIO = {
+    "visitas": 0,
+    "primeira_visita": None,
+    "ultima_visita": None,
+    "total_gasto": Decimal("0"),
+    "cancelamentos": 0,
+    "intervalo_medio_dias": None,
+}
+
+ORDENS = {
+    "gasto": ("Quem mais gastou", ("-total_gasto", "nome_normalizado", "id")),
+    "visitas": ("Mais frequentes", ("-visitas", "nome_normalizado", "id")),
+    "recentes": ("Vieram por último", ("-ultima_visita", "id")),
+    "sumidos": ("Sumidos há mais tempo", ("ultima_visita", "id")),
+    "nome": ("Nome", ("nome_normalizado", "id")),
+}
+
+
+# ==========================
+# CÁLCULO
+# ==========================
+
+def _intervalo(r):
+    if r["visitas"] < 2:
+        return None
+    dias = (r["ultima_visita"] - r["primeira_visita"]).total_seconds() / 86400 / (r["visitas"] - 1)
+    return Decimal(f"{dias:.1f}")
+
+
+def calcular(agendamentos, agora=None):
+    """{cliente_id: {campo: valor}} dos clientes que aparecem no queryset de Appointment."""
+    agora = agora or timezone.now()
+    visita = Q(status="confirmado", inicio__lte=agora)
+    linhas = (
+        agendamentos.exclude(cliente_id=None)
+        .values("cliente_id")
+        .annotate(
+            visitas=Count("id", filter=visita),
+            primeira_visita=Min("inicio", filter=visita),
+            ultima_visita=Max("inicio", filter=visita),
+            total_gasto=Coalesce(Sum("valor_no_momento", filter=visita), DECIMAL0),
+            cancelamentos=Count("id", filter=Q(status="cancelado")),
+        )
+        .order_by()
+    )
+    resultado = {}
+    for r in linhas:
+        r["intervalo_medio_dias"] = _intervalo(r)
+        resultado[r.pop("cliente_id")] = r
+    return resultado
+
+
+def juntar(a, b):
+    """Soma as estatísticas de duas fontes (tabela quente + arquivo)."""
+    resultado = dict(a)
+    for cliente_id, r in b.items():
+        q = resultado.get(cliente_id)
+        if q is None:
+            resultado[cliente_id] = r
+            continue
+        primeiras = [d for d in (q["primeira_visita"], r["primeira_visita"]) if d]
+        ultimas = [d for d in (q["ultima_visita"], r["ultima_visita"]) if d]
+        q = {
+            "visitas": q["visitas"] + r["visitas"],
+            "primeira_visita": min(primeiras, default=None),
+            "ultima_visita": max(ultimas, default=None),
+            "total_gasto": q["total_gasto"] + r["total_gasto"],
+            "cancelamentos": q["cancelamentos"] + r["cancelamentos"],
+        }
+        q["intervalo_medio_dias"] = _intervalo(q)
+        resultado[cliente_id] = q
+    return resultado
+
+
+def aplicar(clientes_qs, estatisticas):
+    """Grava as estatísticas nos clientes do queryset (quem não aparece volta pra zero)."""
+    clientes = list(clientes_qs.only("id", *CAMPOS))
+    for c in clientes:
+        valores = estatisticas.get(c.id, VAZIO)
+        for campo in CAMPOS:
+            setattr(c, campo, valores[campo])
+    clientes_qs.model.objects.bulk_update(clientes, CAMPOS, batch_size=LOTE)
+    return len(clientes)
+
+
+# ==========================
+# ESCRITA
+# ==========================
+
+def recalcular_clientes(ids, agora=None):
+    """Recalcula os contadores dos clientes `ids` a partir dos agendamentos deles."""
+    ids = sorted({i for i in ids if i})
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i:i + LOTE]
+        with transaction.atomic():
+            estatisticas = juntar(
+                calcular(Appointment.objects.filter(cliente_id__in=lote), agora),
+                calcular(ArchivedAppointment.objects.filter(cliente_id__in=lote), agora),
+            )
+            aplicar(Client.objects.filter(id__in=lote), estatisticas)
+            retorno.atualizar_previsao(Client.objects.filter(id__in=lote))
+    return len(ids)
+
+
+def recalcular_depois_do_commit(ids):
+    """recalcular_clientes() quando a transação atual confirmar (na hora, se não houver transação)."""
+    ids = sorted({i for i in ids if i})
+    if ids:
+        transaction.on_commit(partial(recalcular_clientes, ids))
+
+
+def retrato(cliente_id, status, inicio, valor):
+    """O que um agendamento pesa no histórico do cliente (antes/depois de uma escrita)."""
+    return (cliente_id, status, inicio, valor or 0) if cliente_id else None
+
+
+def _e_visita(r, agora):
+    return r is not None and r[1] == "confirmado" and r[2] <= agora
+
+
+def aplicar_mudancas(mudancas, agora=None):
+    """
+    `mudancas`: pares (antes, depois) de retrato() — None quando o agendamento não existia/foi apagado.
+    Cancelamentos andam por UPDATE com F(); visitas alteradas recalculam o cliente depois do commit.
+    """
+    agora = agora or timezone.now()
+    cancelamentos = defaultdict(int)
+    recalcular = set()
+    for antes, depois in mudancas:
+        if antes == depois:
+            continue
+        for r, sinal in ((antes, -1), (depois, 1)):
+            if r is not None and r[1] == "cancelado":
+                cancelamentos[r[0]] += sinal
+        if _e_visita(antes, agora) or _e_visita(depois, agora):
+            recalcular.update(r[0] for r in (antes, depois) if r is not None)
+
+    por_delta = defaultdict(list)
+    for cliente_id, delta in cancelamentos.items():
+        if delta and cliente_id not in recalcular:
+            por_delta[delta].append(cliente_id)
+    for delta, ids in sorted(por_delta.items()):
+        Client.objects.filter(id__in=ids).update(cancelamentos=Greatest(F("cancelamentos") + delta, 0))
+    recalcular_depois_do_commit(recalcular)
+
+
+def atualizar_recentes(horas=HORAS_RECENTES, agora=None):
+    """Clientes com horário confirmado que começou nas últimas `horas` (viraram visita sem nenhuma escrita)."""
+    agora = agora or timezone.now()
+    ids = (
+        Appointment.objects.filter(status="confirmado", inicio__gt=agora - timedelta(hours=horas), inicio__lte=agora)
+        .exclude(cliente_id=None)
+        .values_list("cliente_id", flat=True)
+        .distinct()
+    )
+    return recalcular_clientes(list(ids), agora)
+
+
+def reconstruir(barbearia_ids=None):
+    """Recalcula todos os clientes (de todas as barbearias ou só das informadas)."""
+    qs = Client.objects.all()
+    if barbearia_ids is not None:
+        qs = qs.filter(barbearia_id__in=barbearia_ids)
+    return recalcular_clientes(qs.values_list("id", flat=True))
+
+
+# ==========================
+# LEITURA
+# ==========================
+
+def listar(barbearia, ordem="gasto"):
+    _, campos = ORDENS.get(ordem, ORDENS["gasto"])
+    qs = Client.objects.filter(barbearia=barbearia)
+    if ordem in ("recentes", "sumidos"):
+        qs = qs.filter(visitas__gt=0)
+    return qs.order_by(*campos)
+
+
+def perfil(cliente, limite_historico=50):
+    agora = timezone.now()
+    agendamentos = Appointment.objects.filter(cliente=cliente).select_related("servico")
+    arquivados = ArchivedAppointment.objects.filter(cliente=cliente).select_related("servico")
+    preferidos = Counter()
+    for qs in (agendamentos, arquivados):
+        for r in qs.filter(status="confirmado", inicio__lte=agora).values("servico__nome").annotate(qtd=Count("id")):
+            preferidos[r["servico__nome"]] += r["qtd"]
+    historico = list(agendamentos.order_by("-inicio")[:limite_historico])
+    if len(historico) < limite_historico:
+        historico += arquivados.order_by("-inicio")[:limite_historico - len(historico)]
+    return {
+        "cliente": cliente,
+        "ticket_medio": (cliente.total_gasto / cliente.visitas) if cliente.visitas else None,
+        "proximo": (
+            agendamentos.filter(inicio__gt=agora).exclude(status="cancelado").order_by("inicio").first()
+        ),
+        "servicos_preferidos": [
+            {"servico__nome": nome, "qtd": qtd}
+            for nome, qtd in sorted(preferidos.items(), key=lambda item: (-item[1], item[0]))[:3]
+        ],
+        "historico": historico,
+    }
@@ -0,0 +1,261 @@
+"""
+Números do painel (dashboard), fora da view.
+
+A página do painel sai na hora só com a "casca"; cada bloco (agenda do dia,
+KPIs do dia, semana/mês, tops, insights, série de 14 dias) é um painel com
+endpoint próprio (`homemcom_dashboard_painel`) e TTL de cache próprio, buscados
+em paralelo pela página. Um painel lento não segura os outros.
+
+Tudo aqui devolve dados serializáveis em JSON (valores já formatados).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractHour
+from django.utils import timezone
+
+from . import fechamento, rankings
+from .db_router import using_replica
+from .models import Appointment, ProductSale
+from .occupancy import calcular_ocupacao
+
+DECIMAL0 = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _f2(v):
+    return f"{float(v or 0):.2f}"
+
+
+def _crescimento(atual, anterior):
+    atual, anterior = float(atual or 0), float(anterior or 0)
+    return ((atual - anterior) / anterior) * 100 if anterior > 0 else None
+
+
+def _semana(hoje):
+    inicio = hoje - timedelta(days=hoje.weekday())  # segunda
+    return inicio, inicio + timedelta(days=6)  # domingo
+
+
+def _servicos(barbearia, **filtro):
+    return Appointment.objects.filter(barbearia=barbearia, status="confirmado", **filtro).aggregate(
+        total=Coalesce(Sum("valor_no_momento"), DECIMAL0),
+        media=Coalesce(Avg("valor_no_momento"), DECIMAL0),
+        qtd=Count("id"),
+    )
+
+
+def _produtos(barbearia, **filtro):
+    return ProductSale.objects.filter(barbearia=barbearia, **filtro).aggregate(
+        total=Coalesce(Sum("valor_total"), DECIMAL0),
+        qtd=Coalesce(Sum("quantidade"), Value(0)),
+    )
+
+
+# ==========================
+# BLOCOS
+# ==========================
+
+def agenda_hoje(barbearia, hoje):
+    # única lista que volta como HTML (o template formata data/valor no locale)
+    return {
+        "agendamentos_hoje": list(
+            Appointment.objects.filter(barbearia=barbearia, inicio__date=hoje)
+            .order_by("inicio")
+            .values("id", "inicio", "status", "valor_no_momento", "cliente__nome", "servico__nome")
+        )
+    }
+
+
+def kpis_dia(barbearia, hoje):
+    serv = _servicos(barbearia, inicio__date=hoje)
+    prod = _produtos(barbearia, data_hora__date=hoje)
+    cancelado = Appointment.objects.filter(
+        barbearia=barbearia, status="cancelado", inicio__date=hoje
+    ).aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
+
+    return {
+        "total_atendimentos_hoje": serv["qtd"],
+        "total_valor_hoje": _f2(float(serv["total"]) + float(prod["total"])),
+        "ticket_medio_hoje": _f2(serv["media"]),
+        "total_servicos_hoje": _f2(serv["total"]),
+        "total_produtos_hoje": _f2(prod["total"]),
+        "qtd_produtos_hoje": int(prod["qtd"] or 0),
+        "total_cancelado_hoje": _f2(cancelado),
+    }
+
+
+def resumo_periodos(barbearia, hoje):
+    # semana/mês/ano: dias fechados vêm do livro (agenda/fechamento.py), só os abertos são somados na hora
+    inicio_semana, fim_semana = _semana(hoje)
+    inicio_ant, fim_ant = inicio_semana - timedelta(days=7), fim_semana - timedelta(days=7)
+
+    sem = fechamento.totais(barbearia, inicio_semana, fim_semana)
+    ant = fechamento.totais(barbearia, inicio_ant, fim_ant)
+    mes = fechamento.totais(barbearia, hoje.replace(day=1), hoje)
+    ano = fechamento.totais(barbearia, hoje.replace(month=1, day=1), hoje)
+
+    crescimento = _crescimento(sem["receita"], ant["receita"])
+
+    return {
+        "total_valor_semana": _f2(sem["receita"]),
+        "total_servicos_semana": _f2(sem["servicos_receita"]),
+        "total_produtos_semana": _f2(sem["produtos_receita"]),
+        "qtd_produtos_semana": int(sem["produtos_qtd"] or 0),
+        "total_valor_mes": _f2(mes["receita"]),
+        "total_servicos_mes": _f2(mes["servicos_receita"]),
+        "total_produtos_mes": _f2(mes["produtos_receita"]),
+        "qtd_produtos_mes": int(mes["produtos_qtd"] or 0),
+        "total_valor_ano": _f2(ano["receita"]),
+        "crescimento_semana_pct": crescimento,
+        "crescimento_semana_percent": f"{crescimento:.0f}" if crescimento is not None else None,
+        "crescimento_servicos_semana_pct": _crescimento(sem["servicos_receita"], ant["servicos_receita"]),
+        "crescimento_produtos_semana_pct": _crescimento(sem["produtos_receita"], ant["produtos_receita"]),
+    }
+
+
+def tops_semana(barbearia, hoje):
+    inicio_semana, fim_semana = _semana(hoje)
+    return {
+        "top_servicos_semana": [
+            {"nome": r["servico__nome"] or "—", "qtd": int(r["qtd"] or 0), "total": _f2(r["receita"])}
+            for r in rankings.top_servicos(barbearia, inicio_semana, fim_semana, limite=5)
+        ],
+        "top_produtos_semana": [
+            {"nome": r["nome"], "qtd": int(r["qtd"] or 0), "receita": _f2(r["receita"])}
+            for r in rankings.top_produtos(barbearia, inicio_semana, fim_semana, limite=5)
+        ],
+    }
+
+
+def insights_semana(barbearia, hoje, tops=None):
+    inicio_semana, fim_semana = _semana(hoje)
+    tops = tops or painel(barbearia, "tops", hoje)
+
+    semana = Appointment.objects.filter(
+        barbearia=barbearia, inicio__date__gte=inicio_semana, inicio__date__lte=fim_semana
+    )
+    contagem_semana = semana.aggregate(total=Count("id"), cancel=Count("id", filter=Q(status="cancelado")))
+    contagem_hoje = Appointment.objects.filter(barbearia=barbearia, inicio__date=hoje).aggregate(
+        total=Count("id"), cancel=Count("id", filter=Q(status="cancelado"))
+    )
+    taxa_hoje = (contagem_hoje["cancel"] / contagem_hoje["total"] * 100) if contagem_hoje["total"] else 0
+    taxa_semana = (contagem_semana["cancel"] / contagem_semana["total"] * 100) if contagem_semana["total"] else 0
+
+    # pico horário (semana)
+    pico = (
+        semana.filter(status="confirmado")
+        .annotate(hora=ExtractHour("inicio"))
+        .values("hora")
+        .annotate(qtd=Count("id"))
+        .order_by("-qtd")
+        .first()
+    )
+
+    # ocupação (minutos agendados / disponíveis, já descontando bloqueios recorrentes)
+    ocupacao = calcular_ocupacao(barbearia, inicio_semana, fim_semana)
+
+    if tops["top_servicos_semana"]:
+        s0 = tops["top_servicos_semana"][0]
+        melhor_servico = f"{s0['nome']} lidera na semana ({s0['qtd']} atend.)"
+    else:
+        melhor_servico = "Sem serviços confirmados na semana ainda"
+
+    if tops["top_produtos_semana"]:
+        p0 = tops["top_produtos_semana"][0]
+        produto_top = f"{p0['nome']} é o campeão ({p0['qtd']} un.)"
+    else:
+        produto_top = "Sem vendas de produto na semana"
+
+    if pico and pico.get("hora") is not None and pico.get("qtd"):
+        pico_horario = f"Pico por volta das {int(pico['hora']):02d}h ({int(pico['qtd'])} agend.)"
+    else:
+        pico_horario = "Pico de horário ainda não definido"
+
+    return {
+        "taxa_cancelamento_hoje": taxa_hoje,
+        "taxa_cancelamento_semana": taxa_semana,
+        "ocupacao_semana_pct": ocupacao["ocupacao_pct"],
+        "insight_melhor_servico_semana": melhor_servico,
+        "insight_produto_top_semana": produto_top,
+        "insight_pico_horario_semana": pico_horario,
+        "insight_ocupacao_semana": (
+            f"{ocupacao['ocupacao_pct']:.0f}% da agenda ocupada "
+            f"({ocupacao['agendado_min'] // 60}h de {ocupacao['disponivel_min'] // 60}h)"
+        ),
+        "insight_taxa_cancelamento": f"Cancelamentos: {taxa_hoje:.0f}% hoje | {taxa_semana:.0f}% semana",
+    }
+
+
+def serie_14_dias(barbearia, hoje):
+    """Receita dos últimos 14 dias (serviços e produtos): livro + hoje ao vivo."""
+    inicio_14 = hoje - timedelta(days=13)
+
+    por_dia = fechamento.por_dia(barbearia, inicio_14, hoje)
+
+    labels, servicos, produtos = [], [], []
+    d = inicio_14
+    while d <= hoje:
+        labels.append(d.strftime("%d/%m"))
+        servicos.append(float(por_dia.get(d, {}).get("servicos_receita") or 0))
+        produtos.append(float(por_dia.get(d, {}).get("produtos_receita") or 0))
+        d += timedelta(days=1)
+
+    return {"chart": {"labels": labels, "servicos": servicos, "produtos": produtos}}
+
+
+# ==========================
+# PAINÉIS (cache por barbearia)
+# ==========================
+
+# nome -> (função, TTL em segundos). Agenda/KPIs do dia mudam o tempo todo;
+# série de 14 dias quase nada. Sobrescreva com settings.DASHBOARD_CACHE_TTL.
+PAINEIS = {
+    "agenda": (agenda_hoje, 15),
+    "hoje": (kpis_dia, 30),
+    "periodos": (resumo_periodos, 120),
+    "tops": (tops_semana, 300),
+    "insights": (insights_semana, 300),
+    "serie": (serie_14_dias, 900),
+}
+_TTL = getattr(settings, "DASHBOARD_CACHE_TTL", {})
+
+# lidos sempre do primário: lista com botões de ação, tem que refletir o que o dono acabou de mudar
+PAINEIS_PRIMARIO = {"agenda"}
+
+
+def _chave_versao(barbearia_id):
+    return f"painel:v:{barbearia_id}"
+
+
+def versao_dados(barbearia_id):
+    versao = cache.get(_chave_versao(barbearia_id))
+    if versao is None:
+        cache.add(_chave_versao(barbearia_id), time.time_ns(), None)
+        versao = cache.get(_chave_versao(barbearia_id))
+    return versao
+
+
+def invalidar(barbearia_id):
+    """Agendamento/venda mudou: todos os painéis da barbearia saem do cache."""
+    # versão = relógio (não contador): se a chave sumir do cache, nunca volta a um valor já usado
+    cache.set(_chave_versao(barbearia_id), time.time_ns(), None)
+
+
+def painel(barbearia, nome, hoje=None):
+    ttl = PAINEIS[nome][1]
+    hoje = hoje or timezone.localdate()
+    chave = f"painel:{barbearia.id}:{versao_dados(barbearia.id)}:{nome}:{hoje.isoformat()}"
+    return cache.get_or_set(chave, lambda: calcular_painel(barbearia, nome, hoje), _TTL.get(nome, ttl))
+
+
+def calcular_painel(barbearia, nome, hoje=None):
+    """O painel `nome` direto do banco (sem cache), no banco certo (primário ou réplica)."""
+    func = PAINEIS[nome][0]
+    hoje = hoje or timezone.localdate()
+    if nome in PAINEIS_PRIMARIO:
+        return func(barbearia, hoje)
+    with using_replica():
+        return func(barbearia, hoje)
@@ -0,0 +1,51 @@
+"""
+Leituras analíticas (relatórios, agregados do painel, painel do operador, jobs)
+numa réplica de leitura, quando configurada (DATABASE_REPLICA_URL).
+
+Nada vai pra réplica por padrão: só o que roda dentro de `using_replica()`.
+Escritas, fluxo de agendamento/portal e qualquer leitura dentro de uma
+transação aberta no primário (ler o que acabou de escrever) ficam no primário.
+
+    with using_replica():
+        dados = calcular_relatorio(...)
+
+Também funciona como decorator (`@using_replica()`).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_na_replica = ContextVar("agenda_na_replica", default=False)
+
+
+def alias_replica():
+    alias = getattr(settings, "REPLICA_DB_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def using_replica():
+    token = _na_replica.set(True)
+    try:
+        yield
+    finally:
+        _na_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _na_replica.get():
+            return None
+        # transação aberta no primário = pode ter escrita ainda não replicada
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # réplica = mesmos dados do primário
+        return True
@@ -0,0 +1,170 @@
+"""
+Deduplicação de clientes (`manage.py dedupe_clients`).
+
+Agrupa sem comparar todo mundo com todo mundo (blocking):
+- mesmo telefone (`chave_telefone`) = mesmo cliente (é a identidade do portal)
+- nome parecido: só compara dentro do bloco "primeira palavra + inicial da última",
+  e cada nome só com os vizinhos na ordem alfabética (JANELA); nome de uma palavra
+  só ("João") nunca junta por nome
+- um grupo nunca fica com dois telefones diferentes
+
+Fusão: os agendamentos dos duplicados passam pro cliente mantido num UPDATE só,
+os duplicados são apagados e cada um deixa um ClientMerge (dados + agendamentos movidos).
+"""
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Count
+
+from . import client_search, client_stats, dashboard
+from .models import Appointment, ArchivedAppointment, Client, ClientMerge
+
+SEMELHANCA_NOME = 0.9
+JANELA = 8
+
+
+class _Grupos:
+    """Union-find com o telefone de cada grupo (no máximo um)."""
+
+    def __init__(self, clientes):
+        self.pai = {c["id"]: c["id"] for c in clientes}
+        self.telefone = {c["id"]: c["telefone"] for c in clientes}
+        self.criterios = defaultdict(set)
+
+    def raiz(self, id_):
+        while self.pai[id_] != id_:
+            self.pai[id_] = self.pai[self.pai[id_]]
+            id_ = self.pai[id_]
+        return id_
+
+    def juntar(self, a, b, criterio):
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra == rb:
+            return
+        ta, tb = self.telefone[ra], self.telefone[rb]
+        if ta and tb and ta != tb:
+            return
+        self.pai[rb] = ra
+        self.telefone[ra] = ta or tb
+        self.criterios[ra] |= self.criterios.pop(rb, set()) | {criterio}
+
+
+def _bloco_nome(normalizado):
+    palavras = normalizado.split()
+    if len(palavras) < 2:
+        return None
+    return (palavras[0], palavras[-1][0])
+
+
+def _parecidos(a, b, semelhanca):
+    if a == b:
+        return True
+    sm = SequenceMatcher(None, a, b)
+    # limites superiores baratos antes do ratio() de verdade
+    return sm.real_quick_ratio() >= semelhanca and sm.quick_ratio() >= semelhanca and sm.ratio() >= semelhanca
+
+
+def encontrar_grupos(barbearia, semelhanca=SEMELHANCA_NOME):
+    """
+    Grupos de clientes duplicados da barbearia: [(criterio, [cliente, ...])], cada
+    cliente um dict (id, nome, nome_normalizado, telefone, observacoes, qtd_agendamentos).
+    """
+    clientes = list(
+        Client.objects.filter(barbearia=barbearia)
+        .annotate(qtd_agendamentos=Count("agendamentos"))
+        .values("id", "nome", "nome_normalizado", "telefone", "observacoes", "bloqueado_online", "qtd_agendamentos")
+        .order_by("id")
+    )
+    for c in clientes:
+        c["telefone"] = c["telefone"] or ""
+    grupos = _Grupos(clientes)
+
+    por_telefone = defaultdict(list)
+    por_bloco = defaultdict(list)
+    for c in clientes:
+        if c["telefone"]:
+            por_telefone[c["telefone"]].append(c["id"])
+        bloco = _bloco_nome(c["nome_normalizado"])
+        if bloco:
+            por_bloco[bloco].append(c)
+
+    for ids in por_telefone.values():
+        for outro in ids[1:]:
+            grupos.juntar(ids[0], outro, "telefone")
+
+    for bloco in por_bloco.values():
+        bloco.sort(key=lambda c: c["nome_normalizado"])
+        for i, c in enumerate(bloco):
+            for outro in bloco[i + 1:i + 1 + JANELA]:
+                if c["telefone"] and outro["telefone"] and c["telefone"] != outro["telefone"]:
+                    continue
+                if _parecidos(c["nome_normalizado"], outro["nome_normalizado"], semelhanca):
+                    grupos.juntar(c["id"], outro["id"], "nome")
+
+    membros = defaultdict(list)
+    for c in clientes:
+        membros[grupos.raiz(c["id"])].append(c)
+    return [
+        ("+".join(sorted(grupos.criterios[raiz])), lista)
+        for raiz, lista in membros.items()
+        if len(lista) > 1
+    ]
+
+
+def escolher_mantido(grupo):
+    """Fica o cliente com mais agendamentos (empate: o mais antigo)."""
+    return min(grupo, key=lambda c: (-c["qtd_agendamentos"], c["id"]))
+
+
+def fundir(barbearia, mantido, duplicados, criterio, origem="comando"):
+    """
+    Passa os agendamentos dos `duplicados` pro `mantido` e apaga os duplicados.
+    Recebe os dicts de `encontrar_grupos`; devolve quantos agendamentos mudaram.
+    """
+    ids = [c["id"] for c in duplicados]
+    with transaction.atomic():
+        cliente = Client.objects.select_for_update().get(id=mantido["id"], barbearia=barbearia)
+        agendamentos = defaultdict(list)
+        for ag_id, cliente_id in Appointment.objects.filter(cliente_id__in=ids).values_list("id", "cliente_id"):
+            agendamentos[cliente_id].append(ag_id)
+        movidos = Appointment.objects.filter(cliente_id__in=ids).update(cliente=cliente)
+        ArchivedAppointment.objects.filter(cliente_id__in=ids).update(cliente=cliente)
+
+        # o mantido herda o que só o duplicado tinha
+        alterados = []
+        telefone = next((c["telefone"] for c in duplicados if c["telefone"]), "")
+        if telefone and not cliente.telefone:
+            cliente.telefone = telefone
+            alterados.append("telefone")
+        observacoes = [c["observacoes"] for c in duplicados if c["observacoes"]]
+        if observacoes:
+            cliente.observacoes = "\n".join(filter(None, [cliente.observacoes, *observacoes]))
+            alterados.append("observacoes")
+        if any(c["bloqueado_online"] for c in duplicados) and not cliente.bloqueado_online:
+            cliente.bloqueado_online = True
+            alterados.append("bloqueado_online")
+        if alterados:
+            cliente.save(update_fields=alterados)
+
+        ClientMerge.objects.bulk_create([
+            ClientMerge(
+                barbearia=barbearia,
+                mantido=cliente,
+                removido_id=c["id"],
+                removido_nome=c["nome"],
+                removido_telefone=c["telefone"],
+                removido_observacoes=c["observacoes"] or "",
+                criterio=criterio,
+                agendamentos_movidos=agendamentos.get(c["id"], []),
+                origem=origem,
+            )
+            for c in duplicados
+        ])
+        Client.objects.filter(id__in=ids).delete()
+        client_stats.recalcular_depois_do_commit([cliente.id])
+
+    # UPDATE em lote não dispara sinais: agenda/painel mostram o nome do cliente
+    dashboard.invalidar(barbearia.id)
+    client_search.invalidar(barbearia.id)
+    return movidos
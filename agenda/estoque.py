@@ -0,0 +1,94 @@
+"""
+Estoque de produtos (só dos que têm `controla_estoque`).
+
+- toda mudança é `UPDATE produto SET estoque = estoque ± n` (F()), nunca
+  ler-somar-gravar: duas vendas no balcão ao mesmo tempo não se atropelam.
+  O saldo é relido na mesma transação, com a linha ainda travada pelo UPDATE
+- cada mudança vira uma linha em MovimentoEstoque (com o saldo depois dela)
+- venda criada/alterada/apagada mexe no estoque pelos sinais (agenda/signals.py),
+  dentro da transação de quem salvou; venda em lote chama `baixar_vendas()` direto
+- `baixo_estoque()`: produtos no mínimo ou abaixo, numa query
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import MovimentoEstoque, Product
+
+
+def _somar(produto_ids_deltas):
+    """{produto_id: delta} -> {produto_id: saldo novo}, só dos produtos com estoque controlado."""
+    saldos = {}
+    # ordem fixa de id: duas transações travam as linhas na mesma ordem (sem deadlock)
+    for produto_id in sorted(produto_ids_deltas):
+        delta = produto_ids_deltas[produto_id]
+        if not delta:
+            continue
+        if Product.objects.filter(pk=produto_id, controla_estoque=True).update(estoque=F("estoque") + delta):
+            saldos[produto_id] = None
+    if saldos:
+        saldos.update(Product.objects.filter(pk__in=saldos).values_list("id", "estoque"))
+    return saldos
+
+
+def baixar_vendas(vendas, tipo=MovimentoEstoque.TIPO_VENDA, usuario=None):
+    """Tira do estoque as quantidades das `vendas` (estorno: põe de volta). Devolve {produto_id: saldo}."""
+    sinal = 1 if tipo == MovimentoEstoque.TIPO_ESTORNO else -1
+    vendas = [v for v in vendas if v.produto_id and v.quantidade]
+    deltas = defaultdict(int)
+    for v in vendas:
+        deltas[v.produto_id] += sinal * v.quantidade
+
+    with transaction.atomic():
+        saldos = _somar(deltas)
+        # saldo depois de cada venda: parte do saldo final e desfaz as seguintes, de trás pra frente
+        corrente = dict(saldos)
+        movimentos = []
+        for v in reversed(vendas):
+            if v.produto_id not in saldos:
+                continue
+            movimentos.append(MovimentoEstoque(
+                barbearia_id=v.barbearia_id,
+                produto_id=v.produto_id,
+                tipo=tipo,
+                quantidade=sinal * v.quantidade,
+                saldo=corrente[v.produto_id],
+                venda_id=v.pk,
+                usuario=usuario,
+            ))
+            corrente[v.produto_id] -= sinal * v.quantidade
+        MovimentoEstoque.objects.bulk_create(reversed(movimentos))
+    return saldos
+
+
+def movimentar(produto, quantidade, tipo=MovimentoEstoque.TIPO_ENTRADA, observacao="", usuario=None):
+    """Entrada (reposição) ou saída avulsa de `quantidade` (com sinal). Devolve o saldo novo."""
+    with transaction.atomic():
+        saldo = _somar({produto.pk: quantidade}).get(produto.pk)
+        if saldo is not None:
+            MovimentoEstoque.objects.create(
+                barbearia_id=produto.barbearia_id, produto=produto, tipo=tipo,
+                quantidade=quantidade, saldo=saldo, observacao=observacao, usuario=usuario,
+            )
+    return saldo
+
+
+def ajustar(produto, contagem, observacao="", usuario=None):
+    """Contagem física: o estoque passa a ser `contagem` (diferença registrada como ajuste)."""
+    with transaction.atomic():
+        atual = Product.objects.select_for_update().values_list("estoque", flat=True).get(pk=produto.pk)
+        if contagem == atual:
+            return atual
+        return movimentar(produto, contagem - atual, MovimentoEstoque.TIPO_AJUSTE, observacao, usuario)
+
+
+def baixo_estoque(barbearia):
+    """Produtos ativos com estoque controlado no mínimo ou abaixo (mais críticos primeiro)."""
+    return (
+        Product.objects.filter(
+            barbearia=barbearia, ativo=True, controla_estoque=True, estoque__lte=F("estoque_minimo"),
+        )
+        .annotate(falta=F("estoque_minimo") - F("estoque"))
+        .order_by("-falta", "nome")
+    )
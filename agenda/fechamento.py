@@ -0,0 +1,234 @@
+"""
+Fechamento do dia: livro imutável com os totais de cada (barbearia, dia).
+
+- `manage.py close_day` (cron logo depois da meia-noite) fecha ontem de todas
+  as barbearias de uma vez: poucas queries agrupadas por barbearia no dia
+  inteiro, um bulk_create no fim. Dia já fechado não é refeito
+- `totais()` de qualquer período = soma das linhas de FechamentoDiario dos
+  dias fechados + cálculo ao vivo só dos dias ainda abertos (hoje, e ontem
+  antes do cron). Mês e ano do painel e os KPIs dos relatórios saem daqui
+- editar/cancelar um agendamento de dia fechado não mexe no total fechado
+- o caixa por método (Payment, agenda/caixa.py) entra no fechamento como ficou
+  até a hora do fechamento
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import arquivo
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedProductSale, BarberShop, FechamentoDiario, Payment, ProductSale,
+)
+
+DECIMAL0 = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+LOTE = 1000
+
+CONTAGENS = ("agendamentos", "confirmados", "cancelados", "produtos_qtd")
+VALORES = ("servicos_receita", "cancelado_valor", "produtos_receita")
+CAMPOS = CONTAGENS + VALORES
+
+
+def limites_do_dia(dia):
+    """[meia-noite, meia-noite do dia seguinte) local: filtro por faixa usa o índice de `inicio`."""
+    inicio = timezone.make_aware(datetime.combine(dia, time.min))
+    return inicio, timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+
+
+def _fontes(dia):
+    if arquivo.pode_estar_arquivado(dia):
+        return [Appointment.objects.all(), ArchivedAppointment.objects.all()], [
+            ProductSale.objects.all(), ArchivedProductSale.objects.all()
+        ]
+    return [Appointment.objects.all()], [ProductSale.objects.all()]
+
+
+# ==========================
+# FECHAR
+# ==========================
+
+def calcular_dia(dia, barbearia_ids):
+    """{barbearia_id: {campo: valor, "por_servico": [...], "por_metodo": [...]}} do dia (só barbearias com movimento)."""
+    inicio, fim = limites_do_dia(dia)
+    agendamentos, vendas = _fontes(dia)
+    dados = defaultdict(lambda: {campo: 0 for campo in CAMPOS} | {"por_servico": [], "por_metodo": [], "gorjetas": 0})
+
+    for qs in agendamentos:
+        qs = qs.filter(barbearia_id__in=barbearia_ids, inicio__gte=inicio, inicio__lt=fim)
+        for r in (
+            qs.values("barbearia_id")
+            .annotate(
+                agendamentos=Count("id"),
+                confirmados=Count("id", filter=Q(status="confirmado")),
+                cancelados=Count("id", filter=Q(status="cancelado")),
+                servicos_receita=Coalesce(Sum("valor_no_momento", filter=Q(status="confirmado")), DECIMAL0),
+                cancelado_valor=Coalesce(Sum("valor_no_momento", filter=Q(status="cancelado")), DECIMAL0),
+            )
+            .order_by()
+        ):
+            d = dados[r.pop("barbearia_id")]
+            for campo, valor in r.items():
+                d[campo] += valor
+        for r in (
+            qs.filter(status="confirmado")
+            .values("barbearia_id", "servico_id", "servico__nome")
+            .annotate(qtd=Count("id"), receita=Coalesce(Sum("valor_no_momento"), DECIMAL0))
+            .order_by("barbearia_id", "-qtd", "servico__nome")
+        ):
+            dados[r["barbearia_id"]]["por_servico"].append({
+                "servico_id": r["servico_id"],
+                "nome": r["servico__nome"],
+                "qtd": r["qtd"],
+                "receita": str(r["receita"]),
+            })
+
+    for r in (
+        Payment.objects.filter(barbearia_id__in=barbearia_ids, pago_em__gte=inicio, pago_em__lt=fim)
+        .values("barbearia_id", "metodo")
+        .annotate(qtd=Count("id"), valor=Sum("valor"), gorjeta=Sum("gorjeta"))
+        .order_by("barbearia_id", "metodo")
+    ):
+        d = dados[r["barbearia_id"]]
+        d["gorjetas"] += r["gorjeta"]
+        d["por_metodo"].append({
+            "metodo": r["metodo"],
+            "qtd": r["qtd"],
+            "valor": str(r["valor"]),
+            "gorjeta": str(r["gorjeta"]),
+        })
+
+    for qs in vendas:
+        for r in (
+            qs.filter(barbearia_id__in=barbearia_ids, data_hora__gte=inicio, data_hora__lt=fim)
+            .values("barbearia_id")
+            .annotate(
+                produtos_qtd=Coalesce(Sum("quantidade"), Value(0)),
+                produtos_receita=Coalesce(Sum("valor_total"), DECIMAL0),
+            )
+            .order_by()
+        ):
+            d = dados[r.pop("barbearia_id")]
+            for campo, valor in r.items():
+                d[campo] += valor
+    return dados
+
+
+def fechar_dia(dia, barbearia_ids=None):
+    """Fecha o `dia` das barbearias que ainda não têm fechamento dele. Devolve quantas fechou."""
+    if dia >= timezone.localdate():
+        raise ValueError("Só dá pra fechar dia que já terminou.")
+
+    barbearias = BarberShop.objects.exclude(fechamentos__dia=dia)
+    if barbearia_ids is not None:
+        barbearias = barbearias.filter(id__in=barbearia_ids)
+    ids = list(barbearias.order_by("id").values_list("id", flat=True))
+
+    fechados = 0
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i:i + LOTE]
+        dados = calcular_dia(dia, lote)
+        # dia sem movimento também fecha (linha zerada): "fechado" ≠ "não rodou"
+        FechamentoDiario.objects.bulk_create(
+            [FechamentoDiario(barbearia_id=b, dia=dia, **dados.get(b, {})) for b in lote],
+            ignore_conflicts=True,
+        )
+        fechados += len(lote)
+    return fechados
+
+
+# ==========================
+# LEITURA
+# ==========================
+
+def _ao_vivo(barbearia, dias):
+    """Mesmos totais do fechamento, calculados na hora pros `dias` ainda abertos."""
+    total = {campo: 0 for campo in CAMPOS}
+    if not dias:
+        return total
+    return arquivo.somar([
+        total,
+        *(
+            qs.filter(inicio__date__in=dias).aggregate(
+                agendamentos=Count("id"),
+                confirmados=Count("id", filter=Q(status="confirmado")),
+                cancelados=Count("id", filter=Q(status="cancelado")),
+                servicos_receita=Coalesce(Sum("valor_no_momento", filter=Q(status="confirmado")), DECIMAL0),
+                cancelado_valor=Coalesce(Sum("valor_no_momento", filter=Q(status="cancelado")), DECIMAL0),
+            )
+            for qs in arquivo.agendamentos(barbearia.id, min(dias))
+        ),
+        *(
+            qs.filter(data_hora__date__in=dias).aggregate(
+                produtos_qtd=Coalesce(Sum("quantidade"), Value(0)),
+                produtos_receita=Coalesce(Sum("valor_total"), DECIMAL0),
+            )
+            for qs in arquivo.vendas(barbearia.id, min(dias))
+        ),
+    ])
+
+
+def _dias(data_inicio, data_fim):
+    dia = data_inicio
+    while dia <= data_fim:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def totais(barbearia, data_inicio, data_fim):
+    """Totais do período: dias fechados vêm do livro, dias abertos são calculados na hora."""
+    fechados = FechamentoDiario.objects.filter(barbearia=barbearia, dia__gte=data_inicio, dia__lte=data_fim)
+    soma = fechados.aggregate(
+        dias_fechados=Count("id"),
+        **{campo: Coalesce(Sum(campo), Value(0)) for campo in CONTAGENS},
+        **{campo: Coalesce(Sum(campo), DECIMAL0) for campo in VALORES},
+    )
+    abertos = []
+    if soma.pop("dias_fechados") < (data_fim - data_inicio).days + 1:
+        ja_fechados = set(fechados.values_list("dia", flat=True))
+        abertos = [d for d in _dias(data_inicio, data_fim) if d not in ja_fechados]
+    total = arquivo.somar([soma, _ao_vivo(barbearia, abertos)])
+    total["receita"] = total["servicos_receita"] + total["produtos_receita"]
+    return total
+
+
+def por_dia(barbearia, data_inicio, data_fim):
+    """{dia: {contagens, servicos_receita, produtos_receita}} do período (livro + dias abertos)."""
+    campos = ("agendamentos", "confirmados", "cancelados", "servicos_receita", "produtos_receita")
+    resultado = {
+        r["dia"]: r
+        for r in FechamentoDiario.objects.filter(
+            barbearia=barbearia, dia__gte=data_inicio, dia__lte=data_fim
+        ).values("dia", *campos)
+    }
+    abertos = [d for d in _dias(data_inicio, data_fim) if d not in resultado]
+    if not abertos:
+        return resultado
+
+    vazio = {campo: 0 for campo in campos}
+    for qs in arquivo.agendamentos(barbearia.id, min(abertos)):
+        for r in (
+            qs.filter(inicio__date__in=abertos)
+            .annotate(dia=TruncDate("inicio"))
+            .values("dia")
+            .annotate(
+                agendamentos=Count("id"),
+                confirmados=Count("id", filter=Q(status="confirmado")),
+                cancelados=Count("id", filter=Q(status="cancelado")),
+                servicos_receita=Coalesce(Sum("valor_no_momento", filter=Q(status="confirmado")), DECIMAL0),
+            )
+            .order_by()
+        ):
+            resultado.setdefault(r["dia"], dict(vazio, dia=r["dia"])).update(r)
+    for qs in arquivo.vendas(barbearia.id, min(abertos)):
+        for r in (
+            qs.filter(data_hora__date__in=abertos)
+            .annotate(dia=TruncDate("data_hora"))
+            .values("dia")
+            .annotate(produtos_receita=Coalesce(Sum("valor_total"), DECIMAL0))
+            .order_by()
+        ):
+            resultado.setdefault(r["dia"], dict(vazio, dia=r["dia"])).update(r)
+    return resultado
@@ -16,10 +16,46 @@ from .models import (
     Service,
     BarberShop,
     Cancellation,
+    MovimentoEstoque,
+    Payment,
     Product,
     ProductSale,
     WorkDayConfig,
 )
+from .client_search import cliente_por_nome
+from .reports import brl
+
+
+# util: valor digitado em pt-BR (venda de produto, caixa)
+def parse_decimal_ptbr(raw, field_label="valor"):
+    """
+    Aceita: 10,00 | 10.00 | 10 | "R$ 10,00"
+    """
+    if raw in (None, ""):
+        return None
+
+    if isinstance(raw, (Decimal, int, float)):
+        try:
+            return Decimal(str(raw))
+        except Exception:
+            raise ValidationError(f"{field_label.capitalize()} inválido.")
+
+    s = str(raw).strip()
+
+    # remove "R$" e espaços
+    s = s.replace("R$", "").replace(" ", "")
+
+    # se vier 1.234,56 -> vira 1234.56
+    if "," in s and "." in s:
+        s = s.replace(".", "").replace(",", ".")
+    else:
+        # se vier 10,00 -> vira 10.00
+        s = s.replace(",", ".")
+
+    try:
+        return Decimal(s)
+    except (InvalidOperation, ValueError):
+        raise ValidationError(f"{field_label.capitalize()} inválido. Ex: 10,00")
 
 
 class NovoAgendamentoForm(forms.ModelForm):
@@ -32,10 +68,12 @@ class NovoAgendamentoForm(forms.ModelForm):
             "autocomplete": "off",
         })
     )
+    # preenchido pelo autocomplete quando o dono escolhe um cliente da lista
+    cliente_selecionado = forms.IntegerField(required=False, widget=forms.HiddenInput)
 
     class Meta:
         model = Appointment
-        fields = ["cliente_nome", "servico", "inicio", "status"]
+        fields = ["cliente_nome", "cliente_selecionado", "servico", "inicio", "status"]
         widgets = {
             "servico": forms.Select(attrs={"class": "form-select ap-input"}),
             "status": forms.Select(attrs={"class": "form-select ap-input"}),
@@ -80,7 +118,12 @@ class NovoAgendamentoForm(forms.ModelForm):
         if not nome:
             raise forms.ValidationError("Informe o nome do cliente.")
 
-        cliente = Client.objects.filter(barbearia=barbearia, nome__iexact=nome).first()
+        # escolhido no autocomplete > mesmo nome (sem acento/caixa) > cliente novo
+        cliente = None
+        if self.cleaned_data.get("cliente_selecionado"):
+            cliente = Client.objects.filter(barbearia=barbearia, id=self.cleaned_data["cliente_selecionado"]).first()
+        if not cliente:
+            cliente = cliente_por_nome(barbearia, nome)
         if not cliente:
             cliente = Client.objects.create(barbearia=barbearia, nome=nome)
 
@@ -130,6 +173,9 @@ class RemarcarAgendamentoForm(forms.ModelForm):
         agendamento = super().save(commit=False)
         duracao = timedelta(minutes=agendamento.servico.duracao_minutos or 30)
         agendamento.fim = agendamento.inicio + duracao
+        # horário novo -> lembretes novos
+        agendamento.lembrete_24h_em = None
+        agendamento.lembrete_2h_em = None
 
         if commit:
             agendamento.save()
@@ -150,11 +196,13 @@ class ServiceForm(forms.ModelForm):
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
-        fields = ['nome', 'preco', 'ativo']
+        fields = ['nome', 'preco', 'ativo', 'controla_estoque', 'estoque_minimo']
         widgets = {
             'nome': forms.TextInput(attrs={'class': 'form-control'}),
             'preco': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'ativo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'controla_estoque': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'estoque_minimo': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
         }
 
 class WorkDayConfigForm(forms.ModelForm):
@@ -245,36 +293,6 @@ class ProductSaleForm(forms.ModelForm):
             raise ValidationError("Informe o nome do produto (manual) ou selecione um cadastrado.")
         return nome
 
-    def _parse_decimal_ptbr(self, raw, field_label="valor"):
-        """
-        Aceita: 10,00 | 10.00 | 10 | "R$ 10,00"
-        """
-        if raw in (None, ""):
-            return None
-
-        if isinstance(raw, (Decimal, int, float)):
-            try:
-                return Decimal(str(raw))
-            except Exception:
-                raise ValidationError(f"{field_label.capitalize()} inválido.")
-
-        s = str(raw).strip()
-
-        # remove "R$" e espaços
-        s = s.replace("R$", "").replace(" ", "")
-
-        # se vier 1.234,56 -> vira 1234.56
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            # se vier 10,00 -> vira 10.00
-            s = s.replace(",", ".")
-
-        try:
-            return Decimal(s)
-        except (InvalidOperation, ValueError):
-            raise ValidationError(f"{field_label.capitalize()} inválido. Ex: 10,00")
-
     def clean_quantidade(self):
         q = self.cleaned_data.get("quantidade")
         # se por algum motivo chegar como string "1"
@@ -295,7 +313,7 @@ class ProductSaleForm(forms.ModelForm):
         if produto and (raw in (None, "")):
             return None
 
-        valor = self._parse_decimal_ptbr(raw, "valor unitário")
+        valor = parse_decimal_ptbr(raw, "valor unitário")
         if valor is not None and valor < 0:
             raise ValidationError("O valor unitário não pode ser negativo.")
         return valor
@@ -564,3 +582,61 @@ class PublicClienteReagendarForm(forms.Form):
         label="Novo horário",
         widget=forms.TimeInput(attrs={"type": "time", "class": "form-control"}),
     )
+
+
+class PagamentoForm(forms.Form):
+    """Pagamento de um item no caixa do dia (agenda/caixa.py)."""
+
+    metodo = forms.ChoiceField(choices=Payment.METODO_CHOICES)
+    desconto = forms.CharField(required=False)
+    gorjeta = forms.CharField(required=False)
+
+    def __init__(self, *args, preco=None, **kwargs):
+        # preço do item pago: o desconto não passa dele
+        self.preco = preco
+        super().__init__(*args, **kwargs)
+
+    def _valor(self, campo):
+        valor = parse_decimal_ptbr(self.cleaned_data.get(campo), campo) or Decimal("0")
+        if valor < 0:
+            raise ValidationError(f"{campo.capitalize()} não pode ser negativo.")
+        return valor
+
+    def clean_desconto(self):
+        desconto = self._valor("desconto")
+        if self.preco is not None and desconto > self.preco:
+            raise ValidationError(f"O desconto não pode passar do valor do item ({brl(self.preco)}).")
+        return desconto
+
+    def clean_gorjeta(self):
+        return self._valor("gorjeta")
+
+
+class MovimentoEstoqueForm(forms.Form):
+    """Entrada de mercadoria ou contagem física de um produto (agenda/estoque.py)."""
+
+    TIPOS = [
+        (MovimentoEstoque.TIPO_ENTRADA, "Entrada (chegou mercadoria)"),
+        (MovimentoEstoque.TIPO_AJUSTE, "Contagem (estoque passa a ser)"),
+    ]
+
+    produto = forms.ModelChoiceField(queryset=Product.objects.none())
+    tipo = forms.ChoiceField(choices=TIPOS)
+    quantidade = forms.IntegerField(min_value=0)
+    observacao = forms.CharField(max_length=255, required=False)
+
+    def __init__(self, *args, barbearia=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["produto"].queryset = Product.objects.filter(barbearia=barbearia, controla_estoque=True)
+
+    def clean(self):
+        dados = super().clean()
+        if dados.get("tipo") == MovimentoEstoque.TIPO_ENTRADA and dados.get("quantidade") == 0:
+            raise ValidationError("A entrada precisa ter quantidade maior que zero.")
+        return dados
+
+
+# Balcão (agenda/pdv.py): um ProductSaleForm por item do carrinho
+VendaBalcaoFormSet = forms.formset_factory(
+    ProductSaleForm, extra=0, min_num=1, validate_min=True, max_num=50, validate_max=True, can_delete=True,
+)
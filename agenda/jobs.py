@@ -0,0 +1,138 @@
+"""
+Fila de jobs no banco (ReportJob) para relatórios pesados.
+
+- `enfileirar()`: usado pela view; deduplica por (barbearia, relatorio, parametros)
+- `reservar_jobs()` / `executar_job()`: usados pelo `manage.py run_jobs`
+- `RELATORIOS`: registro dos relatórios que podem rodar em segundo plano
+"""
+import hashlib
+import json
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .db_router import using_replica
+from .models import ReportJob
+from .reports import calcular_relatorio
+
+# relatório que inclui hoje ainda muda: cache curto. Período fechado: cache longo.
+TTL_PERIODO_ABERTO = timedelta(minutes=getattr(settings, "REPORT_JOB_TTL_ABERTO_MIN", 5))
+TTL_PERIODO_FECHADO = timedelta(minutes=getattr(settings, "REPORT_JOB_TTL_FECHADO_MIN", 60 * 24))
+
+# job que falhou continua sendo "o" job da chave por esse tempo: a página mostra o erro
+# em vez de enfileirar de novo a cada recarga; refazer só com "Atualizar relatório"
+TTL_ERRO = timedelta(minutes=getattr(settings, "REPORT_JOB_TTL_ERRO_MIN", 5))
+
+# no máximo um job por chave nesses status (models.ReportJob: reportjob_chave_ativa_uniq)
+ATIVOS = (ReportJob.STATUS_PENDENTE, ReportJob.STATUS_EXECUTANDO)
+
+# job "executando" há mais que isso = worker morreu; volta pra fila
+TIMEOUT_EXECUCAO = timedelta(minutes=getattr(settings, "REPORT_JOB_TIMEOUT_MIN", 30))
+
+
+def _relatorio_periodo(barbearia, inicio, fim):
+    return calcular_relatorio(barbearia, date.fromisoformat(inicio), date.fromisoformat(fim))
+
+
+RELATORIOS = {
+    "periodo": _relatorio_periodo,
+}
+
+
+def chave_job(barbearia_id, relatorio, parametros):
+    bruto = json.dumps([barbearia_id, relatorio, parametros], sort_keys=True, default=str)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+def _job_reaproveitavel(chave, aceitar_erro=True):
+    agora = timezone.now()
+    qs = ReportJob.objects.filter(chave=chave).filter(Q(expira_em__isnull=True) | Q(expira_em__gt=agora))
+    if aceitar_erro:
+        qs = qs.exclude(status=ReportJob.STATUS_ERRO, concluido_em__lt=agora - TTL_ERRO)
+    else:
+        qs = qs.exclude(status=ReportJob.STATUS_ERRO)
+    return qs.order_by("-id").first()
+
+
+def enfileirar(barbearia, relatorio, parametros, refazer_erro=False):
+    """
+    Devolve o job (novo, em andamento, com resultado ainda válido ou que falhou há pouco) pra essa chave.
+    `refazer_erro`: pedido explícito do usuário — erro recente não segura, enfileira de novo.
+    """
+    if relatorio not in RELATORIOS:
+        raise ValueError(f"Relatório desconhecido: {relatorio}")
+
+    chave = chave_job(barbearia.id, relatorio, parametros)
+    for tentativa in range(2):
+        job = _job_reaproveitavel(chave, aceitar_erro=not refazer_erro)
+        if job:
+            return job
+
+        try:
+            with transaction.atomic():
+                return ReportJob.objects.create(
+                    barbearia=barbearia, relatorio=relatorio, parametros=parametros, chave=chave
+                )
+        except IntegrityError:
+            # outro clique criou o mesmo job no meio do caminho: é o "vivo" da chave
+            job = ReportJob.objects.filter(chave=chave, status__in=ATIVOS).order_by("-id").first()
+            if job:
+                return job
+            # ...e ele já terminou (com erro) antes da leitura: tenta criar de novo, uma vez
+            if tentativa:
+                raise
+
+
+def reservar_jobs(limite):
+    """Marca até `limite` jobs pendentes como executando (seguro com vários workers)."""
+    if limite <= 0:
+        return []
+    agora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ReportJob.STATUS_PENDENTE)
+            .order_by("criado_em")
+            .values_list("id", flat=True)[:limite]
+        )
+        if ids:
+            ReportJob.objects.filter(id__in=ids).update(status=ReportJob.STATUS_EXECUTANDO, iniciado_em=agora)
+    return ids
+
+
+def recuperar_travados():
+    limite = timezone.now() - TIMEOUT_EXECUCAO
+    return ReportJob.objects.filter(
+        status=ReportJob.STATUS_EXECUTANDO, iniciado_em__lt=limite
+    ).update(status=ReportJob.STATUS_PENDENTE, iniciado_em=None)
+
+
+def executar_job(job_id):
+    """Roda o job e grava o resultado. Executado dentro do processo filho do run_jobs."""
+    job = ReportJob.objects.select_related("barbearia").get(id=job_id)
+    try:
+        with using_replica():
+            resultado = RELATORIOS[job.relatorio](job.barbearia, **job.parametros)
+    except Exception:
+        ReportJob.objects.filter(id=job.id).update(
+            status=ReportJob.STATUS_ERRO,
+            erro=traceback.format_exc()[-4000:],
+            concluido_em=timezone.now(),
+        )
+        return job_id, ReportJob.STATUS_ERRO
+
+    agora = timezone.now()
+    fim = job.parametros.get("fim")
+    fechado = bool(fim) and date.fromisoformat(fim) < timezone.localdate()
+    ReportJob.objects.filter(id=job.id).update(
+        status=ReportJob.STATUS_CONCLUIDO,
+        resultado=resultado,
+        erro="",
+        concluido_em=agora,
+        expira_em=agora + (TTL_PERIODO_FECHADO if fechado else TTL_PERIODO_ABERTO),
+    )
+    return job_id, ReportJob.STATUS_CONCLUIDO
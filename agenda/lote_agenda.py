@@ -0,0 +1,182 @@
+"""
+Ações em lote na agenda (dia/semana): confirmar, cancelar e empurrar o dia.
+
+- cada ação é um UPDATE só nos agendamentos escolhidos (+ um INSERT de
+  Cancellation / NotificationOutbox), tudo numa transação
+- `.update()` não dispara sinais: o que eles fariam (diferença nos rankings,
+  histórico dos clientes, cache do painel) é feito aqui, uma vez pro lote
+  (ver `_recalcular`)
+- `deslocar_dia()` confere os choques em memória antes de gravar; qualquer
+  choque e nada é alterado
+- escritas serializadas por barbearia, igual à reserva pública (agenda/booking.py)
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import client_stats, dashboard, fechamento, rankings
+from .booking import travar_barbearia
+from .models import Appointment, Cancellation
+from .notifications import EVENTO_CANCELADO, EVENTO_REMARCADO, notificar_varios
+
+# mesma regra da reserva: tudo que não foi cancelado ocupa horário
+ABERTOS = ("aguardando", "confirmado")
+
+
+class ConflitoDeHorario(Exception):
+    """O deslocamento faria agendamentos se sobreporem (ou saírem do dia)."""
+
+    def __init__(self, conflitos):
+        self.conflitos = conflitos
+        super().__init__("; ".join(conflitos))
+
+
+def _selecionar(barbearia, ids=None, dia=None):
+    qs = Appointment.objects.filter(barbearia=barbearia, status__in=ABERTOS)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    if dia is not None:
+        inicio, fim = fechamento.limites_do_dia(dia)
+        qs = qs.filter(inicio__gte=inicio, inicio__lt=fim)
+    return qs
+
+
+def _retrato(ag):
+    """(status, inicio) antes de mexer: cliente, serviço e valor não mudam nas ações em lote."""
+    return ag.status, ag.inicio
+
+
+def _recalcular(barbearia, agendamentos, antes):
+    """O que os sinais fariam por agendamento, uma vez pro lote (`antes`: {id: _retrato()})."""
+    rankings.aplicar_agendamentos(barbearia.id, [
+        (
+            rankings.contribuicao_agendamento(*antes[ag.id], ag.servico_id, ag.valor_no_momento),
+            rankings.contribuicao_agendamento(ag.status, ag.inicio, ag.servico_id, ag.valor_no_momento),
+        )
+        for ag in agendamentos
+    ])
+    client_stats.aplicar_mudancas([
+        (
+            client_stats.retrato(ag.cliente_id, *antes[ag.id], ag.valor_no_momento),
+            client_stats.retrato(ag.cliente_id, ag.status, ag.inicio, ag.valor_no_momento),
+        )
+        for ag in agendamentos
+    ])
+    dashboard.invalidar(barbearia.id)
+
+
+# ==========================
+# STATUS
+# ==========================
+
+def confirmar(barbearia, ids=None, dia=None):
+    """Confirma os agendamentos aguardando. Devolve quantos confirmou."""
+    with transaction.atomic():
+        travar_barbearia(barbearia)
+        qs = _selecionar(barbearia, ids, dia).filter(status="aguardando")
+        agendamentos = list(qs.only("id", "inicio", "status", "cliente", "servico", "valor_no_momento"))
+        if agendamentos:
+            antes = {ag.id: _retrato(ag) for ag in agendamentos}
+            Appointment.objects.filter(id__in=[ag.id for ag in agendamentos]).update(status="confirmado")
+            for ag in agendamentos:
+                ag.status = "confirmado"
+            _recalcular(barbearia, agendamentos, antes)
+    return len(agendamentos)
+
+
+def cancelar(barbearia, ids=None, dia=None, motivo="barbearia", observacao="", usuario=None, avisar=True):
+    """Cancela os agendamentos em aberto (um Cancellation cada; avisa os clientes). Devolve quantos."""
+    with transaction.atomic():
+        travar_barbearia(barbearia)
+        agendamentos = list(_selecionar(barbearia, ids, dia).select_related("cliente", "servico", "barbearia"))
+        if not agendamentos:
+            return 0
+
+        antes = {ag.id: _retrato(ag) for ag in agendamentos}
+        Appointment.objects.filter(id__in=[ag.id for ag in agendamentos]).update(status="cancelado")
+        Cancellation.objects.bulk_create(
+            [
+                Cancellation(agendamento=ag, motivo=motivo, observacao=observacao or None, aprovado_por=usuario)
+                for ag in agendamentos
+            ],
+            ignore_conflicts=True,
+        )
+        for ag in agendamentos:
+            ag.status = "cancelado"
+        if avisar:
+            notificar_varios(agendamentos, EVENTO_CANCELADO, dono=False)
+        _recalcular(barbearia, agendamentos, antes)
+    return len(agendamentos)
+
+
+# ==========================
+# EMPURRAR O DIA
+# ==========================
+
+def _hora(dt):
+    return f"{timezone.localtime(dt):%H:%M}"
+
+
+def _conflitos(movidos, fixos, dia, delta):
+    """Choques dos horários novos (`movidos`, já deslocados) com o dia e com os que ficam (`fixos`)."""
+    inicio_dia, fim_dia = fechamento.limites_do_dia(dia)
+    conflitos = [
+        f"o das {_hora(ag.inicio - delta)} sairia do dia"
+        for ag in movidos
+        if ag.inicio < inicio_dia or ag.fim > fim_dia
+    ]
+    # movidos entre si mantêm a distância de antes: só importa movido x fixo.
+    # Ordenados por início, basta comparar com o do outro grupo que termina mais tarde
+    ultimo = {True: None, False: None}
+    todos = sorted([(ag, True) for ag in movidos] + [(ag, False) for ag in fixos], key=lambda par: par[0].inicio)
+    for ag, movido in todos:
+        outro = ultimo[not movido]
+        if outro and ag.inicio < outro.fim:
+            m, f = (ag, outro) if movido else (outro, ag)
+            conflitos.append(
+                f"o das {_hora(m.inicio - delta)} (→ {_hora(m.inicio)}) bate com o das {_hora(f.inicio)}"
+            )
+        if ultimo[movido] is None or ag.fim > ultimo[movido].fim:
+            ultimo[movido] = ag
+    return conflitos
+
+
+def deslocar_dia(barbearia, dia, minutos, ids=None, avisar=True):
+    """
+    Empurra (minutos > 0) ou adianta os agendamentos em aberto do `dia` (todos, ou só `ids`).
+    Levanta ConflitoDeHorario sem gravar nada se algum choque aparecer. Devolve quantos moveu.
+    """
+    delta = timedelta(minutes=minutos)
+    if not delta:
+        return 0
+
+    with transaction.atomic():
+        travar_barbearia(barbearia)
+        do_dia = list(_selecionar(barbearia, dia=dia).select_related("cliente", "servico", "barbearia"))
+        ids = None if ids is None else {int(i) for i in ids}
+        movidos = [ag for ag in do_dia if ids is None or ag.id in ids]
+        if not movidos:
+            return 0
+        fixos = [ag for ag in do_dia if ids is not None and ag.id not in ids]
+        antes = {ag.id: _retrato(ag) for ag in movidos}
+        for ag in movidos:
+            ag.inicio += delta
+            ag.fim += delta
+
+        conflitos = _conflitos(movidos, fixos, dia, delta)
+        if conflitos:
+            raise ConflitoDeHorario(conflitos)
+
+        Appointment.objects.filter(id__in=[ag.id for ag in movidos]).update(
+            inicio=F("inicio") + delta,
+            fim=F("fim") + delta,
+            # horário novo -> lembretes novos
+            lembrete_24h_em=None,
+            lembrete_2h_em=None,
+        )
+        if avisar:
+            notificar_varios(movidos, EVENTO_REMARCADO, dono=False)
+        _recalcular(barbearia, movidos, antes)
+    return len(movidos)
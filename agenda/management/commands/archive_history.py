@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from agenda.arquivo import MESES_QUENTES, arquivar, contar, corte_padrao
+from agenda.models import BarberShop
+
+
+class Command(BaseCommand):
+    help = (
+        "Move agendamentos e vendas de produto antigos pras tabelas de arquivo "
+        "(particionadas por mês no Postgres). Relatórios continuam lendo os dois lados. "
+        "Sem --aplicar só conta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+        parser.add_argument(
+            "--meses", type=int, default=MESES_QUENTES,
+            help=f"Meses que ficam na tabela quente, contando o atual (padrão {MESES_QUENTES}).",
+        )
+        parser.add_argument("--aplicar", action="store_true", help="Move de verdade. Sem isso só mostra quanto moveria.")
+
+    def handle(self, *args, **opts):
+        if opts["meses"] < 1:
+            raise CommandError("--meses precisa ser pelo menos 1.")
+        corte = corte_padrao(opts["meses"])
+        ids = None
+        if opts["shop"]:
+            ids = list(BarberShop.objects.filter(slug__in=opts["shop"]).values_list("id", flat=True))
+
+        if not opts["aplicar"]:
+            agendamentos, vendas = contar(corte, ids)
+            self.stdout.write(
+                f"Antes de {timezone.localtime(corte):%d/%m/%Y}: {agendamentos} agendamentos, {vendas} vendas. "
+                "Nada alterado (use --aplicar)."
+            )
+            return
+
+        t0 = time.perf_counter()
+        agendamentos, vendas = arquivar(corte, ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Arquivados {agendamentos} agendamentos e {vendas} vendas anteriores a "
+            f"{timezone.localtime(corte):%d/%m/%Y} em {time.perf_counter() - t0:.1f}s."
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from agenda import dashboard, tenants
+from agenda.db_router import alias_replica, using_replica
+from agenda.models import BarberShop
+from agenda.reports import calcular_relatorio, periodo_do_request
+
+
+class Command(BaseCommand):
+    help = "Mostra em qual banco (primário x réplica) cada leitura analítica roda."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", required=True, help="Slug da barbearia.")
+
+    def handle(self, *args, **opts):
+        replica = alias_replica()
+        if not replica:
+            raise CommandError("Sem réplica configurada (defina DATABASE_REPLICA_URL).")
+
+        barbearia = BarberShop.objects.filter(slug=opts["shop"]).first()
+        if not barbearia:
+            raise CommandError(f"Barbearia não encontrada: {opts['shop']}")
+        hoje = timezone.localdate()
+        _, inicio, fim = periodo_do_request({"periodo": "mes"}, hoje)
+
+        def relatorio():
+            with using_replica():
+                calcular_relatorio(barbearia, inicio, fim)
+
+        def operador():
+            with using_replica():
+                tenants.calcular_painel()
+
+        leituras = [("relatório do mês", relatorio), ("painel do operador", operador)]
+        for nome in dashboard.PAINEIS:
+            leituras.append((f"painel: {nome}", lambda n=nome: dashboard.calcular_painel(barbearia, n, hoje)))
+
+        for nome, leitura in leituras:
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as prim, \
+                    CaptureQueriesContext(connections[replica]) as rep:
+                leitura()
+            self.stdout.write(f"{nome:<22} primário: {len(prim):>3}  réplica: {len(rep):>3}")
@@ -0,0 +1,88 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.loaders.app_directories import get_app_template_dirs
+
+from agenda.assets import ASSETS, arquivos, vendorizado
+
+_STATIC_TAG = re.compile(r"""\{%\s*static\s+['"]([^'"]+)['"]""")
+_ASSET_TAG = re.compile(r"""\{%\s*asset\s+['"]([^'"]+)['"]""")
+# CSS/JS/fonte de terceiros direto no template (deve passar pelo {% asset %})
+_EXTERNO = re.compile(r"""<(?:link|script)\b[^>]*(?:href|src)=["']https?://""", re.I)
+
+
+class Command(BaseCommand):
+    help = (
+        "Falha o build se algum template referencia asset que não está no manifest "
+        "(ou não existe), ou se ainda puxa CSS/JS direto de CDN. Asset de terceiros fora "
+        "de static/vendor/ (servido pelo CDN) só gera aviso, a não ser com --exigir-vendor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exigir-vendor", action="store_true",
+            help="Também falha se Bootstrap/Inter ainda não foram commitados em static/vendor/.",
+        )
+
+    def _templates(self):
+        dirs = [Path(d) for e in engines.all() for d in getattr(e, "dirs", [])]
+        dirs += [Path(d) for d in get_app_template_dirs("templates")]
+        for d in dirs:
+            if d.is_dir() and str(d).startswith(str(settings.BASE_DIR)):
+                yield from d.rglob("*.html")
+
+    def _manifest(self):
+        arquivo = Path(settings.STATIC_ROOT or "") / "staticfiles.json"
+        if not settings.STATIC_ROOT or not arquivo.exists():
+            return None
+        return json.loads(arquivo.read_text(encoding="utf-8")).get("paths", {})
+
+    def handle(self, *args, **opts):
+        manifest = self._manifest()
+        erros = []
+
+        for tpl in sorted(self._templates()):
+            texto = tpl.read_text(encoding="utf-8")
+            rel = tpl.relative_to(settings.BASE_DIR)
+
+            for caminho in _STATIC_TAG.findall(texto):
+                if manifest is not None:
+                    if caminho not in manifest:
+                        erros.append(f"{rel}: '{caminho}' não está no manifest (rodou collectstatic?)")
+                elif not finders.find(caminho):
+                    erros.append(f"{rel}: '{caminho}' não existe em nenhum diretório de static")
+
+            for nome in _ASSET_TAG.findall(texto):
+                if nome not in ASSETS:
+                    erros.append(f"{rel}: asset desconhecido '{nome}'")
+                elif manifest is not None and vendorizado(nome) and ASSETS[nome][0] not in manifest:
+                    erros.append(f"{rel}: asset '{nome}' não está no manifest")
+
+            for n, linha in enumerate(texto.splitlines(), 1):
+                if _EXTERNO.search(linha):
+                    erros.append(f"{rel}:{n}: CSS/JS externo; use {{% asset %}}")
+
+        avisos = []
+        for nome in ASSETS:
+            faltando = [c for c in arquivos(nome) if not finders.find(c)]
+            if not faltando:
+                continue
+            if len(faltando) < len(arquivos(nome)):
+                # metade commitada: o collectstatic quebra no url() que não existe
+                erros.append(f"asset '{nome}' incompleto em static/: falta {', '.join(faltando)}")
+            elif opts["exigir_vendor"]:
+                erros.append(f"asset '{nome}' faltando em static/{faltando[0]} (vendor_assets + commit)")
+            else:
+                avisos.append(f"asset '{nome}' ainda vem do CDN (vendor_assets + commit)")
+
+        for aviso in avisos:
+            self.stderr.write(self.style.WARNING(aviso))
+
+        if erros:
+            raise CommandError("Assets com problema:\n  " + "\n  ".join(erros))
+        self.stdout.write(self.style.SUCCESS("Assets OK."))
@@ -0,0 +1,44 @@
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga de django_session as sessões expiradas e as anônimas (sem login), "
+        "que eram criadas pelo fluxo público antes do cookie assinado. Rodar no cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000, help="Sessões lidas/apagadas por vez.")
+        parser.add_argument("--dry-run", action="store_true", help="Só conta, não apaga.")
+
+    def handle(self, *args, **opts):
+        expiradas = Session.objects.filter(expire_date__lt=timezone.now())
+        n_expiradas = expiradas.count()
+        if not opts["dry_run"]:
+            expiradas.delete()
+
+        # anônima = sem usuário logado; sessão corrompida também não serve pra nada
+        store = Session.get_session_store_class()()
+        n_anonimas = 0
+        ultimo = ""
+        while True:
+            lote = list(
+                Session.objects.filter(session_key__gt=ultimo)
+                .order_by("session_key")
+                .values_list("session_key", "session_data")[: opts["batch"]]
+            )
+            if not lote:
+                break
+            ultimo = lote[-1][0]
+            anonimas = [chave for chave, dados in lote if SESSION_KEY not in store.decode(dados)]
+            n_anonimas += len(anonimas)
+            if anonimas and not opts["dry_run"]:
+                Session.objects.filter(session_key__in=anonimas).delete()
+
+        prefixo = "[dry-run] " if opts["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}Sessões: {n_expiradas} expiradas, {n_anonimas} anônimas removidas."
+        ))
@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from agenda.fechamento import fechar_dia
+from agenda.models import BarberShop
+
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Data inválida: {valor} (use AAAA-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Fecha o dia (padrão: ontem) de todas as barbearias no livro imutável FechamentoDiario. "
+        "Com --desde fecha todos os dias que faltam até ontem (carga inicial). Dia já fechado é pulado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+        parser.add_argument("--dia", help="Dia a fechar (AAAA-MM-DD). Padrão: ontem.")
+        parser.add_argument("--desde", help="Fecha de AAAA-MM-DD até ontem.")
+
+    def handle(self, *args, **opts):
+        ontem = timezone.localdate() - timedelta(days=1)
+        if opts["desde"]:
+            inicio, fim = _data(opts["desde"]), ontem
+        else:
+            inicio = fim = _data(opts["dia"]) if opts["dia"] else ontem
+        if fim > ontem:
+            raise CommandError("Só dá pra fechar dia que já terminou.")
+
+        ids = None
+        if opts["shop"]:
+            ids = list(BarberShop.objects.filter(slug__in=opts["shop"]).values_list("id", flat=True))
+
+        t0 = time.perf_counter()
+        dias = fechados = 0
+        dia = inicio
+        while dia <= fim:
+            fechados += fechar_dia(dia, ids)
+            dias += 1
+            dia += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(
+            f"{fechados} fechamentos novos em {dias} dia(s) em {time.perf_counter() - t0:.1f}s."
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from agenda.models import BarberShop
+from agenda.retorno import calcular_intervalos
+
+
+class Command(BaseCommand):
+    help = (
+        "Lote noturno do \"chamar de volta\": intervalo típico entre visitas (mediana) "
+        "e retorno previsto de cada cliente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+
+    def handle(self, *args, **opts):
+        ids = None
+        if opts["shop"]:
+            ids = list(BarberShop.objects.filter(slug__in=opts["shop"]).values_list("id", flat=True))
+
+        t0 = time.perf_counter()
+        total, alterados = calcular_intervalos(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} clientes em {time.perf_counter() - t0:.1f}s ({alterados} com previsão alterada)."
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from agenda.dedupe import SEMELHANCA_NOME, encontrar_grupos, escolher_mantido, fundir
+from agenda.models import BarberShop
+
+
+class Command(BaseCommand):
+    help = (
+        "Acha clientes duplicados (mesmo telefone ou nome quase igual) e, com --aplicar, "
+        "funde cada grupo no cliente com mais agendamentos (auditoria em ClientMerge)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+        parser.add_argument("--aplicar", action="store_true", help="Funde de verdade. Sem isso só lista os grupos.")
+        parser.add_argument(
+            "--semelhanca", type=float, default=SEMELHANCA_NOME,
+            help=f"Semelhança mínima entre nomes, 0-1 (padrão {SEMELHANCA_NOME}).",
+        )
+
+    def handle(self, *args, **opts):
+        barbearias = BarberShop.objects.order_by("id")
+        if opts["shop"]:
+            barbearias = barbearias.filter(slug__in=opts["shop"])
+
+        total_grupos = total_removidos = total_movidos = 0
+        for barbearia in barbearias:
+            grupos = encontrar_grupos(barbearia, opts["semelhanca"])
+            for criterio, grupo in grupos:
+                mantido = escolher_mantido(grupo)
+                duplicados = [c for c in grupo if c["id"] != mantido["id"]]
+                nomes = ", ".join(f"{c['nome']} #{c['id']}" for c in duplicados)
+                self.stdout.write(f"[{barbearia.slug}] {criterio}: {mantido['nome']} #{mantido['id']} <- {nomes}")
+                if opts["aplicar"]:
+                    total_movidos += fundir(barbearia, mantido, duplicados, criterio)
+                total_removidos += len(duplicados)
+            total_grupos += len(grupos)
+
+        if opts["aplicar"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"{total_grupos} grupos: {total_removidos} clientes fundidos, {total_movidos} agendamentos movidos."
+            ))
+        else:
+            self.stdout.write(
+                f"{total_grupos} grupos, {total_removidos} clientes duplicados. Nada alterado (use --aplicar)."
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from agenda.client_stats import HORAS_RECENTES, atualizar_recentes, reconstruir
+from agenda.models import BarberShop
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o histórico dos clientes (visitas, gasto, cancelamentos, intervalo médio). "
+        "Com --recentes só quem teve horário confirmado nas últimas horas (cron diário)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+        parser.add_argument(
+            "--recentes", action="store_true",
+            help=f"Só clientes com horário confirmado nas últimas {HORAS_RECENTES}h.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["recentes"]:
+            n = atualizar_recentes()
+        else:
+            ids = None
+            if opts["shop"]:
+                ids = list(BarberShop.objects.filter(slug__in=opts["shop"]).values_list("id", flat=True))
+            n = reconstruir(ids)
+        self.stdout.write(self.style.SUCCESS(f"Histórico recalculado: {n} clientes."))
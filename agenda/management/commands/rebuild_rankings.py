@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from agenda.models import BarberShop
+from agenda.rankings import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstrói do zero os rankings materializados (top serviços / top produtos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", action="append", help="Slug da barbearia (pode repetir). Padrão: todas.")
+
+    def handle(self, *args, **opts):
+        ids = None
+        if opts["shop"]:
+            ids = list(BarberShop.objects.filter(slug__in=opts["shop"]).values_list("id", flat=True))
+
+        n_serv, n_prod = reconstruir(ids)
+        self.stdout.write(self.style.SUCCESS(f"Rankings: {n_serv} linhas de serviços, {n_prod} de produtos."))
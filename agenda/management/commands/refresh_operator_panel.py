@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from agenda.tenants import painel
+
+
+class Command(BaseCommand):
+    help = "Recalcula o painel do operador (todas as barbearias) e grava no cache. Rodar no cron."
+
+    def handle(self, *args, **opts):
+        dados = painel(atualizar=True)
+        self.stdout.write(self.style.SUCCESS(f"Painel do operador: {len(dados['linhas'])} barbearias."))
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from agenda.jobs import executar_job, recuperar_travados, reservar_jobs
+
+
+def _inicializar_processo():
+    # processo filho: garante Django carregado (spawn) e conexões próprias (fork)
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Executa os jobs de relatório enfileirados (ReportJob) num pool de processos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Processos no pool.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Segundos de espera quando a fila está vazia.")
+        parser.add_argument("--once", action="store_true", help="Executa o que está na fila e sai.")
+
+    def handle(self, *args, **opts):
+        n_workers = max(1, opts["workers"])
+        recuperados = recuperar_travados()
+        if recuperados:
+            self.stdout.write(f"{recuperados} job(s) travado(s) voltaram pra fila.")
+
+        # a conexão do pai não pode ser herdada pelos filhos
+        connections.close_all()
+
+        rodando = set()
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_processo) as pool:
+            try:
+                while True:
+                    for job_id in reservar_jobs(n_workers - len(rodando)):
+                        rodando.add(pool.submit(executar_job, job_id))
+
+                    if rodando:
+                        prontos, rodando = wait(rodando, timeout=opts["sleep"], return_when=FIRST_COMPLETED)
+                        for fut in prontos:
+                            job_id, status = fut.result()
+                            self.stdout.write(f"job #{job_id}: {status}")
+                        continue
+
+                    if opts["once"]:
+                        break
+                    time.sleep(opts["sleep"])
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from agenda.notifications import get_sender, processar_lote, reservar_lote
+
+
+class Command(BaseCommand):
+    help = "Drena a fila de notificações (NotificationOutbox) em lotes, com retry e backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=50, help="Tamanho do lote por rodada.")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Segundos de espera quando a fila está vazia.")
+        parser.add_argument("--once", action="store_true", help="Processa o que estiver vencido e sai.")
+        parser.add_argument("--sender", default=None, help="Caminho do sender (sobrescreve NOTIFICATION_SENDER).")
+
+    def handle(self, *args, **opts):
+        sender = get_sender(opts["sender"])
+        total_ok = total_falhas = 0
+
+        try:
+            while True:
+                itens = reservar_lote(opts["batch"])
+                if itens:
+                    ok, falhas = processar_lote(itens, sender)
+                    total_ok += ok
+                    total_falhas += falhas
+                    self.stdout.write(f"lote: {ok} enviadas, {falhas} com erro")
+                    continue
+
+                if opts["once"]:
+                    break
+                time.sleep(opts["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox: {total_ok} enviadas, {total_falhas} com erro."))
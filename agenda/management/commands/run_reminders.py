@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from agenda.reminders import despachar_lembretes
+
+
+class Command(BaseCommand):
+    help = "Agenda os lembretes de 24h e 2h (grava no outbox; o envio é feito pelo run_outbox)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=500, help="Agendamentos por transação.")
+        parser.add_argument("--sleep", type=float, default=60.0, help="Segundos entre rodadas.")
+        parser.add_argument("--once", action="store_true", help="Roda uma vez e sai (ex.: via cron).")
+
+    def handle(self, *args, **opts):
+        try:
+            while True:
+                resumo = despachar_lembretes(limite=opts["batch"])
+                if any(resumo.values()):
+                    self.stdout.write(", ".join(f"{k}: {v}" for k, v in resumo.items()))
+
+                if opts["once"]:
+                    break
+                time.sleep(opts["sleep"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,138 @@
+import multiprocessing
+import random
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from agenda.booking import HorarioIndisponivel, reservar
+from agenda.models import Appointment, BarberShop, Client, NotificationOutbox, Service
+
+TELEFONE_TESTE = "00000000000"
+NOME_TESTE = "Teste de carga"
+
+
+def _worker(args):
+    """Um "worker do gunicorn": tenta reservar horários aleatórios da lista."""
+    barbearia_id, servico_id, cliente_id, horarios, tentativas, semente = args
+    connections.close_all()  # conexão herdada do fork não pode ser reaproveitada
+    random.seed(semente)
+
+    barbearia = BarberShop.objects.get(id=barbearia_id)
+    servico = Service.objects.get(id=servico_id)
+    cliente = Client.objects.get(id=cliente_id)
+
+    resultado = {"ok": 0, "ocupado": 0, "travado": 0, "latencias": []}
+    for _ in range(tentativas):
+        inicio = random.choice(horarios)
+        t0 = time.perf_counter()
+        try:
+            reservar(barbearia, cliente, servico, inicio)
+            resultado["ok"] += 1
+        except HorarioIndisponivel:
+            resultado["ocupado"] += 1
+        except OperationalError:  # "database is locked": o que esse teste existe pra pegar
+            resultado["travado"] += 1
+        resultado["latencias"].append(time.perf_counter() - t0)
+    connections.close_all()
+    return resultado
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de concorrência das reservas: N processos disputando os mesmos horários "
+        "de um dia futuro. Confere que não há 'database is locked' nem horário duplicado "
+        "e apaga tudo que criou no final. Escreve no banco configurado: em produção só com --forcar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shop", required=True, help="Slug da barbearia.")
+        parser.add_argument("--processos", type=int, default=8)
+        parser.add_argument("--tentativas", type=int, default=50, help="Reservas tentadas por processo.")
+        parser.add_argument("--horarios", type=int, default=40, help="Horários disputados.")
+        parser.add_argument("--dias-a-frente", type=int, default=60, help="Dia usado no teste (a partir de hoje).")
+        parser.add_argument(
+            "--forcar", action="store_true",
+            help="Roda mesmo com DJANGO_ENV=production (cria e apaga cliente/agendamentos de teste de verdade).",
+        )
+
+    def handle(self, *args, **opts):
+        if settings.PRODUCAO and not opts["forcar"]:
+            raise CommandError(
+                "DJANGO_ENV=production: o teste cria agendamentos na barbearia (dispara rankings, "
+                "histórico e painel). Rode numa cópia do banco, ou passe --forcar."
+            )
+        barbearia = BarberShop.objects.filter(slug=opts["shop"]).first()
+        if not barbearia:
+            raise CommandError(f"Barbearia não encontrada: {opts['shop']}")
+        servico = Service.objects.filter(barbearia=barbearia, ativo=True).order_by("id").first()
+        if not servico:
+            raise CommandError("A barbearia não tem serviço ativo.")
+
+        dia = timezone.localdate() + timedelta(days=opts["dias_a_frente"])
+        duracao = timedelta(minutes=servico.duracao_minutos or 30)
+        primeiro = timezone.make_aware(datetime.combine(dia, dtime(6, 0)))
+        horarios = [primeiro + i * duracao for i in range(opts["horarios"])]
+
+        # sobra de uma rodada que morreu no meio (kill, OOM): sai antes de começar
+        sobras = self._limpar(barbearia)
+        if sobras:
+            self.stdout.write(self.style.WARNING(f"Removidos {sobras} agendamento(s) de uma rodada anterior."))
+
+        cliente = Client.objects.create(barbearia=barbearia, nome=NOME_TESTE, telefone=TELEFONE_TESTE)
+        tarefas = [
+            (barbearia.id, servico.id, cliente.id, horarios, opts["tentativas"], i)
+            for i in range(opts["processos"])
+        ]
+
+        connections.close_all()
+        t0 = time.perf_counter()
+        try:
+            with multiprocessing.get_context("fork").Pool(opts["processos"]) as pool:
+                resultados = pool.map(_worker, tarefas)
+            duracao_teste = time.perf_counter() - t0
+            self._relatorio(resultados, duracao_teste, cliente, horarios[0], horarios[-1] + duracao)
+        finally:
+            self._limpar(barbearia)
+
+    def _limpar(self, barbearia):
+        """Apaga o(s) cliente(s) de teste da barbearia e tudo que eles reservaram. Devolve quantos agendamentos."""
+        clientes = Client.objects.filter(barbearia=barbearia, nome=NOME_TESTE, telefone=TELEFONE_TESTE)
+        criados = list(Appointment.objects.filter(cliente__in=clientes))
+        NotificationOutbox.objects.filter(agendamento__in=criados).delete()
+        for ag in criados:
+            ag.delete()  # um a um: sinais recalculam rankings/painel do dia
+        clientes.delete()
+        return len(criados)
+
+    def _relatorio(self, resultados, duracao_teste, cliente, ini, fim):
+        ok = sum(r["ok"] for r in resultados)
+        ocupado = sum(r["ocupado"] for r in resultados)
+        travado = sum(r["travado"] for r in resultados)
+        latencias = sorted(l for r in resultados for l in r["latencias"])
+        total = len(latencias)
+
+        # nenhum par de agendamentos ativos pode se sobrepor
+        ativos = list(
+            Appointment.objects.filter(cliente=cliente, inicio__gte=ini, inicio__lt=fim)
+            .exclude(status="cancelado")
+            .order_by("inicio")
+            .values_list("inicio", "fim")
+        )
+        sobrepostos = sum(1 for a, b in zip(ativos, ativos[1:]) if b[0] < a[1])
+
+        def pct(p):
+            return latencias[min(int(total * p), total - 1)] * 1000 if total else 0
+
+        self.stdout.write(
+            f"{total} tentativas em {duracao_teste:.1f}s ({total / duracao_teste:.0f}/s): "
+            f"{ok} reservas, {ocupado} horário ocupado, {travado} 'database is locked'"
+        )
+        self.stdout.write(f"latência p50 {pct(0.5):.0f} ms • p95 {pct(0.95):.0f} ms • máx {pct(1):.0f} ms")
+
+        if travado or sobrepostos:
+            raise CommandError(f"Falhou: {travado} travamentos, {sobrepostos} horários sobrepostos.")
+        self.stdout.write(self.style.SUCCESS("OK: sem travamento e sem horário duplicado."))
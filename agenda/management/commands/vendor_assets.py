@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from agenda.assets import ASSETS, inter_css
+
+# o manifest do Django tenta resolver o .map referenciado; não distribuímos os .map
+_SOURCE_MAP = re.compile(rb"\n?(/\*# sourceMappingURL=.*?\*/|//# sourceMappingURL=\S*)\s*$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Baixa Bootstrap e a fonte Inter (versões fixadas em agenda/assets.py) para static/vendor/. "
+        "O resultado é commitado: o build não baixa nada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Baixa de novo mesmo se o arquivo já existe.")
+
+    def handle(self, *args, **opts):
+        destino = Path(settings.STATICFILES_DIRS[0])
+
+        for nome, (caminho, origem, sri) in ASSETS.items():
+            if nome == "inter_css":
+                continue
+            arquivo = destino / caminho
+            if arquivo.exists() and not opts["force"]:
+                self.stdout.write(f"ok (já existe): {caminho}")
+                continue
+
+            try:
+                with urllib.request.urlopen(origem, timeout=30) as resp:
+                    dados = resp.read()
+            except OSError as exc:
+                raise CommandError(f"Falha ao baixar {origem}: {exc}")
+
+            if sri:
+                obtido = base64.b64encode(hashlib.sha384(dados).digest()).decode()
+                if obtido != sri:
+                    raise CommandError(f"SRI não confere para {origem} (esperado {sri}, veio {obtido})")
+
+            arquivo.parent.mkdir(parents=True, exist_ok=True)
+            arquivo.write_bytes(_SOURCE_MAP.sub(b"\n", dados))
+            self.stdout.write(self.style.SUCCESS(f"baixado: {caminho} ({len(dados) // 1024} KB)"))
+
+        css = destino / ASSETS["inter_css"][0]
+        css.parent.mkdir(parents=True, exist_ok=True)
+        css.write_text(inter_css(), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"gerado: {ASSETS['inter_css'][0]}"))
@@ -1,12 +1,53 @@
 from __future__ import annotations
 
+from django.db import connection
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.utils import timezone
 
+from . import public_session
 from .models import PlanSubscription
 from .views import _get_active_shop
 
 
+class HealthCheckMiddleware:
+    """
+    /healthz pro balanceador/Railway: primeiro da lista, responde sem passar por
+    sessão, auth, CSRF, checagem de host nem PaymentGate. 503 se o banco não responde.
+    """
+
+    CAMINHOS = ("/healthz", "/healthz/")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path not in self.CAMINHOS:
+            return self.get_response(request)
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            resposta = JsonResponse({"status": "ok"})
+        except Exception as exc:
+            resposta = JsonResponse({"status": "erro", "banco": exc.__class__.__name__}, status=503)
+        resposta["Cache-Control"] = "no-store"
+        return resposta
+
+
+class SessaoPublicaMiddleware:
+    """Disponibiliza `request.sessao_publica` e regrava o cookie só se ela mudou."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.sessao_publica = public_session.carregar(request)
+        response = self.get_response(request)
+        public_session.salvar(request.sessao_publica, response)
+        return response
+
+
 class PaymentGateMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -20,6 +61,7 @@ class PaymentGateMiddleware:
             "/agendar",
             "/accounts/login/",
             "/sair",
+            "/operador",
         )
 
     def __call__(self, request):
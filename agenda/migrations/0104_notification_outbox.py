@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0103_recurring_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.CharField(choices=[('agendamento_criado', 'Agendamento criado'), ('agendamento_cancelado', 'Agendamento cancelado'), ('agendamento_remarcado', 'Agendamento remarcado')], max_length=30)),
+                ('destino', models.CharField(choices=[('cliente', 'Cliente'), ('dono', 'Dono')], max_length=10)),
+                ('canal', models.CharField(default='whatsapp', max_length=20)),
+                ('telefone', models.CharField(max_length=20)),
+                ('mensagem', models.TextField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+                ('agendamento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificacoes', to='agenda.appointment')),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes', to='agenda.barbershop')),
+            ],
+            options={
+                'ordering': ('proxima_tentativa_em', 'id'),
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa_em'], name='outbox_fila_idx')],
+            },
+        ),
+    ]
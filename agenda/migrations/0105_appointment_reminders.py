@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def marcar_passados(apps, schema_editor):
+    # agendamentos que já aconteceram não precisam de lembrete (e saem do índice parcial)
+    Appointment = apps.get_model("agenda", "Appointment")
+    agora = timezone.now()
+    Appointment.objects.filter(inicio__lte=agora).update(lembrete_24h_em=agora, lembrete_2h_em=agora)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0104_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='lembrete_24h_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='lembrete_2h_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='evento',
+            field=models.CharField(choices=[('agendamento_criado', 'Agendamento criado'), ('agendamento_cancelado', 'Agendamento cancelado'), ('agendamento_remarcado', 'Agendamento remarcado'), ('lembrete_24h', 'Lembrete 24h antes'), ('lembrete_2h', 'Lembrete 2h antes')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('lembrete_24h_em__isnull', True), ('status__in', ['confirmado', 'aguardando'])), fields=['inicio'], name='ag_lembrete_24h_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('lembrete_2h_em__isnull', True), ('status__in', ['confirmado', 'aguardando'])), fields=['inicio'], name='ag_lembrete_2h_idx'),
+        ),
+        migrations.RunPython(marcar_passados, migrations.RunPython.noop),
+    ]
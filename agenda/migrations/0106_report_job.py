@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0105_appointment_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relatorio', models.CharField(max_length=40)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('chave', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=12)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('expira_em', models.DateTimeField(blank=True, null=True)),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to='agenda.barbershop')),
+            ],
+            options={
+                'ordering': ('-criado_em',),
+                'indexes': [models.Index(fields=['chave', 'status'], name='reportjob_chave_idx'), models.Index(fields=['status', 'criado_em'], name='reportjob_fila_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pendente', 'executando'])), fields=('chave',), name='reportjob_chave_ativa_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:44
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, Max, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+# cópia de agenda.models.chave_produto / normalizar_texto de quando a migração foi escrita
+# (migração não importa código do app: ele pode mudar depois)
+def normalizar_texto(value):
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.lower().split())
+
+
+def chave_produto(produto_id, produto_nome=""):
+    if produto_id:
+        return f"id:{produto_id}"
+    return f"nome:{normalizar_texto(produto_nome)}"
+
+
+def preencher(apps, schema_editor):
+    # chave das vendas antigas + carga inicial dos rankings (depois: agenda/signals.py)
+    Appointment = apps.get_model("agenda", "Appointment")
+    ProductSale = apps.get_model("agenda", "ProductSale")
+    RankingServicoDia = apps.get_model("agenda", "RankingServicoDia")
+    RankingProdutoDia = apps.get_model("agenda", "RankingProdutoDia")
+    zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    vendas = list(ProductSale.objects.only("id", "produto_id", "produto_nome"))
+    for v in vendas:
+        v.produto_chave = chave_produto(v.produto_id, v.produto_nome)
+    ProductSale.objects.bulk_update(vendas, ["produto_chave"], batch_size=1000)
+
+    RankingServicoDia.objects.bulk_create(
+        [
+            RankingServicoDia(
+                barbearia_id=r["barbearia_id"], dia=r["dia"], servico_id=r["servico_id"],
+                qtd=r["qtd"], receita=r["receita"],
+            )
+            for r in (
+                Appointment.objects.filter(status="confirmado")
+                .annotate(dia=TruncDate("inicio"))
+                .values("barbearia_id", "dia", "servico_id")
+                .annotate(qtd=Count("id"), receita=Coalesce(Sum("valor_no_momento"), zero))
+                .order_by()
+            )
+        ],
+        batch_size=2000,
+    )
+    RankingProdutoDia.objects.bulk_create(
+        [
+            RankingProdutoDia(
+                barbearia_id=r["barbearia_id"], dia=r["dia"], produto_chave=r["produto_chave"],
+                nome=(r["nome"] or "").strip()[:120] or "—", qtd=r["qtd"], receita=r["receita"],
+            )
+            for r in (
+                ProductSale.objects.annotate(dia=TruncDate("data_hora"))
+                .values("barbearia_id", "dia", "produto_chave")
+                .annotate(
+                    nome=Max(Coalesce("produto__nome", "produto_nome")),
+                    qtd=Coalesce(Sum("quantidade"), Value(0)),
+                    receita=Coalesce(Sum("valor_total"), zero),
+                )
+                .order_by()
+            )
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0106_report_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsale',
+            name='produto_chave',
+            field=models.CharField(blank=True, default='', editable=False, max_length=130),
+        ),
+        migrations.CreateModel(
+            name='RankingProdutoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('produto_chave', models.CharField(max_length=130)),
+                ('nome', models.CharField(max_length=120)),
+                ('qtd', models.PositiveIntegerField(default=0)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.barbershop')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('barbearia', 'dia', 'produto_chave'), name='ranking_produto_dia_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RankingServicoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('qtd', models.PositiveIntegerField(default=0)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.barbershop')),
+                ('servico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.service')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('barbearia', 'dia', 'servico'), name='ranking_servico_dia_uniq')],
+            },
+        ),
+        migrations.RunPython(preencher, migrations.RunPython.noop),
+    ]
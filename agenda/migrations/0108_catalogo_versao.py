@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0107_rankings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='barbershop',
+            name='catalogo_atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
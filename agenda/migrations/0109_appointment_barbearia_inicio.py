@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0108_catalogo_versao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['barbearia', 'inicio'], name='ag_barbearia_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:12
+
+import unicodedata
+
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+# cópia de agenda.models.normalizar_texto de quando a migração foi escrita
+# (migração não importa código do app: ele pode mudar depois)
+def normalizar_texto(value):
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.lower().split())
+
+
+def preencher(apps, schema_editor):
+    Client = apps.get_model("agenda", "Client")
+    lote = []
+    for cliente in Client.objects.only("id", "nome").iterator(chunk_size=LOTE):
+        cliente.nome_normalizado = normalizar_texto(cliente.nome)
+        lote.append(cliente)
+        if len(lote) >= LOTE:
+            Client.objects.bulk_update(lote, ["nome_normalizado"])
+            lote = []
+    if lote:
+        Client.objects.bulk_update(lote, ["nome_normalizado"])
+
+
+def criar_indice_trigram(apps, schema_editor):
+    # só Postgres: busca por pedaço do nome / com erro de digitação (client_search)
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS cli_nome_trgm_idx "
+        "ON agenda_client USING gin (nome_normalizado gin_trgm_ops)"
+    )
+
+
+def remover_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS cli_nome_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0109_appointment_barbearia_inicio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='nome_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=120),
+        ),
+        migrations.RunPython(preencher, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', 'nome_normalizado'], name='cli_barbearia_nome_idx'),
+        ),
+        migrations.RunPython(criar_indice_trigram, remover_indice_trigram),
+    ]
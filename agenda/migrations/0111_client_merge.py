@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# cópia de agenda.models.chave_telefone de quando a migração foi escrita
+# (migração não importa código do app: ele pode mudar depois)
+def chave_telefone(value):
+    digits = "".join(ch for ch in str(value or "") if ch.isdigit())
+    if len(digits) > 11 and digits.startswith("55"):
+        digits = digits[2:]
+    return digits
+
+
+def normalizar_telefones(apps, schema_editor):
+    # telefones antigos com máscara ou 55: o portal passa a achar o cliente por igualdade (índice)
+    Client = apps.get_model("agenda", "Client")
+    lote = []
+    qs = Client.objects.exclude(telefone__isnull=True).exclude(telefone="").only("id", "telefone")
+    for cliente in qs.iterator(chunk_size=1000):
+        chave = chave_telefone(cliente.telefone)
+        if chave != cliente.telefone:
+            cliente.telefone = chave
+            lote.append(cliente)
+    Client.objects.bulk_update(lote, ["telefone"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0110_client_nome_normalizado'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_telefones, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ClientMerge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('removido_id', models.PositiveIntegerField()),
+                ('removido_nome', models.CharField(max_length=120)),
+                ('removido_telefone', models.CharField(blank=True, default='', max_length=20)),
+                ('removido_observacoes', models.TextField(blank=True, default='')),
+                ('criterio', models.CharField(max_length=30)),
+                ('agendamentos_movidos', models.JSONField(default=list)),
+                ('origem', models.CharField(choices=[('comando', 'Comando'), ('admin', 'Admin')], default='comando', max_length=10)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-criado_em', '-id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', 'telefone'], name='cli_barbearia_tel_idx'),
+        ),
+        migrations.AddField(
+            model_name='clientmerge',
+            name='barbearia',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fusoes_clientes', to='agenda.barbershop'),
+        ),
+        migrations.AddField(
+            model_name='clientmerge',
+            name='mantido',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fusoes', to='agenda.client'),
+        ),
+    ]
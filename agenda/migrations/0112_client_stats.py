@@ -0,0 +1,107 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:19
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+LOTE = 1000
+CAMPOS = ("visitas", "primeira_visita", "ultima_visita", "total_gasto", "cancelamentos", "intervalo_medio_dias")
+
+
+# cálculo de agenda.client_stats de quando a migração foi escrita (sem arquivo nem previsão
+# de retorno): migração não importa código do app, ele pode mudar depois
+def _intervalo(r):
+    if r["visitas"] < 2:
+        return None
+    dias = (r["ultima_visita"] - r["primeira_visita"]).total_seconds() / 86400 / (r["visitas"] - 1)
+    return Decimal(f"{dias:.1f}")
+
+
+def preencher(apps, schema_editor):
+    # carga inicial dos contadores (depois: agenda/signals.py)
+    Appointment = apps.get_model("agenda", "Appointment")
+    Client = apps.get_model("agenda", "Client")
+    visita = Q(status="confirmado", inicio__lte=timezone.now())
+    zero = Value(Decimal("0"), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    ids = list(Client.objects.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i:i + LOTE]
+        estatisticas = {
+            r.pop("cliente_id"): r
+            for r in (
+                Appointment.objects.filter(cliente_id__in=lote)
+                .values("cliente_id")
+                .annotate(
+                    visitas=Count("id", filter=visita),
+                    primeira_visita=Min("inicio", filter=visita),
+                    ultima_visita=Max("inicio", filter=visita),
+                    total_gasto=Coalesce(Sum("valor_no_momento", filter=visita), zero),
+                    cancelamentos=Count("id", filter=Q(status="cancelado")),
+                )
+                .order_by()
+            )
+        }
+        clientes = list(Client.objects.filter(id__in=estatisticas).only("id", *CAMPOS))
+        for c in clientes:
+            r = estatisticas[c.id]
+            r["intervalo_medio_dias"] = _intervalo(r)
+            for campo in CAMPOS:
+                setattr(c, campo, r[campo])
+        Client.objects.bulk_update(clientes, CAMPOS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0111_client_merge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='cancelamentos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='intervalo_medio_dias',
+            field=models.DecimalField(blank=True, decimal_places=1, editable=False, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='primeira_visita',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='total_gasto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='ultima_visita',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='visitas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', '-total_gasto'], name='cli_barbearia_gasto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', '-visitas'], name='cli_barbearia_visitas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', 'ultima_visita'], name='cli_barbearia_ultima_idx'),
+        ),
+        migrations.RunPython(preencher, migrations.RunPython.noop),
+    ]
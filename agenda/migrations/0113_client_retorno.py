@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0112_client_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='chamado_de_volta_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='intervalo_tipico_dias',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='retorno_previsto',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['barbearia', 'retorno_previsto'], name='cli_barbearia_retorno_idx'),
+        ),
+    ]
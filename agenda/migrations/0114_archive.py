@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# tabela -> coluna da partição (RANGE mensal no Postgres; partições criadas pelo archive_history)
+TABELAS = {"ArchivedAppointment": "inicio", "ArchivedProductSale": "data_hora"}
+
+
+def criar_tabelas(apps, schema_editor):
+    for nome, coluna in TABELAS.items():
+        model = apps.get_model("agenda", nome)
+        if schema_editor.connection.vendor != "postgresql":
+            schema_editor.create_model(model)
+            continue
+        # a PK de uma tabela particionada precisa incluir a coluna da partição
+        sql, params = schema_editor.table_sql(model)
+        assert '"id" bigint NOT NULL PRIMARY KEY' in sql
+        sql = sql.replace('"id" bigint NOT NULL PRIMARY KEY', '"id" bigint NOT NULL', 1)
+        sql = f'{sql[:-1]}, PRIMARY KEY ("id", "{coluna}")) PARTITION BY RANGE ("{coluna}")'
+        schema_editor.execute(sql, params or None)
+        tabela = model._meta.db_table
+        schema_editor.execute(f'CREATE TABLE "{tabela}_default" PARTITION OF "{tabela}" DEFAULT')
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+
+def apagar_tabelas(apps, schema_editor):
+    for nome in TABELAS:
+        schema_editor.delete_model(apps.get_model("agenda", nome))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0113_client_retorno'),
+    ]
+
+    operations = [
+        # tabelas criadas à mão (particionadas no Postgres); o estado vem dos CreateModel
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedAppointment',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('inicio', models.DateTimeField()),
+                        ('fim', models.DateTimeField()),
+                        ('status', models.CharField(choices=[('aguardando', 'Aguardando confirmação'), ('confirmado', 'Confirmado'), ('cancelado', 'Cancelado')], max_length=20)),
+                        ('criado_via', models.CharField(choices=[('cliente_link', 'Cliente via link'), ('whatsapp', 'WhatsApp'), ('manual', 'Manual')], max_length=20)),
+                        ('valor_no_momento', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                        ('criado_em', models.DateTimeField()),
+                        ('cancelamento_motivo', models.CharField(blank=True, default='', max_length=20)),
+                        ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('barbearia', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.barbershop')),
+                        ('cliente', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='agendamentos_arquivados', to='agenda.client')),
+                        ('servico', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='agenda.service')),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['barbearia', 'inicio'], name='arq_ag_barbearia_inicio_idx'), models.Index(fields=['cliente'], name='arq_ag_cliente_idx'), models.Index(fields=['servico'], name='arq_ag_servico_idx')],
+                    },
+                ),
+                migrations.CreateModel(
+                    name='ArchivedProductSale',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('produto_nome', models.CharField(blank=True, default='', max_length=120)),
+                        ('quantidade', models.PositiveIntegerField(default=1)),
+                        ('valor_unitario', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                        ('valor_total', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                        ('data_hora', models.DateTimeField()),
+                        ('observacao', models.CharField(blank=True, max_length=255)),
+                        ('produto_chave', models.CharField(blank=True, default='', max_length=130)),
+                        ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('barbearia', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.barbershop')),
+                        ('produto', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agenda.product')),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['barbearia', 'data_hora'], name='arq_venda_barbearia_data_idx'), models.Index(fields=['produto'], name='arq_venda_produto_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(criar_tabelas, apagar_tabelas),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def criar_trava(apps, schema_editor):
+    # só Postgres: UPDATE no livro é recusado pelo banco (o save() já recusa no Django;
+    # isso pega .update()/SQL na mão). DELETE continua possível pro CASCADE da barbearia.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        """
+        CREATE OR REPLACE FUNCTION agenda_fechamento_imutavel() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'agenda_fechamentodiario é imutável';
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    schema_editor.execute(
+        "CREATE TRIGGER fechamento_imutavel BEFORE UPDATE ON agenda_fechamentodiario "
+        "FOR EACH ROW EXECUTE FUNCTION agenda_fechamento_imutavel()"
+    )
+
+
+def remover_trava(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP TRIGGER IF EXISTS fechamento_imutavel ON agenda_fechamentodiario")
+    schema_editor.execute("DROP FUNCTION IF EXISTS agenda_fechamento_imutavel()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0114_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FechamentoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('agendamentos', models.PositiveIntegerField(default=0)),
+                ('confirmados', models.PositiveIntegerField(default=0)),
+                ('cancelados', models.PositiveIntegerField(default=0)),
+                ('servicos_receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelado_valor', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('produtos_qtd', models.PositiveIntegerField(default=0)),
+                ('produtos_receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('por_servico', models.JSONField(default=list)),
+                ('fechado_em', models.DateTimeField(auto_now_add=True)),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fechamentos', to='agenda.barbershop')),
+            ],
+            options={
+                'ordering': ('-dia',),
+                'constraints': [models.UniqueConstraint(fields=('barbearia', 'dia'), name='fechamento_barbearia_dia_uniq')],
+            },
+        ),
+        migrations.RunPython(criar_trava, remover_trava),
+    ]
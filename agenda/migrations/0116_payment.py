@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0115_fechamento_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fechamentodiario',
+            name='gorjetas',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='fechamentodiario',
+            name='por_metodo',
+            field=models.JSONField(default=list),
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo', models.CharField(choices=[('pix', 'Pix'), ('dinheiro', 'Dinheiro'), ('debito', 'Cartão de débito'), ('credito', 'Cartão de crédito'), ('outro', 'Outro')], max_length=10)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('desconto', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('gorjeta', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('pago_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conferido_em', models.DateTimeField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('agendamento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagamentos', to='agenda.appointment')),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagamentos', to='agenda.barbershop')),
+                ('venda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagamentos', to='agenda.productsale')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['barbearia', 'pago_em'], name='pag_barbearia_pago_idx')],
+            },
+        ),
+    ]
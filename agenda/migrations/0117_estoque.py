@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0116_payment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='controla_estoque',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='estoque',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='estoque_minimo',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada (reposição)'), ('venda', 'Venda'), ('estorno', 'Estorno de venda'), ('ajuste', 'Ajuste (contagem)')], max_length=10)),
+                ('quantidade', models.IntegerField()),
+                ('saldo', models.IntegerField()),
+                ('observacao', models.CharField(blank=True, default='', max_length=255)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('barbearia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='agenda.barbershop')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos_estoque', to='agenda.product')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('venda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='agenda.productsale')),
+            ],
+            options={
+                'ordering': ('-criado_em', '-id'),
+                'indexes': [models.Index(fields=['barbearia', '-criado_em'], name='estoque_barbearia_criado_idx'), models.Index(fields=['produto', '-criado_em'], name='estoque_produto_criado_idx')],
+            },
+        ),
+    ]
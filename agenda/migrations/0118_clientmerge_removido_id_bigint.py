@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0117_estoque'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clientmerge',
+            name='removido_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import unicodedata
+
 from django.db import models
 
 
@@ -7,6 +9,30 @@ def _digits_only(value):
     if not value:
         return ""
     return "".join(ch for ch in str(value) if ch.isdigit())
+
+
+# util: telefone como identidade do cliente (só dígitos, sem o 55 do país) — igual ao login do portal
+def chave_telefone(value):
+    digits = _digits_only(value)
+    if len(digits) > 11 and digits.startswith("55"):
+        digits = digits[2:]
+    return digits
+
+
+# util: minúsculo, sem acento e com espaços colapsados ("  Pomada  MODELADORA " -> "pomada modeladora")
+def normalizar_texto(value):
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.lower().split())
+
+
+# util: chave estável do produto vendido (cadastrado pelo id, avulso pelo nome normalizado)
+def chave_produto(produto_id, produto_nome=""):
+    if produto_id:
+        return f"id:{produto_id}"
+    return f"nome:{normalizar_texto(produto_nome)}"
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -31,8 +57,16 @@ class BarberShop(models.Model):
     slug = models.SlugField(unique=True)
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='outro')
 
+    # versão do que aparece na página pública (dados da barbearia + serviços):
+    # muda a cada save() e quando um serviço muda (agenda/public_cache.py)
+    catalogo_atualizado_em = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return self.nome
+
+    @property
+    def catalogo_versao(self):
+        return int(self.catalogo_atualizado_em.timestamp() * 1_000_000) if self.catalogo_atualizado_em else 0
 class Service(models.Model):
     """
     Serviços oferecidos: corte, barba, sobrancelha, luzes etc.
@@ -60,10 +94,25 @@ class Product(models.Model):
     preco = models.DecimalField(max_digits=8, decimal_places=2)
     ativo = models.BooleanField(default=True)
 
+    # estoque (agenda/estoque.py): só muda por MovimentoEstoque, com UPDATE ... SET estoque = estoque ± n.
+    # Pode ficar negativo (vendeu sem ter dado entrada) — a tela avisa em vez de travar o balcão.
+    controla_estoque = models.BooleanField(default=False)
+    estoque = models.IntegerField(default=0, editable=False)
+    estoque_minimo = models.PositiveIntegerField(default=0)
+
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
 
+    def save(self, *args, **kwargs):
+        # editar o produto não regrava `estoque`: o valor em memória pode estar velho
+        # (uma venda no meio) e sobrescreveria o UPDATE atômico
+        if self.pk and not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.attname for f in self._meta.concrete_fields if not f.primary_key and f.name != "estoque"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nome
 
@@ -88,7 +137,11 @@ class ProductSale(models.Model):
     data_hora = models.DateTimeField(default=timezone.now)
     observacao = models.CharField(max_length=255, blank=True)
 
-    def save(self, *args, **kwargs):
+    # chave de agrupamento (ver chave_produto): rankings/relatórios agrupam por ela
+    produto_chave = models.CharField(max_length=130, blank=True, default="", editable=False)
+
+    def preencher_calculados(self):
+        """Campos que o save() calcula; quem faz bulk_create chama antes (agenda/pdv.py)."""
         # se tem produto e não veio valor_unitario, puxa do produto
         if self.produto_id and (self.valor_unitario is None or self.valor_unitario == ''):
             self.valor_unitario = self.produto.preco
@@ -97,6 +150,10 @@ class ProductSale(models.Model):
         if self.valor_unitario is not None:
             self.valor_total = (self.quantidade or 1) * self.valor_unitario
 
+        self.produto_chave = chave_produto(self.produto_id, self.produto_nome)
+
+    def save(self, *args, **kwargs):
+        self.preencher_calculados()
         super().save(*args, **kwargs)
 
     def _str_(self):
@@ -114,6 +171,8 @@ class Client(models.Model):
         related_name='clientes'
     )
     nome = models.CharField(max_length=120)
+    # busca: nome sem acento/minúsculo (ver client_search); no Postgres tem índice trigram
+    nome_normalizado = models.CharField(max_length=120, blank=True, default="", editable=False)
     telefone = models.CharField(max_length=20, blank=True, null=True)
     observacoes = models.TextField(blank=True, null=True)
     bloqueado_online = models.BooleanField(
@@ -121,11 +180,39 @@ class Client(models.Model):
         help_text='Se verdadeiro, cliente não consegue marcar sozinho pelo link.'
     )
 
+    # histórico materializado (agenda/client_stats.py): visita = agendamento confirmado que já começou
+    visitas = models.PositiveIntegerField(default=0, editable=False)
+    primeira_visita = models.DateTimeField(null=True, blank=True, editable=False)
+    ultima_visita = models.DateTimeField(null=True, blank=True, editable=False)
+    total_gasto = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    cancelamentos = models.PositiveIntegerField(default=0, editable=False)
+    intervalo_medio_dias = models.DecimalField(max_digits=7, decimal_places=1, null=True, blank=True, editable=False)
+    # "chamar de volta" (agenda/retorno.py): mediana dos intervalos, calculada no lote noturno
+    intervalo_tipico_dias = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    retorno_previsto = models.DateField(null=True, blank=True, editable=False)
+    chamado_de_volta_em = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # igualdade/prefixo do nome dentro da barbearia (resolver cliente no novo agendamento)
+            models.Index(fields=["barbearia", "nome_normalizado"], name="cli_barbearia_nome_idx"),
+            # portal do cliente / deduplicação: cliente = telefone dentro da barbearia
+            models.Index(fields=["barbearia", "telefone"], name="cli_barbearia_tel_idx"),
+            # lista de clientes: melhores / mais frequentes / sumidos = faixa do índice, sem GROUP BY
+            models.Index(fields=["barbearia", "-total_gasto"], name="cli_barbearia_gasto_idx"),
+            models.Index(fields=["barbearia", "-visitas"], name="cli_barbearia_visitas_idx"),
+            models.Index(fields=["barbearia", "ultima_visita"], name="cli_barbearia_ultima_idx"),
+            models.Index(fields=["barbearia", "retorno_previsto"], name="cli_barbearia_retorno_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        # salva telefone sempre sem máscara (só dígitos)
+        # salva telefone sempre sem máscara (só dígitos, sem 55)
         if self.telefone:
-            self.telefone = _digits_only(self.telefone)
+            self.telefone = chave_telefone(self.telefone)
+        self.nome_normalizado = normalizar_texto(self.nome)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nome" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "nome_normalizado"}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -219,6 +306,28 @@ class Appointment(models.Model):
 
     criado_em = models.DateTimeField(auto_now_add=True)
 
+    # lembretes automáticos (manage.py run_reminders): preenchido = já despachado (ou dispensado)
+    lembrete_24h_em = models.DateTimeField(null=True, blank=True)
+    lembrete_2h_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # índices parciais: só entram agendamentos ainda sem lembrete,
+            # então a janela de tempo do despachante é uma leitura por faixa de `inicio`
+            models.Index(
+                fields=["inicio"],
+                name="ag_lembrete_24h_idx",
+                condition=models.Q(lembrete_24h_em__isnull=True, status__in=["confirmado", "aguardando"]),
+            ),
+            models.Index(
+                fields=["inicio"],
+                name="ag_lembrete_2h_idx",
+                condition=models.Q(lembrete_2h_em__isnull=True, status__in=["confirmado", "aguardando"]),
+            ),
+            # agenda/painéis/operador: sempre "barbearia X, faixa de inicio"
+            models.Index(fields=["barbearia", "inicio"], name="ag_barbearia_inicio_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         # calcula fim automaticamente
         if self.inicio and self.servico_id:
@@ -338,3 +447,402 @@ class RecurringBlock(models.Model):
 
     def __str__(self):
         return f"{self.get_kind_display()} • {self.titulo} • {self.get_dia_semana_display()} {self.inicio}-{self.fim}"
+
+
+# ==========================
+# NOTIFICAÇÕES (OUTBOX)
+# ==========================
+class NotificationOutbox(models.Model):
+    '''
+    Fila durável de notificações (WhatsApp pro cliente, alerta pro dono).
+
+    As linhas são gravadas na MESMA transação que cria/cancela/remarca o
+    agendamento e drenadas em segundo plano por `manage.py run_outbox`
+    (ver agenda/notifications.py). A request nunca espera o envio.
+    '''
+
+    EVENTO_CHOICES = [
+        ("agendamento_criado", "Agendamento criado"),
+        ("agendamento_cancelado", "Agendamento cancelado"),
+        ("agendamento_remarcado", "Agendamento remarcado"),
+        ("lembrete_24h", "Lembrete 24h antes"),
+        ("lembrete_2h", "Lembrete 2h antes"),
+    ]
+
+    DESTINO_CHOICES = [
+        ("cliente", "Cliente"),
+        ("dono", "Dono"),
+    ]
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_ENVIADO = "enviado"
+    STATUS_FALHOU = "falhou"
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, "Pendente"),
+        (STATUS_ENVIADO, "Enviado"),
+        (STATUS_FALHOU, "Falhou"),
+    ]
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="notificacoes")
+    agendamento = models.ForeignKey(
+        Appointment, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name="notificacoes"
+    )
+
+    evento = models.CharField(max_length=30, choices=EVENTO_CHOICES)
+    destino = models.CharField(max_length=10, choices=DESTINO_CHOICES)
+    canal = models.CharField(max_length=20, default="whatsapp")
+    telefone = models.CharField(max_length=20)
+    mensagem = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True, default="")
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("proxima_tentativa_em", "id")
+        indexes = [
+            # o worker só lê "pendentes vencidas" -> índice casa com o filtro
+            models.Index(fields=["status", "proxima_tentativa_em"], name="outbox_fila_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_evento_display()} → {self.get_destino_display()} ({self.status})"
+
+
+# ==========================
+# JOBS EM SEGUNDO PLANO (relatórios pesados)
+# ==========================
+class ReportJob(models.Model):
+    '''
+    Fila simples de jobs no próprio banco (sem broker externo).
+
+    A view enfileira, `manage.py run_jobs` executa fora da request e guarda o
+    resultado (JSON) aqui mesmo, que vira cache até `expira_em`.
+    `chave` = hash(barbearia, relatorio, parametros): clique repetido reaproveita o job.
+    '''
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_EXECUTANDO = "executando"
+    STATUS_CONCLUIDO = "concluido"
+    STATUS_ERRO = "erro"
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, "Pendente"),
+        (STATUS_EXECUTANDO, "Executando"),
+        (STATUS_CONCLUIDO, "Concluído"),
+        (STATUS_ERRO, "Erro"),
+    ]
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="report_jobs")
+    relatorio = models.CharField(max_length=40)
+    parametros = models.JSONField(default=dict, blank=True)
+    chave = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    resultado = models.JSONField(null=True, blank=True)
+    erro = models.TextField(blank=True, default="")
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    expira_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-criado_em",)
+        indexes = [
+            models.Index(fields=["chave", "status"], name="reportjob_chave_idx"),
+            models.Index(fields=["status", "criado_em"], name="reportjob_fila_idx"),
+        ]
+        constraints = [
+            # no máximo 1 job "vivo" por chave (dedupe mesmo com cliques simultâneos)
+            models.UniqueConstraint(
+                fields=["chave"],
+                condition=models.Q(status__in=["pendente", "executando"]),
+                name="reportjob_chave_ativa_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.relatorio} #{self.id} ({self.status})"
+
+
+
+# ==========================
+# RANKINGS (top serviços / top produtos) materializados por dia
+# ==========================
+class RankingServicoDia(models.Model):
+    '''
+    Totais de serviços CONFIRMADOS por (barbearia, dia, serviço).
+    Mantido por agenda/rankings.py a cada escrita de Appointment;
+    `manage.py rebuild_rankings` reconstrói do zero.
+    '''
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="+")
+    dia = models.DateField()
+    servico = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="+")
+    qtd = models.PositiveIntegerField(default=0)
+    receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["barbearia", "dia", "servico"], name="ranking_servico_dia_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} • {self.servico_id}: {self.qtd}"
+
+
+class RankingProdutoDia(models.Model):
+    '''
+    Totais de vendas de produto por (barbearia, dia, produto_chave).
+    `nome` é só pra exibição (nome do cadastro ou o digitado na venda avulsa).
+    '''
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="+")
+    dia = models.DateField()
+    produto_chave = models.CharField(max_length=130)
+    nome = models.CharField(max_length=120)
+    qtd = models.PositiveIntegerField(default=0)
+    receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["barbearia", "dia", "produto_chave"], name="ranking_produto_dia_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} • {self.nome}: {self.qtd}"
+
+
+class ClientMerge(models.Model):
+    """
+    Auditoria da deduplicação: um registro por cliente duplicado que foi fundido
+    (e apagado). Guarda os dados dele e os agendamentos que mudaram de dono.
+    """
+    ORIGEM_CHOICES = [
+        ("comando", "Comando"),
+        ("admin", "Admin"),
+    ]
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="fusoes_clientes")
+    mantido = models.ForeignKey(Client, on_delete=models.SET_NULL, null=True, related_name="fusoes")
+    removido_id = models.BigIntegerField()  # id do Client apagado (BigAutoField)
+    removido_nome = models.CharField(max_length=120)
+    removido_telefone = models.CharField(max_length=20, blank=True, default="")
+    removido_observacoes = models.TextField(blank=True, default="")
+    criterio = models.CharField(max_length=30)  # "telefone", "nome" ou "telefone+nome"
+    agendamentos_movidos = models.JSONField(default=list)
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, default="comando")
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-criado_em", "-id")
+
+    def __str__(self):
+        return f"{self.removido_nome} (#{self.removido_id}) → #{self.mantido_id}"
+
+
+# ==========================
+# ARQUIVO (histórico frio) — ver agenda/arquivo.py
+# ==========================
+class ArchivedAppointment(models.Model):
+    '''
+    Agendamento antigo tirado da tabela quente por `manage.py archive_history`.
+    Mesmo id e mesmos campos do Appointment, então os relatórios leem as duas
+    tabelas com os mesmos filtros. No Postgres a tabela é particionada por mês
+    (RANGE em `inicio`, migration 0114).
+    '''
+
+    id = models.BigIntegerField(primary_key=True)
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="+", db_index=False)
+    cliente = models.ForeignKey(
+        Client, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name="agendamentos_arquivados", db_index=False
+    )
+    servico = models.ForeignKey(Service, on_delete=models.PROTECT, related_name="+", db_index=False)
+
+    inicio = models.DateTimeField()
+    fim = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    criado_via = models.CharField(max_length=20, choices=Appointment.ORIGEM_CHOICES)
+    valor_no_momento = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    criado_em = models.DateTimeField()
+
+    # o Cancellation (OneToOne com o agendamento quente) some junto; fica o motivo
+    cancelamento_motivo = models.CharField(max_length=20, blank=True, default="")
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["barbearia", "inicio"], name="arq_ag_barbearia_inicio_idx"),
+            models.Index(fields=["cliente"], name="arq_ag_cliente_idx"),
+            models.Index(fields=["servico"], name="arq_ag_servico_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.inicio:%d/%m/%Y} ({self.get_status_display()})"
+
+
+class ArchivedProductSale(models.Model):
+    '''Venda de produto antiga (mesma ideia do ArchivedAppointment, particionada por `data_hora`).'''
+
+    id = models.BigIntegerField(primary_key=True)
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="+", db_index=False)
+    produto = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name="+", db_index=False)
+    produto_nome = models.CharField(max_length=120, blank=True, default="")
+    quantidade = models.PositiveIntegerField(default=1)
+    valor_unitario = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    valor_total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    data_hora = models.DateTimeField()
+    observacao = models.CharField(max_length=255, blank=True)
+    produto_chave = models.CharField(max_length=130, blank=True, default="")
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["barbearia", "data_hora"], name="arq_venda_barbearia_data_idx"),
+            models.Index(fields=["produto"], name="arq_venda_produto_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.quantidade}x {self.produto_nome or self.produto_id} ({self.data_hora:%d/%m/%Y})"
+
+
+# ==========================
+# FECHAMENTO DO DIA (livro imutável) — ver agenda/fechamento.py
+# ==========================
+class FechamentoDiario(models.Model):
+    '''
+    Totais de um dia fechado da barbearia, gravados uma vez por
+    `manage.py close_day` e nunca mais alterados: editar um agendamento antigo
+    não muda o que já foi fechado. Mês/ano/relatórios somam estas linhas.
+    '''
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="fechamentos")
+    dia = models.DateField()
+
+    agendamentos = models.PositiveIntegerField(default=0)
+    confirmados = models.PositiveIntegerField(default=0)
+    cancelados = models.PositiveIntegerField(default=0)
+    servicos_receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelado_valor = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    produtos_qtd = models.PositiveIntegerField(default=0)
+    produtos_receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # [{"servico_id", "nome", "qtd", "receita"}] dos confirmados, nome da época
+    por_servico = models.JSONField(default=list)
+    # caixa (Payment pelo pago_em do dia): [{"metodo", "qtd", "valor", "gorjeta"}] + total de gorjetas
+    por_metodo = models.JSONField(default=list)
+    gorjetas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    fechado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-dia",)
+        constraints = [
+            models.UniqueConstraint(fields=["barbearia", "dia"], name="fechamento_barbearia_dia_uniq"),
+        ]
+
+    @property
+    def receita(self):
+        return self.servicos_receita + self.produtos_receita
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Fechamento do dia é imutável.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Fechamento do dia é imutável.")
+
+    def __str__(self):
+        return f"{self.barbearia_id} • {self.dia:%d/%m/%Y}"
+
+
+# ==========================
+# CAIXA (como o cliente pagou) — ver agenda/caixa.py
+# ==========================
+class Payment(models.Model):
+    """
+    Pagamento de um agendamento ou de uma venda de produto.
+    `valor` é o que entrou pelo item (já com desconto); gorjeta vem à parte.
+    `conferido_em` = dono bateu com a maquininha/extrato/gaveta (conciliação).
+    """
+    METODO_PIX = "pix"
+    METODO_DINHEIRO = "dinheiro"
+    METODO_CHOICES = [
+        (METODO_PIX, "Pix"),
+        (METODO_DINHEIRO, "Dinheiro"),
+        ("debito", "Cartão de débito"),
+        ("credito", "Cartão de crédito"),
+        ("outro", "Outro"),
+    ]
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="pagamentos")
+    agendamento = models.ForeignKey(
+        Appointment, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name="pagamentos"
+    )
+    venda = models.ForeignKey(
+        ProductSale, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name="pagamentos"
+    )
+
+    metodo = models.CharField(max_length=10, choices=METODO_CHOICES)
+    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    desconto = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    gorjeta = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    pago_em = models.DateTimeField(default=timezone.now)
+    conferido_em = models.DateTimeField(null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # caixa do dia: faixa de pago_em da barbearia, agrupada por método
+            models.Index(fields=["barbearia", "pago_em"], name="pag_barbearia_pago_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_metodo_display()} R$ {self.valor} ({self.pago_em:%d/%m})"
+
+
+# ==========================
+# ESTOQUE (livro de movimentos) — ver agenda/estoque.py
+# ==========================
+class MovimentoEstoque(models.Model):
+    """Cada entrada/saída de um produto com estoque controlado, com o saldo logo depois."""
+    TIPO_ENTRADA = "entrada"
+    TIPO_VENDA = "venda"
+    TIPO_ESTORNO = "estorno"
+    TIPO_AJUSTE = "ajuste"
+    TIPO_CHOICES = [
+        (TIPO_ENTRADA, "Entrada (reposição)"),
+        (TIPO_VENDA, "Venda"),
+        (TIPO_ESTORNO, "Estorno de venda"),
+        (TIPO_AJUSTE, "Ajuste (contagem)"),
+    ]
+
+    barbearia = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name="+")
+    produto = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="movimentos_estoque")
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    quantidade = models.IntegerField()  # + entrou, - saiu
+    saldo = models.IntegerField()
+    venda = models.ForeignKey(ProductSale, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    observacao = models.CharField(max_length=255, blank=True, default="")
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-criado_em", "-id")
+        indexes = [
+            models.Index(fields=["barbearia", "-criado_em"], name="estoque_barbearia_criado_idx"),
+            models.Index(fields=["produto", "-criado_em"], name="estoque_produto_criado_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.quantidade:+d} → {self.saldo}"
+
@@ -0,0 +1,292 @@
+"""
+Notificações assíncronas (padrão outbox).
+
+Fluxo:
+  1) a view grava o agendamento + as linhas de NotificationOutbox na MESMA
+     transação (se o agendamento não salvar, a notificação também não existe)
+  2) `manage.py run_outbox` drena a fila em lotes, com retry e backoff exponencial
+  3) quem entrega de fato é um "sender" plugável (settings.NOTIFICATION_SENDER)
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+EVENTO_CRIADO = "agendamento_criado"
+EVENTO_CANCELADO = "agendamento_cancelado"
+EVENTO_REMARCADO = "agendamento_remarcado"
+EVENTO_LEMBRETE_24H = "lembrete_24h"
+EVENTO_LEMBRETE_2H = "lembrete_2h"
+
+# retry: 30s, 1min, 2min, 4min... até 1h entre tentativas
+BACKOFF_BASE_SEGUNDOS = getattr(settings, "NOTIFICATION_BACKOFF_BASE", 30)
+BACKOFF_MAX_SEGUNDOS = getattr(settings, "NOTIFICATION_BACKOFF_MAX", 3600)
+MAX_TENTATIVAS = getattr(settings, "NOTIFICATION_MAX_TENTATIVAS", 8)
+
+# tempo que um lote fica "reservado" pra um worker (se ele morrer, outro pega depois)
+LEASE_SEGUNDOS = getattr(settings, "NOTIFICATION_LEASE", 300)
+
+
+# ==========================
+# TELEFONE / MENSAGENS
+# ==========================
+
+def normalize_phone_to_wa(phone: str | None) -> str | None:
+    """
+    Recebe telefone em qualquer formato e devolve só dígitos no padrão wa.me.
+    Regra simples:
+      - remove tudo que não for dígito
+      - se tiver 11 ou 10 dígitos, assume BR e prefixa 55
+    """
+    if not phone:
+        return None
+    digits = "".join(ch for ch in str(phone) if ch.isdigit())
+    if not digits:
+        return None
+    if len(digits) in (10, 11):
+        digits = "55" + digits
+    return digits
+
+
+DIAS_SEMANA = ("na segunda", "na terça", "na quarta", "na quinta", "na sexta", "no sábado", "no domingo")
+
+
+def _quando(agendamento):
+    return timezone.localtime(agendamento.inicio).strftime("%d/%m/%Y às %H:%M")
+
+
+def _dia_relativo(agendamento):
+    # pelo dia local: o lembrete "de 24h" de um horário às 21h sai de manhã e é "hoje"
+    dia = timezone.localdate(agendamento.inicio)
+    faltam = (dia - timezone.localdate()).days
+    if faltam == 0:
+        return "hoje"
+    if faltam == 1:
+        return "amanhã"
+    return DIAS_SEMANA[dia.weekday()]
+
+
+def mensagem_cliente(agendamento, evento=EVENTO_CRIADO):
+    barbearia = agendamento.barbearia
+    shop_nome = barbearia.nome or "Barbearia"
+    serv_nome = agendamento.servico.nome if agendamento.servico else "Serviço"
+    when = _quando(agendamento)
+
+    if evento == EVENTO_CANCELADO:
+        return (
+            f"❌ Agendamento cancelado\n"
+            f"📍 {shop_nome}\n"
+            f"💈 {serv_nome}\n"
+            f"🗓️ {when}\n"
+            f"\nPra marcar de novo: /agendar/{barbearia.slug}/\n"
+        )
+
+    if evento in (EVENTO_LEMBRETE_24H, EVENTO_LEMBRETE_2H):
+        quando = _dia_relativo(agendamento) if evento == EVENTO_LEMBRETE_24H else "daqui a pouco"
+        return (
+            f"⏰ Lembrete: seu horário é {quando}!\n"
+            f"📍 {shop_nome}\n"
+            f"💈 {serv_nome}\n"
+            f"🗓️ {when}\n"
+            f"\nNão vai conseguir ir? Cancele ou remarque pelo Portal do Cliente:\n"
+            f"/agendar/{barbearia.slug}/cliente/\n"
+        )
+
+    if evento == EVENTO_REMARCADO:
+        return (
+            f"🔁 Agendamento remarcado!\n"
+            f"📍 {shop_nome}\n"
+            f"💈 {serv_nome}\n"
+            f"🗓️ Novo horário: {when}\n"
+            f"\n🔁 Para cancelar ou remarcar depois, use o Portal do Cliente:\n"
+            f"/agendar/{barbearia.slug}/cliente/\n"
+        )
+
+    return (
+        f"✅ Agendamento confirmado!\n"
+        f"📍 {shop_nome}\n"
+        f"💈 {serv_nome}\n"
+        f"🗓️ {when}\n"
+        f"\n"
+        f"Qualquer coisa é só chamar aqui 😄\n"
+        f"\n🔁 Para cancelar ou remarcar depois, use o Portal do Cliente:\n"
+        f"/agendar/{barbearia.slug}/cliente/\n"
+    )
+
+
+def mensagem_dono(agendamento, evento=EVENTO_CRIADO):
+    cliente = agendamento.cliente
+    serv_nome = agendamento.servico.nome if agendamento.servico else "Serviço"
+    titulo = {
+        EVENTO_CANCELADO: "❌ Agendamento cancelado pelo cliente!",
+        EVENTO_REMARCADO: "🔁 Agendamento remarcado!",
+    }.get(evento, "📌 Novo agendamento!")
+
+    return (
+        f"{titulo}\n"
+        f"👤 Cliente: {cliente.nome if cliente else '—'}\n"
+        f"📞 Tel: {cliente.telefone if cliente else '—'}\n"
+        f"💈 Serviço: {serv_nome}\n"
+        f"🗓️ {_quando(agendamento)}\n"
+    )
+
+
+# ==========================
+# ENFILEIRAR (dentro da transação da view)
+# ==========================
+
+def notificar_varios(agendamentos, evento, cliente=True, dono=True):
+    """
+    Grava as notificações de vários agendamentos com um único INSERT.
+    Deve ser chamado dentro do mesmo `transaction.atomic()` da escrita do agendamento.
+    """
+    linhas = []
+    for ag in agendamentos:
+        if cliente:
+            tel = normalize_phone_to_wa(getattr(ag.cliente, "telefone", None))
+            if tel:
+                linhas.append(NotificationOutbox(
+                    barbearia_id=ag.barbearia_id,
+                    agendamento=ag,
+                    evento=evento,
+                    destino="cliente",
+                    telefone=tel,
+                    mensagem=mensagem_cliente(ag, evento),
+                ))
+        if dono:
+            tel = normalize_phone_to_wa(getattr(ag.barbearia, "telefone", None))
+            if tel:
+                linhas.append(NotificationOutbox(
+                    barbearia_id=ag.barbearia_id,
+                    agendamento=ag,
+                    evento=evento,
+                    destino="dono",
+                    telefone=tel,
+                    mensagem=mensagem_dono(ag, evento),
+                ))
+
+    if linhas:
+        NotificationOutbox.objects.bulk_create(linhas)
+    return linhas
+
+
+def notificar(agendamento, evento, cliente=True, dono=True):
+    return notificar_varios([agendamento], evento, cliente=cliente, dono=dono)
+
+
+# ==========================
+# SENDERS (plugáveis)
+# ==========================
+
+class BaseSender:
+    """
+    Interface de envio. `send()` deve levantar exceção se não conseguiu entregar
+    (o worker agenda um retry); retornar normalmente = entregue.
+    """
+
+    def send(self, item: NotificationOutbox):
+        raise NotImplementedError
+
+
+class LogSender(BaseSender):
+    """Só registra no log (padrão em dev)."""
+
+    def send(self, item):
+        logger.info("[outbox] %s -> %s (%s)\n%s", item.evento, item.telefone, item.destino, item.mensagem)
+
+
+class FileSender(BaseSender):
+    """Anexa cada notificação como 1 linha JSON num arquivo (útil em testes)."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "NOTIFICATION_FILE_PATH", "outbox_notificacoes.log")
+
+    def send(self, item):
+        linha = {
+            "id": item.id,
+            "evento": item.evento,
+            "destino": item.destino,
+            "canal": item.canal,
+            "telefone": item.telefone,
+            "mensagem": item.mensagem,
+            "tentativa": item.tentativas,
+        }
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+
+def get_sender(dotted_path=None):
+    path = dotted_path or getattr(settings, "NOTIFICATION_SENDER", "agenda.notifications.LogSender")
+    return import_string(path)()
+
+
+# ==========================
+# WORKER (usado pelo run_outbox)
+# ==========================
+
+def _backoff(tentativas):
+    return timedelta(seconds=min(BACKOFF_BASE_SEGUNDOS * (2 ** max(tentativas - 1, 0)), BACKOFF_MAX_SEGUNDOS))
+
+
+def reservar_lote(limite=50):
+    """
+    Reserva até `limite` notificações vencidas pra este worker.
+
+    A reserva empurra `proxima_tentativa_em` pra frente (lease): outros workers
+    não pegam o mesmo lote, e se este worker morrer o lote volta sozinho pra fila.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=NotificationOutbox.STATUS_PENDENTE, proxima_tentativa_em__lte=agora)
+            .order_by("proxima_tentativa_em", "id")
+            .values_list("id", flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        NotificationOutbox.objects.filter(id__in=ids).update(
+            tentativas=F("tentativas") + 1,
+            proxima_tentativa_em=agora + timedelta(seconds=LEASE_SEGUNDOS),
+        )
+    return list(NotificationOutbox.objects.filter(id__in=ids).order_by("proxima_tentativa_em", "id"))
+
+
+def processar_lote(itens, sender):
+    """Envia o lote; sucesso vira 1 UPDATE, falhas ganham retry com backoff."""
+    enviados = []
+    falhas = 0
+    agora = timezone.now()
+
+    for item in itens:
+        try:
+            sender.send(item)
+        except Exception as exc:  # sender externo: qualquer erro vira retry
+            falhas += 1
+            erro = f"{exc.__class__.__name__}: {exc}"[:1000]
+            if item.tentativas >= MAX_TENTATIVAS:
+                NotificationOutbox.objects.filter(id=item.id).update(
+                    status=NotificationOutbox.STATUS_FALHOU, ultimo_erro=erro
+                )
+                logger.warning("[outbox] desistindo da notificação #%s: %s", item.id, erro)
+            else:
+                NotificationOutbox.objects.filter(id=item.id).update(
+                    proxima_tentativa_em=agora + _backoff(item.tentativas), ultimo_erro=erro
+                )
+        else:
+            enviados.append(item.id)
+
+    if enviados:
+        NotificationOutbox.objects.filter(id__in=enviados).update(
+            status=NotificationOutbox.STATUS_ENVIADO, enviado_em=timezone.now(), ultimo_erro=""
+        )
+    return len(enviados), falhas
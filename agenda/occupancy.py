@@ -0,0 +1,202 @@
+"""
+Ocupação da agenda (minutos disponíveis x agendados x bloqueados) para qualquer período.
+
+- capacidade: grade semanal compilada 1x (WorkDayConfig - RecurringBlock ativos)
+- agendado: `inicio`/`fim` gravados no agendamento (duração da época, não a atual
+  do serviço). O banco soma a duração agrupada por (dia, hora) dos que cabem na
+  hora em que começam (o caso comum: resultado do tamanho do período, não do
+  histórico); só os que atravessam a virada de hora vêm pro Python ser fatiados
+- tudo é quebrado por dia, por dia da semana e por hora (heatmap)
+
+Resultado serializável em JSON (entra no relatório que roda no worker de jobs).
+"""
+from datetime import timedelta
+
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate, TruncHour
+from django.utils import timezone
+
+from . import arquivo
+from .models import RecurringBlock, WorkDayConfig
+
+DIAS_SEMANA = ("Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom")
+
+# o que ocupa horário na agenda (mesma regra da geração de horários livres)
+STATUS_OCUPANTES = ("confirmado", "aguardando")
+
+LIVRE, TRABALHO, BLOQUEADO = 0, 1, 2
+
+
+def _minuto(t):
+    return t.hour * 60 + t.minute
+
+
+def _pct(parte, total):
+    return round(parte / total * 100, 1) if total else 0.0
+
+
+# ==========================
+# GRADE SEMANAL
+# ==========================
+
+def grade_semanal(barbearia):
+    """
+    Compila a semana da barbearia em minutos por hora: 2 queries.
+    Retorna {dia_semana: {hora: (minutos_trabalho, minutos_bloqueados)}}.
+    """
+    mapa = {d: bytearray(24 * 60) for d in range(7)}
+
+    for dia, ini, fim in WorkDayConfig.objects.filter(barbearia=barbearia, ativo=True).values_list(
+        "dia_semana", "inicio", "fim"
+    ):
+        m = mapa[dia]
+        for i in range(_minuto(ini), _minuto(fim)):
+            m[i] = TRABALHO
+
+    # bloqueio só tira capacidade de onde havia expediente
+    for dia, ini, fim in RecurringBlock.objects.filter(barbearia=barbearia, ativo=True).values_list(
+        "dia_semana", "inicio", "fim"
+    ):
+        m = mapa[dia]
+        for i in range(_minuto(ini), _minuto(fim)):
+            if m[i] == TRABALHO:
+                m[i] = BLOQUEADO
+
+    grade = {}
+    for dia, m in mapa.items():
+        horas = {}
+        for h in range(24):
+            fatia = m[h * 60:(h + 1) * 60]
+            trabalho = fatia.count(TRABALHO) + fatia.count(BLOQUEADO)
+            if trabalho:
+                horas[h] = (trabalho, fatia.count(BLOQUEADO))
+        grade[dia] = horas
+    return grade
+
+
+def _fatias_por_hora(inicio, fim):
+    """Quebra [inicio, fim) (hora local) em (data, hora, minutos)."""
+    cursor = inicio
+    while cursor < fim:
+        prox = min(cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1), fim)
+        yield cursor.date(), cursor.hour, (prox - cursor).total_seconds() / 60
+        cursor = prox
+
+
+def _agendado_por_hora(qs, tz):
+    """Gera (data, hora, minutos) agendados do queryset (hora local): 2 queries."""
+    qs = qs.filter(fim__gt=F("inicio"))
+    cabe_na_hora = Q(fim__lte=ExpressionWrapper(
+        TruncHour("inicio", tzinfo=tz) + timedelta(hours=1), output_field=DateTimeField()
+    ))
+    linhas = (
+        qs.filter(cabe_na_hora)
+        .annotate(d=TruncDate("inicio", tzinfo=tz), h=ExtractHour("inicio", tzinfo=tz))
+        .values("d", "h")
+        .annotate(duracao=Sum(ExpressionWrapper(F("fim") - F("inicio"), output_field=DurationField())))
+        .order_by()
+        .values_list("d", "h", "duracao")
+    )
+    for d, h, duracao in linhas:
+        yield d, h, duracao.total_seconds() / 60
+    for inicio, fim in qs.exclude(cabe_na_hora).values_list("inicio", "fim"):
+        yield from _fatias_por_hora(timezone.localtime(inicio, tz), timezone.localtime(fim, tz))
+
+
+# ==========================
+# CÁLCULO
+# ==========================
+
+def calcular_ocupacao(barbearia, data_inicio, data_fim, grade=None):
+    grade = grade if grade is not None else grade_semanal(barbearia)
+
+    # capacidade de cada dia do período (pela grade do dia da semana)
+    dias = []
+    dia = data_inicio
+    while dia <= data_fim:
+        dias.append(dia)
+        dia += timedelta(days=1)
+
+    # agendado: 2 queries por fonte (quente; + arquivo se o período chega nele)
+    agendado_dia = {}
+    agendado_hora = {}  # (dia_semana, hora) -> minutos
+    tz = timezone.get_current_timezone()
+    for qs in arquivo.agendamentos(barbearia.id, data_inicio):
+        qs = qs.filter(status__in=STATUS_OCUPANTES, inicio__date__gte=data_inicio, inicio__date__lte=data_fim)
+        for d, h, minutos in _agendado_por_hora(qs, tz):
+            agendado_dia[d] = agendado_dia.get(d, 0) + minutos
+            agendado_hora[(d.weekday(), h)] = agendado_hora.get((d.weekday(), h), 0) + minutos
+
+    total_trabalho = total_bloqueado = total_agendado = 0
+    por_dia = []
+    semana = {d: [0, 0, 0] for d in range(7)}  # trabalho, bloqueado, agendado
+    ocorrencias = {d: 0 for d in range(7)}  # quantas vezes cada dia da semana aparece no período
+
+    for d in dias:
+        horas = grade.get(d.weekday(), {})
+        trabalho = sum(t for t, _ in horas.values())
+        bloqueado = sum(b for _, b in horas.values())
+        agendado = int(round(agendado_dia.get(d, 0)))
+        disponivel = trabalho - bloqueado
+
+        total_trabalho += trabalho
+        total_bloqueado += bloqueado
+        total_agendado += agendado
+        ocorrencias[d.weekday()] += 1
+        s = semana[d.weekday()]
+        s[0] += trabalho
+        s[1] += bloqueado
+        s[2] += agendado
+
+        por_dia.append({
+            "dia": d.strftime("%d/%m"),
+            "dia_semana": DIAS_SEMANA[d.weekday()],
+            "disponivel_min": disponivel,
+            "bloqueado_min": bloqueado,
+            "agendado_min": agendado,
+            "ocupacao_pct": _pct(agendado, disponivel),
+        })
+
+    por_dia_semana = [
+        {
+            "dia_semana": DIAS_SEMANA[d],
+            "disponivel_min": semana[d][0] - semana[d][1],
+            "bloqueado_min": semana[d][1],
+            "agendado_min": semana[d][2],
+            "ocupacao_pct": _pct(semana[d][2], semana[d][0] - semana[d][1]),
+        }
+        for d in range(7)
+    ]
+
+    # heatmap: linhas = horas de expediente, colunas = dia da semana
+    horas_heatmap = sorted({h for horas in grade.values() for h in horas} | {h for _, h in agendado_hora})
+    heatmap = []
+    for h in horas_heatmap:
+        celulas = []
+        for d in range(7):
+            trabalho, bloqueado = grade.get(d, {}).get(h, (0, 0))
+            disponivel = (trabalho - bloqueado) * ocorrencias[d]
+            agendado = int(round(agendado_hora.get((d, h), 0)))
+            pct = _pct(agendado, disponivel)
+            celulas.append({
+                "disponivel_min": disponivel,
+                "agendado_min": agendado,
+                "ocupacao_pct": pct,
+                # intensidade pronta pro template (string: não passa pelo l10n de float)
+                "alpha": f"{min(pct, 100) / 100:.2f}" if disponivel else "",
+            })
+        heatmap.append({"hora": f"{h:02d}h", "celulas": celulas})
+
+    disponivel = total_trabalho - total_bloqueado
+    return {
+        "trabalho_min": total_trabalho,
+        "bloqueado_min": total_bloqueado,
+        "disponivel_min": disponivel,
+        "agendado_min": total_agendado,
+        "livre_min": max(disponivel - total_agendado, 0),
+        "ocupacao_pct": _pct(total_agendado, disponivel),
+        "por_dia": por_dia,
+        "por_dia_semana": por_dia_semana,
+        "dias_semana": list(DIAS_SEMANA),
+        "heatmap": heatmap,
+    }
@@ -0,0 +1,67 @@
+"""
+Balcão (PDV): vários itens de uma vez, um POST só.
+
+- o carrinho inteiro vira um `bulk_create` de ProductSale numa transação
+  (todas com o mesmo horário); nada de um save() + sinais por item
+- bulk_create não dispara sinais: o que eles fariam é chamado aqui, uma vez
+  pro lote — baixa no estoque, soma no ranking do dia, cache do painel
+- escritas serializadas por barbearia, igual à reserva pública (agenda/booking.py)
+- a tela volta pro próprio balcão, não pro painel
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from . import dashboard, estoque, fechamento, rankings
+from .booking import travar_barbearia
+from .models import Product, ProductSale
+
+ZERO = Decimal("0")
+
+
+def registrar_lote(barbearia, vendas, usuario=None):
+    """Grava as `vendas` (ProductSale ainda sem salvar) de uma vez. Devolve as vendas salvas."""
+    agora = timezone.now()
+    for v in vendas:
+        v.barbearia = barbearia
+        v.data_hora = agora
+        v.preencher_calculados()
+
+    with transaction.atomic():
+        travar_barbearia(barbearia)
+        vendas = ProductSale.objects.bulk_create(vendas)
+        estoque.baixar_vendas(vendas, usuario=usuario)
+        rankings.aplicar_vendas(
+            barbearia.id,
+            [
+                (None, rankings.contribuicao_venda(v.data_hora, v.produto_chave, v.quantidade, v.valor_total))
+                for v in vendas
+            ],
+            {v.produto_chave: v.produto.nome if v.produto_id else v.produto_nome for v in vendas},
+        )
+    dashboard.invalidar(barbearia.id)
+    return vendas
+
+
+def total(vendas):
+    return sum((v.valor_total or ZERO for v in vendas), ZERO)
+
+
+def estoque_baixo(vendas):
+    """Produtos do lote que ficaram no mínimo ou abaixo (uma query)."""
+    ids = {v.produto_id for v in vendas if v.produto_id}
+    if not ids:
+        return Product.objects.none()
+    return (
+        Product.objects.filter(pk__in=ids, controla_estoque=True, estoque__lte=F("estoque_minimo")).order_by("nome")
+    )
+
+
+def resumo_hoje(barbearia):
+    """Vendas de produto de hoje (faixa do dia local, uma query)."""
+    inicio, fim = fechamento.limites_do_dia(timezone.localdate())
+    return ProductSale.objects.filter(barbearia=barbearia, data_hora__gte=inicio, data_hora__lt=fim).aggregate(
+        vendas=Count("id"), itens=Sum("quantidade"), total=Sum("valor_total"),
+    )
@@ -0,0 +1,82 @@
+"""
+Cache da página pública de agendamento (/agendar/<slug>/).
+
+- `barbearia_por_slug()`: slug -> BarberShop em memória do processo (TTL curto),
+  descartado pelos sinais quando a barbearia ou um serviço dela muda
+- `BarberShop.catalogo_versao`: entra na chave dos fragmentos ({% cache %}) do
+  topo e da lista de serviços, então fragmento velho nunca é reaproveitado
+- `cache_publico`: Cache-Control/Vary pra CDN/proxy reverso cachear a landing
+  anônima (pico de acesso pelo link da bio não chega no banco)
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import BarberShop
+
+SHOP_TTL_SEGUNDOS = getattr(settings, "PUBLIC_SHOP_CACHE_TTL", 60)
+MAX_AGE = getattr(settings, "PUBLIC_CACHE_MAX_AGE", 60)
+S_MAXAGE = getattr(settings, "PUBLIC_CACHE_S_MAXAGE", 300)
+
+# slug -> (expira_em monotônico, barbearia)
+_barbearias = {}
+
+
+def barbearia_por_slug(slug):
+    """Igual a get_object_or_404(BarberShop, slug=slug), mas sem ir no banco a cada hit."""
+    agora = time.monotonic()
+    item = _barbearias.get(slug)
+    if item and item[0] > agora:
+        return item[1]
+
+    barbearia = BarberShop.objects.filter(slug=slug).first()
+    if barbearia is None:
+        _barbearias.pop(slug, None)
+        raise Http404("Barbearia não encontrada.")
+
+    _barbearias[slug] = (agora + SHOP_TTL_SEGUNDOS, barbearia)
+    return barbearia
+
+
+def esquecer_barbearia(barbearia_id):
+    """Tira a barbearia do cache deste processo (os outros expiram pelo TTL)."""
+    for slug, (_, barbearia) in list(_barbearias.items()):
+        if barbearia.id == barbearia_id:
+            _barbearias.pop(slug, None)
+
+
+def tocar_catalogo(barbearia_id):
+    """Serviço mudou: nova versão de catálogo (invalida os fragmentos da barbearia)."""
+    BarberShop.objects.filter(id=barbearia_id).update(catalogo_atualizado_em=timezone.now())
+    esquecer_barbearia(barbearia_id)
+
+
+def cache_publico(view):
+    """
+    Landing anônima sem mensagens pendentes: `public` (navegador MAX_AGE, CDN S_MAXAGE).
+    Logado, com flash message ou POST: `private, no-cache`.
+    """
+    @wraps(view)
+    def _wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+
+        cacheavel = (
+            request.method in ("GET", "HEAD")
+            and response.status_code == 200
+            and not request.user.is_authenticated
+            and not len(get_messages(request))
+            and not response.cookies
+        )
+        if cacheavel:
+            patch_cache_control(response, public=True, max_age=MAX_AGE, s_maxage=S_MAXAGE)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+        return response
+
+    return _wrapped
@@ -0,0 +1,66 @@
+"""
+Sessão do fluxo público (agendamento + portal do cliente) num cookie assinado.
+
+O visitante anônimo não cria nem atualiza linha em `django_session`: o estado
+do fluxo (cliente logado no portal, remarcação em andamento, último
+agendamento) vai num cookie assinado (`signing`, com `SECRET_KEY`), separado
+da sessão de login do dono. Assinado não é cifrado: só guardar ids e os dados
+que o próprio cliente digitou.
+
+`request.sessao_publica` (SessaoPublicaMiddleware) funciona como um dict.
+"""
+from django.conf import settings
+from django.core import signing
+
+COOKIE = getattr(settings, "PUBLIC_SESSION_COOKIE_NAME", "kairos_publico")
+MAX_AGE = getattr(settings, "PUBLIC_SESSION_MAX_AGE", 60 * 60 * 24 * 30)
+SALT = "agenda.public_session"
+CAMINHO = "/agendar/"  # todo o fluxo público fica debaixo desse prefixo
+
+
+class SessaoPublica(dict):
+    def __init__(self, dados=None):
+        super().__init__(dados or {})
+        self.modificada = False
+
+    def __setitem__(self, chave, valor):
+        if self.get(chave, object()) != valor:
+            self.modificada = True
+        super().__setitem__(chave, valor)
+
+    def __delitem__(self, chave):
+        super().__delitem__(chave)
+        self.modificada = True
+
+    def pop(self, chave, *padrao):
+        if chave in self:
+            self.modificada = True
+        return super().pop(chave, *padrao)
+
+
+def carregar(request):
+    bruto = request.COOKIES.get(COOKIE)
+    if not bruto:
+        return SessaoPublica()
+    try:
+        dados = signing.loads(bruto, salt=SALT, max_age=MAX_AGE)
+    except signing.BadSignature:  # adulterado ou expirado: começa do zero
+        return SessaoPublica()
+    return SessaoPublica(dados if isinstance(dados, dict) else {})
+
+
+def salvar(sessao, response):
+    if not sessao.modificada:
+        return
+    if not sessao:
+        response.delete_cookie(COOKIE, path=CAMINHO, samesite="Lax")
+        return
+    response.set_cookie(
+        COOKIE,
+        signing.dumps(dict(sessao), salt=SALT, compress=True),
+        max_age=MAX_AGE,
+        path=CAMINHO,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite="Lax",
+    )
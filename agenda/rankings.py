@@ -0,0 +1,227 @@
+"""
+Rankings materializados (top serviços / top produtos).
+
+As tabelas RankingServicoDia / RankingProdutoDia guardam 1 linha por
+(barbearia, dia, item). Cada escrita de Appointment/ProductSale soma só a
+diferença que ela causa (`UPDATE ... SET qtd = qtd ± n` na linha do item,
+criando a linha se faltar): duas escritas do mesmo dia ao mesmo tempo só
+esperam a trava da linha, ninguém apaga e reinsere o dia. Salvar algo que não
+conta (agendamento aguardando) não toca no ranking. Os sinais
+(agenda/signals.py) e as escritas em lote (agenda/lote_agenda.py, agenda/pdv.py)
+passam as mudanças pra `aplicar_agendamentos()` / `aplicar_vendas()`;
+`recalcular_dias()` / `reconstruir()` ficam pra conserto e pro comando.
+
+Leitura de qualquer período = faixa de dias no índice (barbearia, dia, ...),
+somando poucas linhas em vez de varrer os agendamentos/vendas crus.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from . import arquivo
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedProductSale, ProductSale, RankingProdutoDia, RankingServicoDia,
+)
+
+DECIMAL0 = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+LOTE = 2000
+
+
+# ==========================
+# ESCRITA (incremental)
+# ==========================
+
+def contribuicao_agendamento(status, inicio, servico_id, valor):
+    """(dia, servico_id, receita) que o agendamento soma no ranking; None se não conta (só confirmado)."""
+    if status != "confirmado" or not servico_id or not inicio:
+        return None
+    return (timezone.localdate(inicio), servico_id, valor or 0)
+
+
+def contribuicao_venda(data_hora, produto_chave, quantidade, valor_total):
+    """(dia, produto_chave, qtd, receita) que a venda soma no ranking."""
+    if not data_hora:
+        return None
+    return (timezone.localdate(data_hora), produto_chave, quantidade or 0, valor_total or 0)
+
+
+def _somar(modelo, chave, qtd, receita, **extra):
+    """Soma qtd/receita na linha `chave` (cria se faltar; apaga se zerou)."""
+    if not qtd and not receita:
+        return
+    linha = modelo.objects.filter(**chave)
+    if linha.update(qtd=Greatest(F("qtd") + qtd, 0), receita=F("receita") + receita):
+        if qtd < 0:
+            linha.filter(qtd=0).delete()
+        return
+    if qtd <= 0:
+        return  # linha já não existe: nada a tirar
+    _, criada = modelo.objects.get_or_create(**chave, defaults={"qtd": qtd, "receita": receita, **extra})
+    if not criada:
+        # outra transação criou a linha entre o UPDATE e o INSERT
+        linha.update(qtd=F("qtd") + qtd, receita=F("receita") + receita)
+
+
+def aplicar_agendamentos(barbearia_id, mudancas):
+    """`mudancas`: pares (antes, depois) de contribuicao_agendamento(). Soma a diferença por linha."""
+    deltas = defaultdict(lambda: [0, 0])
+    for antes, depois in mudancas:
+        if antes == depois:
+            continue
+        for contrib, sinal in ((antes, -1), (depois, 1)):
+            if contrib:
+                dia, servico_id, receita = contrib
+                deltas[(dia, servico_id)][0] += sinal
+                deltas[(dia, servico_id)][1] += sinal * receita
+    # ordem fixa: duas transações travam as linhas na mesma ordem
+    for (dia, servico_id), (qtd, receita) in sorted(deltas.items()):
+        _somar(RankingServicoDia, {"barbearia_id": barbearia_id, "dia": dia, "servico_id": servico_id}, qtd, receita)
+
+
+def aplicar_vendas(barbearia_id, mudancas, nomes=None):
+    """Igual a aplicar_agendamentos() pras vendas; `nomes` = {produto_chave: nome} das linhas novas."""
+    nomes = nomes or {}
+    deltas = defaultdict(lambda: [0, 0])
+    for antes, depois in mudancas:
+        if antes == depois:
+            continue
+        for contrib, sinal in ((antes, -1), (depois, 1)):
+            if contrib:
+                dia, chave, qtd, receita = contrib
+                deltas[(dia, chave)][0] += sinal * qtd
+                deltas[(dia, chave)][1] += sinal * receita
+    for (dia, chave), (qtd, receita) in sorted(deltas.items()):
+        _somar(
+            RankingProdutoDia, {"barbearia_id": barbearia_id, "dia": dia, "produto_chave": chave}, qtd, receita,
+            nome=(nomes.get(chave) or "").strip()[:120] or "—",
+        )
+
+
+# ==========================
+# ESCRITA (recalcular do zero)
+# ==========================
+
+def _linhas_servicos(qs):
+    return [
+        RankingServicoDia(
+            barbearia_id=r["barbearia_id"],
+            dia=r["dia"],
+            servico_id=r["servico_id"],
+            qtd=r["qtd"],
+            receita=r["receita"],
+        )
+        for r in (
+            qs.filter(status="confirmado")
+            .annotate(dia=TruncDate("inicio"))
+            .values("barbearia_id", "dia", "servico_id")
+            .annotate(qtd=Count("id"), receita=Coalesce(Sum("valor_no_momento"), DECIMAL0))
+            .order_by()
+        )
+    ]
+
+
+def _linhas_produtos(qs):
+    return [
+        RankingProdutoDia(
+            barbearia_id=r["barbearia_id"],
+            dia=r["dia"],
+            produto_chave=r["produto_chave"],
+            nome=(r["nome"] or "").strip()[:120] or "—",
+            qtd=r["qtd"],
+            receita=r["receita"],
+        )
+        for r in (
+            qs.annotate(dia=TruncDate("data_hora"))
+            .values("barbearia_id", "dia", "produto_chave")
+            .annotate(
+                nome=Max(Coalesce("produto__nome", "produto_nome")),
+                qtd=Coalesce(Sum("quantidade"), Value(0)),
+                receita=Coalesce(Sum("valor_total"), DECIMAL0),
+            )
+            .order_by()
+        )
+    ]
+
+
+def recalcular_dias(barbearia_id, dias):
+    """Recalcula os rankings de serviços e produtos dos `dias` (datas locais) da barbearia."""
+    dias = sorted({d for d in dias if d})
+    if not barbearia_id or not dias:
+        return
+
+    with transaction.atomic():
+        RankingServicoDia.objects.filter(barbearia_id=barbearia_id, dia__in=dias).delete()
+        RankingProdutoDia.objects.filter(barbearia_id=barbearia_id, dia__in=dias).delete()
+
+        # dia arquivado vem só do arquivo e dia quente só da tabela quente (corte à meia-noite).
+        # Upsert: se uma escrita incremental criou a linha no meio, sobrescreve em vez de estourar
+        RankingServicoDia.objects.bulk_create(
+            [
+                linha
+                for qs in arquivo.agendamentos(barbearia_id, dias[0])
+                for linha in _linhas_servicos(qs.filter(inicio__date__in=dias))
+            ],
+            update_conflicts=True,
+            unique_fields=["barbearia", "dia", "servico"],
+            update_fields=["qtd", "receita"],
+        )
+        RankingProdutoDia.objects.bulk_create(
+            [
+                linha
+                for qs in arquivo.vendas(barbearia_id, dias[0])
+                for linha in _linhas_produtos(qs.filter(data_hora__date__in=dias))
+            ],
+            update_conflicts=True,
+            unique_fields=["barbearia", "dia", "produto_chave"],
+            update_fields=["nome", "qtd", "receita"],
+        )
+
+
+def reconstruir(barbearia_ids=None):
+    """Apaga e reconstrói os rankings (todas as barbearias ou só as informadas)."""
+    ags = [Appointment.objects.all(), ArchivedAppointment.objects.all()]
+    vendas = [ProductSale.objects.all(), ArchivedProductSale.objects.all()]
+    rs = RankingServicoDia.objects.all()
+    rp = RankingProdutoDia.objects.all()
+    if barbearia_ids is not None:
+        ags = [qs.filter(barbearia_id__in=barbearia_ids) for qs in ags]
+        vendas = [qs.filter(barbearia_id__in=barbearia_ids) for qs in vendas]
+        rs = rs.filter(barbearia_id__in=barbearia_ids)
+        rp = rp.filter(barbearia_id__in=barbearia_ids)
+
+    with transaction.atomic():
+        rs.delete()
+        rp.delete()
+        servicos = [linha for qs in ags for linha in _linhas_servicos(qs)]
+        produtos = [linha for qs in vendas for linha in _linhas_produtos(qs)]
+        RankingServicoDia.objects.bulk_create(servicos, batch_size=LOTE)
+        RankingProdutoDia.objects.bulk_create(produtos, batch_size=LOTE)
+    return len(servicos), len(produtos)
+
+
+# ==========================
+# LEITURA
+# ==========================
+
+def top_servicos(barbearia, data_inicio, data_fim, limite=None):
+    qs = (
+        RankingServicoDia.objects.filter(barbearia=barbearia, dia__gte=data_inicio, dia__lte=data_fim)
+        .values("servico_id", "servico__nome")
+        .annotate(qtd=Sum("qtd"), receita=Sum("receita"))
+        .order_by("-qtd", "-receita")
+    )
+    return list(qs[:limite] if limite else qs)
+
+
+def top_produtos(barbearia, data_inicio, data_fim, limite=None):
+    qs = (
+        RankingProdutoDia.objects.filter(barbearia=barbearia, dia__gte=data_inicio, dia__lte=data_fim)
+        .values("produto_chave")
+        .annotate(nome=Max("nome"), qtd=Sum("qtd"), receita=Sum("receita"))
+        .order_by("-receita", "-qtd", "nome")
+    )
+    return list(qs[:limite] if limite else qs)
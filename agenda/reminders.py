@@ -0,0 +1,74 @@
+"""
+Lembretes automáticos (24h e 2h antes do `Appointment.inicio`).
+
+`despachar_lembretes()` é chamado pelo `manage.py run_reminders`:
+  - lê só a janela de tempo relevante (índices parciais em `inicio`)
+  - reserva os agendamentos com select_for_update(skip_locked=True), então
+    vários workers podem rodar em paralelo sem pegar o mesmo agendamento
+  - marca `lembrete_*_em` e grava o outbox na MESMA transação: cada lembrete
+    é disparado no máximo uma vez
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Appointment
+from .notifications import EVENTO_LEMBRETE_24H, EVENTO_LEMBRETE_2H, notificar_varios
+
+STATUS_COM_LEMBRETE = ("confirmado", "aguardando")
+
+# (evento, campo de controle, antecedência, limite inferior da janela)
+# o de 24h ignora quem já está dentro das 2h finais: esse recebe só o de 2h.
+LEMBRETES = (
+    (EVENTO_LEMBRETE_24H, "lembrete_24h_em", timedelta(hours=24), timedelta(hours=2)),
+    (EVENTO_LEMBRETE_2H, "lembrete_2h_em", timedelta(hours=2), timedelta(0)),
+)
+
+
+def _despachar_lote(evento, campo, antecedencia, piso, limite, agora):
+    with transaction.atomic():
+        agendamentos = list(
+            Appointment.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(
+                status__in=STATUS_COM_LEMBRETE,
+                inicio__gt=agora + piso,
+                inicio__lte=agora + antecedencia,
+                **{f"{campo}__isnull": True},
+            )
+            .select_related("barbearia", "cliente", "servico")
+            .order_by("inicio")[:limite]
+        )
+        if not agendamentos:
+            return 0
+
+        Appointment.objects.filter(id__in=[a.id for a in agendamentos]).update(**{campo: agora})
+        notificar_varios(agendamentos, evento, dono=False)
+
+    return len(agendamentos)
+
+
+def _dispensar_vencidos(campo, piso, agora):
+    # quem já passou da janela (ex.: marcado em cima da hora) não recebe mais esse
+    # lembrete; marcar o campo tira a linha do índice parcial e a fila não cresce.
+    return Appointment.objects.filter(
+        status__in=STATUS_COM_LEMBRETE,
+        inicio__lte=agora + piso,
+        **{f"{campo}__isnull": True},
+    ).update(**{campo: agora})
+
+
+def despachar_lembretes(limite=500, agora=None):
+    """Despacha todos os lembretes vencidos, em lotes de `limite`. Retorna {evento: qtd}."""
+    agora = agora or timezone.now()
+    resumo = {}
+    for evento, campo, antecedencia, piso in LEMBRETES:
+        _dispensar_vencidos(campo, piso, agora)
+        total = 0
+        while True:
+            n = _despachar_lote(evento, campo, antecedencia, piso, limite, agora)
+            total += n
+            if n < limite:
+                break
+        resumo[evento] = total
+    return resumo
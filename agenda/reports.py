@@ -0,0 +1,117 @@
+"""
+Cálculo dos relatórios (tela Relatórios).
+
+Fica fora da view pra poder rodar tanto dentro da request (períodos curtos)
+quanto no worker de jobs (`manage.py run_jobs`) para períodos grandes.
+Tudo que sai daqui é serializável em JSON (vai pro ReportJob.resultado).
+"""
+from datetime import date, datetime, timedelta
+
+from . import fechamento, rankings
+from .occupancy import calcular_ocupacao
+
+
+def brl(v: float) -> str:
+    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _parse_date(s):
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except Exception:
+        return None
+
+
+def _month_range(d: date):
+    inicio = d.replace(day=1)
+    if d.month == 12:
+        prox = date(d.year + 1, 1, 1)
+    else:
+        prox = date(d.year, d.month + 1, 1)
+    fim = prox - timedelta(days=1)
+    return inicio, fim
+
+
+def periodo_do_request(params, hoje):
+    """Lê ?periodo=hoje|7d|30d|mes|custom (&inicio/&fim) e devolve (periodo, data_inicio, data_fim)."""
+    periodo = params.get("periodo", "mes")
+
+    if periodo == "hoje":
+        data_inicio = hoje
+        data_fim = hoje
+    elif periodo == "7d":
+        data_inicio = hoje - timedelta(days=6)
+        data_fim = hoje
+    elif periodo == "30d":
+        data_inicio = hoje - timedelta(days=29)
+        data_fim = hoje
+    elif periodo == "custom":
+        data_inicio = _parse_date(params.get("inicio")) or hoje
+        data_fim = _parse_date(params.get("fim")) or hoje
+    else:
+        data_inicio, data_fim = _month_range(hoje)
+
+    if data_inicio > data_fim:
+        data_inicio, data_fim = data_fim, data_inicio
+
+    return periodo, data_inicio, data_fim
+
+
+def calcular_relatorio(barbearia, data_inicio, data_fim):
+    # dias fechados vêm do livro (agenda/fechamento.py); só os abertos leem agendamentos/vendas
+    totais = fechamento.totais(barbearia, data_inicio, data_fim)
+    contagens = {
+        "total": totais["agendamentos"],
+        "confirmados": totais["confirmados"],
+        "cancelados": totais["cancelados"],
+    }
+    total_servicos = totais["servicos_receita"]
+    total_produtos = totais["produtos_receita"] or 0
+    qtd_produtos = totais["produtos_qtd"] or 0
+
+    receita_total = float(total_servicos) + float(total_produtos)
+
+    # top serviços/produtos: rankings materializados (agenda/rankings.py)
+    top_servicos = [
+        {"nome": r["servico__nome"], "qtd": int(r["qtd"]), "receita": brl(float(r["receita"] or 0))}
+        for r in rankings.top_servicos(barbearia, data_inicio, data_fim, limite=8)
+    ]
+
+    produtos_detalhados = [
+        {"nome": r["nome"], "qtd": int(r["qtd"] or 0), "receita": brl(float(r["receita"] or 0))}
+        for r in rankings.top_produtos(barbearia, data_inicio, data_fim)
+    ]
+    # mesma ordenação (-receita, -qtd): o top é o começo da lista detalhada
+    top_produtos = produtos_detalhados[:8]
+    kpi_produtos_distintos = len(produtos_detalhados)
+
+    por_dia = fechamento.por_dia(barbearia, data_inicio, data_fim)
+    resumo_por_dia = []
+    dia = data_inicio
+    while dia <= data_fim:
+        r = por_dia.get(dia, {})
+        resumo_por_dia.append(
+            {
+                "dia": dia.strftime("%d/%m"),
+                "agendamentos": r.get("agendamentos", 0),
+                "confirmados": r.get("confirmados", 0),
+                "cancelados": r.get("cancelados", 0),
+            }
+        )
+        dia += timedelta(days=1)
+
+    return {
+        "kpi_agendamentos": contagens["total"],
+        "kpi_confirmados": contagens["confirmados"],
+        "kpi_cancelados": contagens["cancelados"],
+        "kpi_receita": brl(receita_total),
+        "kpi_itens_produtos": int(qtd_produtos or 0),
+        "kpi_produtos_distintos": kpi_produtos_distintos,
+        "kpi_produtos_qtd": int(qtd_produtos or 0),
+        "kpi_produtos_receita": brl(float(total_produtos)),
+        "top_servicos": top_servicos,
+        "top_produtos": top_produtos,
+        "produtos_detalhados": produtos_detalhados,
+        "resumo_por_dia": resumo_por_dia,
+        "ocupacao": calcular_ocupacao(barbearia, data_inicio, data_fim),
+    }
@@ -0,0 +1,167 @@
+"""
+"Chamar de volta": clientes que costumam voltar a cada N dias e passaram do prazo.
+
+- `calcular_intervalos()` (cron noturno, `manage.py compute_return_intervals`):
+  intervalo entre visitas de todos os clientes numa query só, com LAG() por
+  cliente (window function); o banco devolve (cliente, intervalo) em ordem e o
+  Python tira a mediana de cada cliente numa passada, sem carregar o histórico
+- visitas arquivadas (agenda/arquivo.py) entram também: o LAG roda em cada
+  tabela e o intervalo da emenda (última arquivada -> primeira quente) é somado
+  em Python; sem isso, quem volta devagar perderia o histórico no arquivamento
+- `Client.intervalo_tipico_dias` = mediana dos intervalos (uma falta longa
+  isolada não estraga); `Client.retorno_previsto` = última visita + intervalo,
+  refeito também pelo client_stats a cada visita nova
+- a lista é uma faixa do índice (barbearia, retorno_previsto)
+"""
+from datetime import timedelta
+from statistics import median
+
+from django.db.models import DurationField, Exists, ExpressionWrapper, F, OuterRef, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from .models import Appointment, ArchivedAppointment, Client
+
+LOTE = 1000
+MIN_INTERVALOS = 2       # 3+ visitas pra ter um padrão
+INTERVALO_MINIMO = timedelta(days=1)  # dois serviços no mesmo dia = mesma visita
+TOLERANCIA_DIAS = 3      # atrasou uns dias ainda não é "sumiu"
+JANELA_DIAS = 180        # passou disso, provavelmente não volta mais
+PAUSA_APOS_CHAMAR = timedelta(days=14)
+
+
+def previsao(ultima_visita, intervalo_dias):
+    if not ultima_visita or not intervalo_dias:
+        return None
+    return timezone.localdate(ultima_visita) + timedelta(days=intervalo_dias)
+
+
+# ==========================
+# LOTE NOTURNO
+# ==========================
+
+def _intervalos_por_cliente(visitas):
+    """Gera (cliente_id, [intervalos], primeira, última) a partir das visitas, com o LAG calculado no banco."""
+    linhas = (
+        visitas.annotate(
+            intervalo=ExpressionWrapper(
+                F("inicio") - Window(Lag("inicio"), partition_by=[F("cliente_id")], order_by=F("inicio").asc()),
+                output_field=DurationField(),
+            )
+        )
+        .order_by("cliente_id", "inicio")
+        .values_list("cliente_id", "inicio", "intervalo")
+    )
+    atual, intervalos, primeira, ultima = None, [], None, None
+    for cliente_id, inicio, intervalo in linhas.iterator(chunk_size=5000):
+        if cliente_id != atual:
+            if atual is not None:
+                yield atual, intervalos, primeira, ultima
+            atual, intervalos, primeira = cliente_id, [], inicio
+        if intervalo is not None and intervalo >= INTERVALO_MINIMO:
+            intervalos.append(intervalo)
+        ultima = inicio
+    if atual is not None:
+        yield atual, intervalos, primeira, ultima
+
+
+def _tipico(intervalos):
+    if len(intervalos) < MIN_INTERVALOS:
+        return None
+    dias = median(i.total_seconds() for i in intervalos) / 86400
+    return max(1, min(round(dias), 32767))
+
+
+def calcular_intervalos(barbearia_ids=None, agora=None):
+    """Recalcula intervalo típico e retorno previsto de todos os clientes. Devolve (clientes, alterados)."""
+    agora = agora or timezone.now()
+    visitas = Appointment.objects.filter(status="confirmado", inicio__lte=agora).exclude(cliente_id=None)
+    arquivadas = ArchivedAppointment.objects.filter(status="confirmado", inicio__lte=agora).exclude(cliente_id=None)
+    clientes = Client.objects.all()
+    if barbearia_ids is not None:
+        visitas = visitas.filter(barbearia_id__in=barbearia_ids)
+        arquivadas = arquivadas.filter(barbearia_id__in=barbearia_ids)
+        clientes = clientes.filter(barbearia_id__in=barbearia_ids)
+
+    # o arquivo só tem o que começou antes do corte: as visitas dele vêm antes das quentes
+    do_arquivo = {
+        cliente_id: (intervalos, ultima)
+        for cliente_id, intervalos, _, ultima in _intervalos_por_cliente(arquivadas)
+    }
+    tipicos = {}
+    for cliente_id, intervalos, primeira, _ in _intervalos_por_cliente(visitas):
+        antigos, ultima_arquivada = do_arquivo.pop(cliente_id, ([], None))
+        if ultima_arquivada is not None and primeira - ultima_arquivada >= INTERVALO_MINIMO:
+            antigos = antigos + [primeira - ultima_arquivada]
+        tipicos[cliente_id] = _tipico(antigos + intervalos)
+    # só tem visita no arquivo (sumiu faz mais de um ano): vale o padrão de lá
+    for cliente_id, (intervalos, _) in do_arquivo.items():
+        tipicos[cliente_id] = _tipico(intervalos)
+
+    total = alterados = 0
+    ids = list(clientes.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), LOTE):
+        lote = Client.objects.filter(id__in=ids[i:i + LOTE]).only(
+            "id", "ultima_visita", "intervalo_tipico_dias", "retorno_previsto"
+        )
+        mudou = []
+        for c in lote:
+            intervalo = tipicos.get(c.id)
+            retorno = previsao(c.ultima_visita, intervalo)
+            if (c.intervalo_tipico_dias, c.retorno_previsto) != (intervalo, retorno):
+                c.intervalo_tipico_dias, c.retorno_previsto = intervalo, retorno
+                mudou.append(c)
+            total += 1
+        Client.objects.bulk_update(mudou, ["intervalo_tipico_dias", "retorno_previsto"])
+        alterados += len(mudou)
+    return total, alterados
+
+
+def atualizar_previsao(clientes_qs):
+    """Cliente teve visita nova: retorno previsto anda junto (o intervalo só muda no lote)."""
+    mudou = []
+    for c in clientes_qs.filter(intervalo_tipico_dias__isnull=False).only(
+        "id", "ultima_visita", "intervalo_tipico_dias", "retorno_previsto"
+    ):
+        retorno = previsao(c.ultima_visita, c.intervalo_tipico_dias)
+        if retorno != c.retorno_previsto:
+            c.retorno_previsto = retorno
+            mudou.append(c)
+    Client.objects.bulk_update(mudou, ["retorno_previsto"])
+
+
+# ==========================
+# LISTA
+# ==========================
+
+def pendentes(barbearia, hoje=None):
+    """Atrasados pro retorno, sem horário marcado e não chamados recentemente (mais recentes primeiro)."""
+    hoje = hoje or timezone.localdate()
+    agora = timezone.now()
+    futuro = Appointment.objects.filter(cliente=OuterRef("pk"), inicio__gt=agora).exclude(status="cancelado")
+    return (
+        Client.objects.filter(
+            barbearia=barbearia,
+            retorno_previsto__lt=hoje - timedelta(days=TOLERANCIA_DIAS),
+            retorno_previsto__gte=hoje - timedelta(days=JANELA_DIAS),
+        )
+        .exclude(chamado_de_volta_em__gte=agora - PAUSA_APOS_CHAMAR)
+        .exclude(Exists(futuro))
+        .order_by("-retorno_previsto", "id")
+    )
+
+
+def mensagem(cliente, barbearia, link):
+    primeiro_nome = " ".join((cliente.nome or "").split()[:1])
+    dias = (timezone.localdate() - timezone.localdate(cliente.ultima_visita)).days if cliente.ultima_visita else None
+    return (
+        f"Fala, {primeiro_nome}! 👋\n"
+        + (f"Já faz {dias} dias da sua última visita na {barbearia.nome}. " if dias else "")
+        + "Bora deixar o visual em dia? ✂️\n"
+        f"Escolhe seu horário aqui: {link}"
+    )
+
+
+def marcar_chamado(cliente):
+    """Dono chamou no WhatsApp: some da lista por PAUSA_APOS_CHAMAR."""
+    Client.objects.filter(id=cliente.id).update(chamado_de_volta_em=timezone.now())
@@ -0,0 +1,188 @@
+"""
+Receivers que mantêm os dados derivados em dia a cada escrita.
+
+Escritas em lote (`.update()`, `bulk_create`) não disparam sinais: quem faz
+esse tipo de escrita chama as funções de recálculo diretamente.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import client_search, client_stats, dashboard, estoque, rankings
+from .models import (
+    Appointment, BarberShop, Client, MovimentoEstoque, Product, ProductSale, RankingProdutoDia, RecurringBlock,
+    Service, WorkDayConfig, chave_produto,
+)
+from .public_cache import esquecer_barbearia, tocar_catalogo
+
+
+# ==========================
+# RANKINGS
+# ==========================
+
+@receiver(pre_save, sender=Appointment)
+@receiver(pre_save, sender=ProductSale)
+def _guardar_anterior(sender, instance, **kwargs):
+    # o que a linha somava antes da edição: ranking e histórico do cliente tiram isso e somam o novo
+    instance._ranking_anterior = None
+    instance._historico_anterior = None
+    if instance.pk:
+        if sender is Appointment:
+            antigo = (
+                sender.objects.filter(pk=instance.pk)
+                .values_list("inicio", "cliente_id", "status", "servico_id", "valor_no_momento")
+                .first()
+            )
+            if antigo:
+                inicio, cliente_id, status, servico_id, valor = antigo
+                instance._ranking_anterior = rankings.contribuicao_agendamento(status, inicio, servico_id, valor)
+                instance._historico_anterior = client_stats.retrato(cliente_id, status, inicio, valor)
+        else:
+            antigo = (
+                sender.objects.filter(pk=instance.pk)
+                .values_list("data_hora", "produto_id", "quantidade", "produto_chave", "valor_total")
+                .first()
+            )
+            if antigo:
+                data_hora, instance._produto_anterior, instance._quantidade_anterior, chave, valor = antigo
+                instance._ranking_anterior = rankings.contribuicao_venda(
+                    data_hora, chave, instance._quantidade_anterior, valor
+                )
+
+
+def _contribuicao_agendamento(ag):
+    return rankings.contribuicao_agendamento(ag.status, ag.inicio, ag.servico_id, ag.valor_no_momento)
+
+
+def _contribuicao_venda(venda):
+    return rankings.contribuicao_venda(venda.data_hora, venda.produto_chave, venda.quantidade, venda.valor_total)
+
+
+@receiver(post_save, sender=Appointment)
+def _ranking_agendamento(sender, instance, **kwargs):
+    antes = getattr(instance, "_ranking_anterior", None)
+    rankings.aplicar_agendamentos(instance.barbearia_id, [(antes, _contribuicao_agendamento(instance))])
+
+
+@receiver(post_delete, sender=Appointment)
+def _ranking_agendamento_apagado(sender, instance, **kwargs):
+    rankings.aplicar_agendamentos(instance.barbearia_id, [(_contribuicao_agendamento(instance), None)])
+
+
+@receiver(post_save, sender=ProductSale)
+def _ranking_venda(sender, instance, **kwargs):
+    antes = getattr(instance, "_ranking_anterior", None)
+    depois = _contribuicao_venda(instance)
+    if antes == depois:
+        return
+    nome = instance.produto.nome if instance.produto_id else instance.produto_nome
+    rankings.aplicar_vendas(instance.barbearia_id, [(antes, depois)], {instance.produto_chave: nome})
+
+
+@receiver(post_delete, sender=ProductSale)
+def _ranking_venda_apagada(sender, instance, **kwargs):
+    rankings.aplicar_vendas(instance.barbearia_id, [(_contribuicao_venda(instance), None)])
+
+
+@receiver(post_save, sender=Product)
+def _ranking_nome_produto(sender, instance, created, **kwargs):
+    # renomeou o produto: o nome exibido no ranking acompanha (1 UPDATE)
+    if not created:
+        RankingProdutoDia.objects.filter(
+            barbearia_id=instance.barbearia_id, produto_chave=chave_produto(instance.id)
+        ).exclude(nome=instance.nome[:120]).update(nome=instance.nome[:120])
+
+
+# ==========================
+# PÁGINA PÚBLICA (cache)
+# ==========================
+
+@receiver(post_save, sender=BarberShop)
+@receiver(post_delete, sender=BarberShop)
+def _public_barbearia(sender, instance, **kwargs):
+    # save() já renovou catalogo_atualizado_em (auto_now); só descarta o slug em memória
+    esquecer_barbearia(instance.id)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def _public_servico(sender, instance, **kwargs):
+    tocar_catalogo(instance.barbearia_id)
+
+
+# ==========================
+# PAINEL (cache)
+# ==========================
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=ProductSale)
+@receiver(post_delete, sender=ProductSale)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=WorkDayConfig)
+@receiver(post_delete, sender=WorkDayConfig)
+@receiver(post_save, sender=RecurringBlock)
+@receiver(post_delete, sender=RecurringBlock)
+def _painel(sender, instance, **kwargs):
+    # roda depois dos rankings (registrados antes): o próximo GET já lê o dia recalculado
+    dashboard.invalidar(instance.barbearia_id)
+
+
+# ==========================
+# HISTÓRICO DO CLIENTE
+# ==========================
+
+def _retrato(ag):
+    return client_stats.retrato(ag.cliente_id, ag.status, ag.inicio, ag.valor_no_momento)
+
+
+@receiver(post_save, sender=Appointment)
+def _estatisticas_cliente(sender, instance, **kwargs):
+    client_stats.aplicar_mudancas([(getattr(instance, "_historico_anterior", None), _retrato(instance))])
+
+
+@receiver(post_delete, sender=Appointment)
+def _estatisticas_cliente_apagado(sender, instance, **kwargs):
+    client_stats.aplicar_mudancas([(_retrato(instance), None)])
+
+
+# ==========================
+# BUSCA DE CLIENTES
+# ==========================
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def _busca_clientes(sender, instance, **kwargs):
+    client_search.invalidar(instance.barbearia_id)
+
+
+# ==========================
+# ESTOQUE
+# ==========================
+
+@receiver(post_save, sender=ProductSale)
+def _estoque_venda(sender, instance, created, **kwargs):
+    if created:
+        estoque.baixar_vendas([instance])
+        return
+    produto_antigo = getattr(instance, "_produto_anterior", None)
+    quantidade_antiga = getattr(instance, "_quantidade_anterior", None)
+    if (produto_antigo, quantidade_antiga) == (instance.produto_id, instance.quantidade):
+        return
+    # editou produto/quantidade: devolve o que tinha saído e baixa de novo
+    antiga = ProductSale(
+        pk=instance.pk, barbearia_id=instance.barbearia_id, produto_id=produto_antigo, quantidade=quantidade_antiga or 0
+    )
+    estoque.baixar_vendas([antiga], MovimentoEstoque.TIPO_ESTORNO)
+    estoque.baixar_vendas([instance])
+
+
+@receiver(post_delete, sender=ProductSale)
+def _estoque_venda_apagada(sender, instance, origin=None, **kwargs):
+    # venda apagada (uma ou um queryset de vendas) volta pro estoque; em cascata de barbearia/produto não
+    if origin is not None and getattr(origin, "model", type(origin)) is not ProductSale:
+        return
+    # a venda já não existe: o estorno fica sem o vínculo
+    apagada = ProductSale(
+        barbearia_id=instance.barbearia_id, produto_id=instance.produto_id, quantidade=instance.quantidade
+    )
+    estoque.baixar_vendas([apagada], MovimentoEstoque.TIPO_ESTORNO)
@@ -0,0 +1,34 @@
+"""
+Storage do collectstatic: WhiteNoise (hash no nome + .gz/.br) + minificação
+do CSS próprio do app (theme.css, kairos.css, portal_cliente.css...).
+"""
+import re
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+_COMENTARIO = re.compile(r"/\*.*?\*/", re.S)
+_ESPACOS = re.compile(r"\s+")
+_EM_VOLTA = re.compile(r"\s*([{};,>])\s*")
+
+
+def minificar_css(texto):
+    """Minificador conservador: tira comentários e espaços que não mudam nada."""
+    texto = _COMENTARIO.sub("", texto)
+    texto = _ESPACOS.sub(" ", texto)
+    texto = _EM_VOLTA.sub(r"\1", texto)
+    return texto.replace(";}", "}").strip() + "\n"
+
+
+class KairosStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    # terceiros já vêm minificados (e o SRI deles é conferido no vendor_assets)
+    nao_minificar = ("vendor/", "admin/")
+
+    def _save(self, name, content):
+        if name.endswith(".css") and not name.endswith(".min.css") and not name.startswith(self.nao_minificar):
+            content.seek(0)
+            texto = content.read()
+            if isinstance(texto, bytes):
+                texto = texto.decode("utf-8")
+            content = ContentFile(minificar_css(texto).encode("utf-8"))
+        return super()._save(name, content)
@@ -0,0 +1,11 @@
+from django import template
+
+from agenda.assets import asset_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset(nome):
+    """{% asset 'bootstrap_css' %} -> URL do arquivo em static/vendor/ (ou do CDN, se ainda não foi commitado)."""
+    return asset_url(nome)
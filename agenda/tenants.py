@@ -0,0 +1,179 @@
+"""
+Painel do operador (dono do SaaS): atividade e assinatura de todas as barbearias.
+
+- 4 queries agrupadas por barbearia, independente do número de lojas
+- resultado inteiro no cache (`OPERATOR_PANEL_TTL`); `manage.py refresh_operator_panel`
+  no cron recalcula antes de expirar, então a página só lê do cache
+- filtros/ordenação/CSV trabalham sobre as linhas já calculadas
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .db_router import using_replica
+from .models import Appointment, BarberShop, ProductSale
+
+DECIMAL0 = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+CHAVE_CACHE = "operador:painel"
+TTL = getattr(settings, "OPERATOR_PANEL_TTL", 15 * 60)
+JANELA_DIAS = 30
+
+SITUACOES = (
+    ("vencido", "Vencido"),
+    ("sem_vencimento", "Sem vencimento"),
+    ("em_dia", "Em dia"),
+    ("isento", "Isento"),
+    ("sem_assinatura", "Sem assinatura"),
+)
+ROTULOS = dict(SITUACOES)
+
+COLUNAS_CSV = (
+    ("id", "ID"),
+    ("nome", "Barbearia"),
+    ("slug", "Slug"),
+    ("dono", "Dono"),
+    ("plano", "Plano"),
+    ("situacao_rotulo", "Situação"),
+    ("vencimento", "Vencimento"),
+    ("dias_atraso", "Dias em atraso"),
+    ("agendamentos_30d", "Agendamentos (30d)"),
+    ("confirmados_30d", "Confirmados (30d)"),
+    ("receita_30d", "Receita (30d)"),
+    ("ultimo_agendamento", "Último agendamento"),
+)
+
+
+def _situacao(plano, vencimento, isento, hoje):
+    if plano is None:
+        return "sem_assinatura"
+    if isento:
+        return "isento"
+    if vencimento is None:
+        return "sem_vencimento"
+    return "vencido" if vencimento < hoje else "em_dia"
+
+
+# ==========================
+# CÁLCULO
+# ==========================
+
+def calcular_painel(hoje=None):
+    hoje = hoje or timezone.localdate()
+    desde = timezone.now() - timedelta(days=JANELA_DIAS)
+
+    agendamentos = {
+        r["barbearia_id"]: r
+        for r in (
+            Appointment.objects.filter(inicio__gte=desde, inicio__lte=timezone.now())
+            .values("barbearia_id")
+            .annotate(
+                total=Count("id"),
+                confirmados=Count("id", filter=Q(status="confirmado")),
+                receita=Coalesce(Sum("valor_no_momento", filter=Q(status="confirmado")), DECIMAL0),
+            )
+            .order_by()
+        )
+    }
+    vendas = dict(
+        ProductSale.objects.filter(data_hora__gte=desde)
+        .values("barbearia_id")
+        .annotate(total=Coalesce(Sum("valor_total"), DECIMAL0))
+        .order_by()
+        .values_list("barbearia_id", "total")
+    )
+    ultimos = dict(
+        Appointment.objects.values("barbearia_id")
+        .annotate(ultimo=Max("criado_em"))
+        .order_by()
+        .values_list("barbearia_id", "ultimo")
+    )
+
+    linhas = []
+    for b in BarberShop.objects.values(
+        "id", "nome", "slug", "dono__username",
+        "subscription__current_plan", "subscription__next_due_date", "subscription__is_exempt",
+    ).order_by("id"):
+        ag = agendamentos.get(b["id"], {})
+        vencimento = b["subscription__next_due_date"]
+        situacao = _situacao(b["subscription__current_plan"], vencimento, b["subscription__is_exempt"], hoje)
+        ultimo = ultimos.get(b["id"])
+        linhas.append({
+            "id": b["id"],
+            "nome": b["nome"],
+            "slug": b["slug"],
+            "dono": b["dono__username"],
+            "plano": b["subscription__current_plan"] or "",
+            "situacao": situacao,
+            "situacao_rotulo": ROTULOS[situacao],
+            "vencimento": vencimento.isoformat() if vencimento else "",
+            "dias_atraso": (hoje - vencimento).days if situacao == "vencido" else 0,
+            "agendamentos_30d": ag.get("total", 0),
+            "confirmados_30d": ag.get("confirmados", 0),
+            "receita_30d": f"{float(ag.get('receita') or 0) + float(vendas.get(b['id']) or 0):.2f}",
+            "ultimo_agendamento": timezone.localtime(ultimo).strftime("%Y-%m-%d %H:%M") if ultimo else "",
+        })
+
+    return {
+        "gerado_em": timezone.now().isoformat(),
+        "hoje": hoje.isoformat(),
+        "linhas": linhas,
+    }
+
+
+def painel(atualizar=False):
+    """Painel do cache (ou recalculado, se `atualizar` ou se expirou)."""
+    if not atualizar:
+        dados = cache.get(CHAVE_CACHE)
+        if dados is not None:
+            return dados
+    with using_replica():
+        dados = calcular_painel()
+    cache.set(CHAVE_CACHE, dados, TTL)
+    return dados
+
+
+# ==========================
+# FILTROS
+# ==========================
+
+ORDENACOES = {
+    "nome": lambda l: l["nome"].lower(),
+    "receita": lambda l: -float(l["receita_30d"]),
+    "agendamentos": lambda l: -l["agendamentos_30d"],
+    "atraso": lambda l: -l["dias_atraso"],
+    "ultimo": lambda l: l["ultimo_agendamento"] or "0",
+}
+
+
+def filtrar(linhas, params):
+    """Aplica ?q=, ?situacao=, ?plano= e ?ordem= sobre as linhas do painel."""
+    q = (params.get("q") or "").strip().lower()
+    situacao = params.get("situacao") or ""
+    plano = params.get("plano") or ""
+    ordem = params.get("ordem") if params.get("ordem") in ORDENACOES else "atraso"
+
+    if q:
+        linhas = [l for l in linhas if q in l["nome"].lower() or q in l["slug"] or q in (l["dono"] or "").lower()]
+    if situacao:
+        linhas = [l for l in linhas if l["situacao"] == situacao]
+    if plano:
+        linhas = [l for l in linhas if l["plano"] == plano]
+
+    return sorted(linhas, key=ORDENACOES[ordem], reverse=(ordem == "ultimo"))
+
+
+def resumo(linhas):
+    contagem = {s: 0 for s, _ in SITUACOES}
+    for l in linhas:
+        contagem[l["situacao"]] += 1
+    return {
+        "lojas": len(linhas),
+        "por_situacao": [(s, rotulo, contagem[s]) for s, rotulo in SITUACOES],
+        "agendamentos_30d": sum(l["agendamentos_30d"] for l in linhas),
+        "receita_30d": f"{sum(float(l['receita_30d']) for l in linhas):.2f}",
+    }
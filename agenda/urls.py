@@ -4,7 +4,13 @@ from . import views
 urlpatterns = [
     # Área do Marquinhos (interno)
     path('', views.dashboard, name='homemcom_dashboard'),
+    path('painel/<slug:nome>/', views.dashboard_painel, name='homemcom_dashboard_painel'),
     path('novo-agendamento/', views.novo_agendamento, name='homemcom_novo_agendamento'),
+    path('clientes/buscar/', views.buscar_clientes, name='homemcom_buscar_clientes'),
+    path('clientes/', views.clientes_view, name='homemcom_clientes'),
+    path('clientes/<int:pk>/', views.cliente_perfil, name='homemcom_cliente_perfil'),
+    path('clientes/chamar-de-volta/', views.chamar_de_volta_view, name='homemcom_chamar_de_volta'),
+    path('clientes/<int:pk>/chamar-de-volta/', views.chamar_de_volta, name='homemcom_chamar_cliente'),
     path('semana/', views.semana_view, name='homemcom_semana'),
     path('agenda-inteligente/', views.agenda_inteligente_view, name='homemcom_agenda_inteligente'),
     path('agenda-inteligente/<int:pk>/toggle/', views.agenda_inteligente_toggle, name='homemcom_agenda_inteligente_toggle'),
@@ -19,8 +25,16 @@ urlpatterns = [
     path('agendamento/<int:pk>/cancelar/', views.cancelar_agendamento, name='homemcom_cancelar_agendamento'),
     path('agendamento/<int:pk>/remarcar/', views.remarcar_agendamento, name='homemcom_remarcar_agendamento'),
     path('agendamento/<int:agendamento_id>/confirmar/', views.confirmar_agendamento, name='homemcom_confirmar_agendamento'),
+    path('agendamentos/lote/', views.agenda_lote, name='homemcom_agenda_lote'),
 
     path('venda-produto/', views.registrar_venda_produto, name='homemcom_venda_produto'),
+    path('venda-produto/balcao/', views.venda_balcao, name='homemcom_venda_balcao'),
+    path('caixa/', views.caixa_view, name='homemcom_caixa'),
+    path('caixa/pagar/', views.caixa_pagar, name='homemcom_caixa_pagar'),
+    path('caixa/pagar-pendentes/', views.caixa_pagar_pendentes, name='homemcom_caixa_pagar_pendentes'),
+    path('caixa/conferir/', views.caixa_conferir, name='homemcom_caixa_conferir'),
+    path('estoque/', views.estoque_view, name='homemcom_estoque'),
+    path('estoque/movimentar/', views.estoque_movimentar, name='homemcom_estoque_movimentar'),
 
     path('horarios/', views.horarios_view, name='homemcom_horarios'),
     path('horarios/novo/', views.novo_bloco_horario, name='homemcom_horarios_novo'),
@@ -40,6 +54,7 @@ urlpatterns = [
     path("agendar/<slug:slug>/cliente/cancelar/<int:pk>/", views.public_cliente_cancelar, name="public_cliente_cancelar"),
     path("agendar/<slug:slug>/cliente/remarcar/<int:pk>/", views.public_cliente_remarcar, name="public_cliente_remarcar"),
     path('relatorios/', views.relatorios_view, name='homemcom_relatorios'),
+    path('relatorios/job/<int:pk>/', views.relatorio_job_status, name='homemcom_relatorio_job_status'),
     path('planos/', views.homemcom_planos, name='homemcom_planos'),
     path("criar-conta/", views.signup, name="signup"),
     path("onboarding/<slug:slug>/servicos/", views.onboarding_servicos, name="onboarding_servicos"),
@@ -51,4 +66,8 @@ urlpatterns = [
     path("planos/", views.planos, name="planos"),
     path("planos/selecionar/<str:plano>/", views.selecionar_plano, name="selecionar_plano"),
     path("guia/", views.guia_sistema, name="homemcom_guia_sistema"),
+
+    # Operador (staff)
+    path("operador/", views.operador_painel, name="operador_painel"),
+    path("operador/csv/", views.operador_painel_csv, name="operador_painel_csv"),
 ]
\ No newline at end of file
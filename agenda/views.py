@@ -1,32 +1,50 @@
 import re
 
 
-import json
 from datetime import datetime, timedelta, date
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Avg, Count, Value
-from django.db.models.functions import Coalesce, TruncDate, ExtractHour
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.db.models import DecimalField
-from django.http import HttpResponse, HttpResponseForbidden
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 from urllib.parse import quote
 
 from .models import (
+    chave_telefone,
     Appointment,
     BarberShop,
     WorkDayConfig,
     Client,
     Service,
     Product,
-    ProductSale,
     PlanSubscription,
     RecurringBlock,
+    ReportJob,
+)
+from .booking import HorarioIndisponivel, reservar
+from .client_search import buscar as buscar_clientes_da_barbearia
+from .dashboard import PAINEIS, painel
+from .db_router import using_replica
+from .jobs import enfileirar as enfileirar_job
+from .public_cache import barbearia_por_slug, cache_publico
+from .notifications import (
+    EVENTO_CANCELADO,
+    EVENTO_CRIADO,
+    EVENTO_REMARCADO,
+    mensagem_cliente,
+    mensagem_dono,
+    normalize_phone_to_wa,
+    notificar,
 )
+from .reports import calcular_relatorio, periodo_do_request
 
 
 # =========================
@@ -40,20 +58,17 @@ def _digits_only(value):
 
 
 def _client_ids_by_phone(barbearia, telefone_raw):
-    # Retorna IDs de clientes (da barbearia) com o mesmo telefone, ignorando máscara.
-    digits = _digits_only(telefone_raw)
-    if not digits:
+    # IDs de clientes (da barbearia) com o mesmo telefone. Client.save já grava a chave
+    # (só dígitos, sem 55), então é igualdade no índice (barbearia, telefone).
+    chave = chave_telefone(telefone_raw)
+    if not chave:
         return []
-    ids = []
-    for c in Client.objects.filter(barbearia=barbearia).exclude(telefone__isnull=True).exclude(telefone=""):
-        if _digits_only(c.telefone) == digits:
-            ids.append(c.id)
-    return ids
+    return list(Client.objects.filter(barbearia=barbearia, telefone=chave).values_list("id", flat=True))
 
 
 def _get_or_create_client_by_phone(barbearia, nome, telefone_raw):
     # Reusa cliente existente pelo telefone (ignorando máscara) ou cria um novo.
-    tel_digits = _digits_only(telefone_raw)
+    tel_digits = chave_telefone(telefone_raw)
     ids = _client_ids_by_phone(barbearia, tel_digits)
     cliente = Client.objects.filter(id__in=ids).order_by('-id').first()
     if cliente:
@@ -128,23 +143,6 @@ def confirmar_agendamento(request, agendamento_id):
 # HELPERS (MULTI-TENANT)
 # ==========================
 
-def _normalize_phone_to_wa(phone: str | None) -> str | None:
-    """
-    Recebe telefone em qualquer formato e devolve só dígitos no padrão wa.me.
-    Regra simples:
-      - remove tudo que não for dígito
-      - se tiver 11 ou 10 dígitos, assume BR e prefixa 55
-    """
-    if not phone:
-        return None
-    digits = "".join(ch for ch in str(phone) if ch.isdigit())
-    if not digits:
-        return None
-    if len(digits) in (10, 11):
-        digits = "55" + digits
-    return digits
-
-
 def _get_active_shop(request):
     """
     Multi-tenant simples:
@@ -179,339 +177,38 @@ def _require_shop(request):
 
 @login_required
 def dashboard(request):
-    # Splash (loading) 1x por sessão
-    if not request.GET.get("noload") and not request.session.get("kairos_loading_seen"):
-        request.session["kairos_loading_seen"] = True
-        return render(
-            request,
-            "agenda/loading.html",
-            {"next_url": reverse("homemcom_dashboard") + "?noload=1"},
-        )
-
     barbearia, resp = _require_shop(request)
     if resp:
         return resp
 
-    hoje = timezone.localdate()
-
-    # Agendamentos do dia
-    agendamentos_hoje = (
-        Appointment.objects.filter(barbearia=barbearia, inicio__date=hoje)
-        .select_related("cliente", "servico")
-        .order_by("inicio")
-    )
-
-    confirmados_hoje = agendamentos_hoje.filter(status="confirmado")
-
-    # SERVIÇOS (DIA)
-    total_atendimentos_hoje = confirmados_hoje.count()
-    total_servicos_hoje = (
-        confirmados_hoje.aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
-        or 0
-    )
-    ticket_medio_hoje = (
-        confirmados_hoje.aggregate(media=Coalesce(Avg("valor_no_momento"), DECIMAL0))["media"]
-        or 0
-    )
-
-    # PRODUTOS (DIA)
-    vendas_produtos_hoje = ProductSale.objects.filter(
-        barbearia=barbearia, data_hora__date=hoje
-    )
-    total_produtos_hoje = (
-        vendas_produtos_hoje.aggregate(total=Coalesce(Sum("valor_total"), DECIMAL0))["total"]
-        or 0
-    )
-    qtd_produtos_hoje = (
-        vendas_produtos_hoje.aggregate(total=Coalesce(Sum("quantidade"), Value(0)))["total"]
-        or 0
-    )
-
-    # TOTAL DIA
-    total_valor_hoje = float(total_servicos_hoje) + float(total_produtos_hoje)
-
-    # SEMANA
-    inicio_semana = hoje - timedelta(days=hoje.weekday())  # segunda
-    fim_semana = inicio_semana + timedelta(days=6)  # domingo
-
-    confirmados_semana = Appointment.objects.filter(
-        barbearia=barbearia,
-        status="confirmado",
-        inicio__date__gte=inicio_semana,
-        inicio__date__lte=fim_semana,
-    )
-
-    total_servicos_semana = (
-        confirmados_semana.aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
-        or 0
-    )
-
-    vendas_produtos_semana = ProductSale.objects.filter(
-        barbearia=barbearia,
-        data_hora__date__gte=inicio_semana,
-        data_hora__date__lte=fim_semana,
-    )
-    total_produtos_semana = (
-        vendas_produtos_semana.aggregate(total=Coalesce(Sum("valor_total"), DECIMAL0))["total"]
-        or 0
-    )
-    qtd_produtos_semana = (
-        vendas_produtos_semana.aggregate(total=Coalesce(Sum("quantidade"), Value(0)))["total"]
-        or 0
-    )
-
-    total_valor_semana = float(total_servicos_semana) + float(total_produtos_semana)
-
-    # MÊS
-    confirmados_mes = Appointment.objects.filter(
-        barbearia=barbearia,
-        status="confirmado",
-        inicio__year=hoje.year,
-        inicio__month=hoje.month,
-    )
-    total_servicos_mes = (
-        confirmados_mes.aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
-        or 0
-    )
-
-    vendas_produtos_mes = ProductSale.objects.filter(
-        barbearia=barbearia,
-        data_hora__year=hoje.year,
-        data_hora__month=hoje.month,
-    )
-    total_produtos_mes = (
-        vendas_produtos_mes.aggregate(total=Coalesce(Sum("valor_total"), DECIMAL0))["total"]
-        or 0
-    )
-    qtd_produtos_mes = (
-        vendas_produtos_mes.aggregate(total=Coalesce(Sum("quantidade"), Value(0)))["total"]
-        or 0
-    )
-
-    total_valor_mes = float(total_servicos_mes) + float(total_produtos_mes)
-
-    # CANCELADOS DO DIA (só serviços)
-    cancelados_hoje = Appointment.objects.filter(
-        barbearia=barbearia, status="cancelado", inicio__date=hoje
-    )
-    total_cancelado_hoje = (
-        cancelados_hoje.aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
-        or 0
-    )
-
-    # TOP SERVIÇOS (SEMANA)
-    top_servicos_semana_raw = (
-        Appointment.objects.filter(
-            barbearia=barbearia,
-            status="confirmado",
-            inicio__date__gte=inicio_semana,
-            inicio__date__lte=fim_semana,
-        )
-        .values("servico__nome")
-        .annotate(qtd=Count("id"), total=Coalesce(Sum("valor_no_momento"), DECIMAL0))
-        .order_by("-qtd", "-total")[:5]
-    )
-    top_servicos_semana = [
-        {"nome": r["servico__nome"] or "—", "qtd": int(r["qtd"] or 0), "total": f"{float(r['total'] or 0):.2f}"}
-        for r in top_servicos_semana_raw
-    ]
-
-    # TOP PRODUTOS (SEMANA)
-    top_produtos_semana_raw = (
-        vendas_produtos_semana.annotate(
-            nome_p=Coalesce("produto__nome", "produto_nome", Value("—"))
-        )
-        .values("nome_p")
-        .annotate(qtd=Coalesce(Sum("quantidade"), Value(0)), receita=Coalesce(Sum("valor_total"), DECIMAL0))
-        .order_by("-receita", "-qtd")[:5]
-    )
-    top_produtos_semana = [
-        {"nome": r["nome_p"], "qtd": int(r["qtd"] or 0), "receita": f"{float(r['receita'] or 0):.2f}"}
-        for r in top_produtos_semana_raw
-    ]
-
-    # INSIGHTS (crescimento semanal vs semana anterior)
-    inicio_semana_ant = inicio_semana - timedelta(days=7)
-    fim_semana_ant = fim_semana - timedelta(days=7)
-
-    total_semana_ant_serv = (
-        Appointment.objects.filter(
-            barbearia=barbearia,
-            status="confirmado",
-            inicio__date__gte=inicio_semana_ant,
-            inicio__date__lte=fim_semana_ant,
-        ).aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"]
-        or 0
-    )
-    total_semana_ant_prod = (
-        ProductSale.objects.filter(
-            barbearia=barbearia,
-            data_hora__date__gte=inicio_semana_ant,
-            data_hora__date__lte=fim_semana_ant,
-        ).aggregate(total=Coalesce(Sum("valor_total"), DECIMAL0))["total"]
-        or 0
-    )
-    total_semana_ant = float(total_semana_ant_serv) + float(total_semana_ant_prod)
-
-    crescimento_semana_pct = None
-    if total_semana_ant > 0:
-        crescimento_semana_pct = ((total_valor_semana - total_semana_ant) / total_semana_ant) * 100
-
-    crescimento_servicos_semana_pct = None
-    if float(total_semana_ant_serv) > 0:
-        crescimento_servicos_semana_pct = ((float(total_servicos_semana) - float(total_semana_ant_serv)) / float(total_semana_ant_serv)) * 100
-
-    crescimento_produtos_semana_pct = None
-    if float(total_semana_ant_prod) > 0:
-        crescimento_produtos_semana_pct = ((float(total_produtos_semana) - float(total_semana_ant_prod)) / float(total_semana_ant_prod)) * 100
-
-    total_ag_hoje = agendamentos_hoje.count()
-    taxa_cancelamento_hoje = (
-        (agendamentos_hoje.filter(status="cancelado").count() / total_ag_hoje * 100) if total_ag_hoje else 0
-    )
-
-    total_ag_semana = Appointment.objects.filter(
-        barbearia=barbearia,
-        inicio__date__gte=inicio_semana,
-        inicio__date__lte=fim_semana,
-    ).count()
-    cancel_semana = Appointment.objects.filter(
-        barbearia=barbearia,
-        status="cancelado",
-        inicio__date__gte=inicio_semana,
-        inicio__date__lte=fim_semana,
-    ).count()
-    taxa_cancelamento_semana = (cancel_semana / total_ag_semana * 100) if total_ag_semana else 0
-
-    # pico horário (semana)
-    pico_hora = None
-    pico_qtd = 0
-    pico_raw = (
-        confirmados_semana.annotate(hora=ExtractHour("inicio"))
-        .values("hora")
-        .annotate(qtd=Count("id"))
-        .order_by("-qtd")
-        .first()
-    )
-    if pico_raw and pico_raw.get("hora") is not None:
-        pico_hora = int(pico_raw["hora"])
-        pico_qtd = int(pico_raw["qtd"] or 0)
-
-    # ocupação estimada (minutos agendados / minutos disponíveis)
-    minutos_disponiveis = 0
-    for i in range(7):
-        dia_ref = inicio_semana + timedelta(days=i)
-        for cfg in WorkDayConfig.objects.filter(
-            barbearia=barbearia, dia_semana=dia_ref.weekday(), ativo=True
-        ):
-            delta = datetime.combine(dia_ref, cfg.fim) - datetime.combine(dia_ref, cfg.inicio)
-            minutos_disponiveis += int(delta.total_seconds() // 60)
-
-    minutos_agendados = 0
-    for ag in confirmados_semana.select_related("servico"):
-        minutos_agendados += int((ag.servico.duracao_minutos or 30))
-
-    ocupacao_semana_pct = (minutos_agendados / minutos_disponiveis * 100) if minutos_disponiveis else 0
-
-    # textos rápidos (dashboard inteligente)
-    if top_servicos_semana:
-        s0 = top_servicos_semana[0]
-        insight_melhor_servico_semana = f"{s0['nome']} lidera na semana ({s0['qtd']} atend.)"
-    else:
-        insight_melhor_servico_semana = "Sem serviços confirmados na semana ainda"
-
-    if top_produtos_semana:
-        p0 = top_produtos_semana[0]
-        insight_produto_top_semana = f"{p0['nome']} é o campeão ({p0['qtd']} un.)"
-    else:
-        insight_produto_top_semana = "Sem vendas de produto na semana"
-
-    if pico_hora is not None and pico_qtd:
-        insight_pico_horario_semana = f"Pico por volta das {pico_hora:02d}h ({pico_qtd} agend.)"
-    else:
-        insight_pico_horario_semana = "Pico de horário ainda não definido"
-
-    insight_taxa_cancelamento = f"Cancelamentos: {taxa_cancelamento_hoje:.0f}% hoje | {taxa_cancelamento_semana:.0f}% semana"
-
-    # Série: receita últimos 14 dias (serviços e produtos)
-    inicio_14 = hoje - timedelta(days=13)
+    # splash da marca 1x por sessão: agora é um overlay na própria página (sem 2º request)
+    mostrar_splash = not request.session.get("kairos_loading_seen")
+    if mostrar_splash:
+        request.session["kairos_loading_seen"] = True
 
-    serv_por_dia = {
-        r["dia"]: float(r["total"] or 0)
-        for r in (
-            Appointment.objects.filter(
-                barbearia=barbearia,
-                status="confirmado",
-                inicio__date__gte=inicio_14,
-                inicio__date__lte=hoje,
-            )
-            .annotate(dia=TruncDate("inicio"))
-            .values("dia")
-            .annotate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))
-        )
+    # página = só a casca; cada painel vem do seu endpoint (dashboard_painel), em paralelo
+    context = {
+        "barbearia": barbearia,
+        "data_hoje": timezone.localdate(),
+        "mostrar_splash": mostrar_splash,
     }
+    return render(request, "agenda/homemcom_dashboard.html", context)
 
-    prod_por_dia = {
-        r["dia"]: float(r["total"] or 0)
-        for r in (
-            ProductSale.objects.filter(
-                barbearia=barbearia,
-                data_hora__date__gte=inicio_14,
-                data_hora__date__lte=hoje,
-            )
-            .annotate(dia=TruncDate("data_hora"))
-            .values("dia")
-            .annotate(total=Coalesce(Sum("valor_total"), DECIMAL0))
-        )
-    }
 
-    labels_14, serie_serv, serie_prod = [], [], []
-    d = inicio_14
-    while d <= hoje:
-        labels_14.append(d.strftime("%d/%m"))
-        serie_serv.append(serv_por_dia.get(d, 0.0))
-        serie_prod.append(prod_por_dia.get(d, 0.0))
-        d += timedelta(days=1)
+@login_required
+def dashboard_painel(request, nome):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return JsonResponse({"erro": "sem_barbearia"}, status=403)
+    if nome not in PAINEIS:
+        raise Http404
 
-    chart_payload = {"labels": labels_14, "servicos": serie_serv, "produtos": serie_prod}
+    dados = painel(barbearia, nome)
 
-    context = {
-        "barbearia": barbearia,
-        "data_hoje": hoje,
-        "agendamentos_hoje": agendamentos_hoje,
-        "total_atendimentos_hoje": total_atendimentos_hoje,
-        "total_valor_hoje": f"{total_valor_hoje:.2f}",
-        "ticket_medio_hoje": f"{float(ticket_medio_hoje):.2f}",
-        "total_valor_semana": f"{total_valor_semana:.2f}",
-        "total_valor_mes": f"{total_valor_mes:.2f}",
-        "total_cancelado_hoje": f"{float(total_cancelado_hoje):.2f}",
-        "total_servicos_hoje": f"{float(total_servicos_hoje):.2f}",
-        "total_produtos_hoje": f"{float(total_produtos_hoje):.2f}",
-        "qtd_produtos_hoje": int(qtd_produtos_hoje or 0),
-        "total_servicos_semana": f"{float(total_servicos_semana):.2f}",
-        "total_produtos_semana": f"{float(total_produtos_semana):.2f}",
-        "qtd_produtos_semana": int(qtd_produtos_semana or 0),
-        "total_servicos_mes": f"{float(total_servicos_mes):.2f}",
-        "total_produtos_mes": f"{float(total_produtos_mes):.2f}",
-        "qtd_produtos_mes": int(qtd_produtos_mes or 0),
-        "inicio_semana": inicio_semana,
-        "fim_semana": fim_semana,
-        "top_servicos_semana": top_servicos_semana,
-        "top_produtos_semana": top_produtos_semana,
-        # indicadores inteligentes
-        "crescimento_semana_pct": crescimento_semana_pct,
-        "crescimento_servicos_semana_pct": crescimento_servicos_semana_pct,
-        "crescimento_produtos_semana_pct": crescimento_produtos_semana_pct,
-        "taxa_cancelamento_hoje": taxa_cancelamento_hoje,
-        "taxa_cancelamento_semana": taxa_cancelamento_semana,
-        "ocupacao_semana_pct": ocupacao_semana_pct,
-        "insight_melhor_servico_semana": insight_melhor_servico_semana,
-        "insight_produto_top_semana": insight_produto_top_semana,
-        "insight_pico_horario_semana": insight_pico_horario_semana,
-        "insight_taxa_cancelamento": insight_taxa_cancelamento,
-        "chart_payload_json": json.dumps(chart_payload),
-    }
-    return render(request, "agenda/homemcom_dashboard.html", context)
+    # agenda volta como fragmento HTML: os dados vêm do cache, mas o HTML (com csrf) é do request
+    if nome == "agenda":
+        return render(request, "agenda/dashboard_agenda_do_dia_snippet.html", dados)
+    return JsonResponse(dados)
 
 
 @login_required
@@ -523,7 +220,9 @@ def novo_agendamento(request):
     if request.method == "POST":
         form = NovoAgendamentoForm(request.POST, barbearia=barbearia)
         if form.is_valid():
-            form.save(barbearia=barbearia)
+            with transaction.atomic():
+                agendamento = form.save(barbearia=barbearia)
+                notificar(agendamento, EVENTO_CRIADO, dono=False)
             messages.success(request, "Agendamento criado com sucesso!")
             return redirect("homemcom_dashboard")
     else:
@@ -540,6 +239,16 @@ def novo_agendamento(request):
     )
 
 
+@login_required
+def buscar_clientes(request):
+    """Autocomplete de clientes (nome ou telefone) do novo agendamento: ?q="""
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return JsonResponse({"erro": "sem_barbearia"}, status=403)
+    resultados = buscar_clientes_da_barbearia(barbearia, request.GET.get("q", "")[:60])
+    return JsonResponse({"resultados": resultados})
+
+
 @login_required
 def relatorios_view(request):
     barbearia, resp = _require_shop(request)
@@ -547,125 +256,7 @@ def relatorios_view(request):
         return resp
 
     hoje = timezone.localdate()
-
-    def parse_date(s):
-        try:
-            return datetime.strptime(s, "%Y-%m-%d").date()
-        except Exception:
-            return None
-
-    def month_range(d: date):
-        inicio = d.replace(day=1)
-        if d.month == 12:
-            prox = date(d.year + 1, 1, 1)
-        else:
-            prox = date(d.year, d.month + 1, 1)
-        fim = prox - timedelta(days=1)
-        return inicio, fim
-
-    periodo = request.GET.get("periodo", "mes")  # hoje | 7d | 30d | mes | custom
-    inicio_str = request.GET.get("inicio")
-    fim_str = request.GET.get("fim")
-
-    if periodo == "hoje":
-        data_inicio = hoje
-        data_fim = hoje
-    elif periodo == "7d":
-        data_inicio = hoje - timedelta(days=6)
-        data_fim = hoje
-    elif periodo == "30d":
-        data_inicio = hoje - timedelta(days=29)
-        data_fim = hoje
-    elif periodo == "custom":
-        data_inicio = parse_date(inicio_str) or hoje
-        data_fim = parse_date(fim_str) or hoje
-    else:
-        data_inicio, data_fim = month_range(hoje)
-
-    if data_inicio > data_fim:
-        data_inicio, data_fim = data_fim, data_inicio
-
-    qs_base = Appointment.objects.filter(
-        barbearia=barbearia,
-        inicio__date__gte=data_inicio,
-        inicio__date__lte=data_fim,
-    )
-    qs_confirmados = qs_base.filter(status="confirmado")
-    qs_cancelados = qs_base.filter(status="cancelado")
-
-    kpi_agendamentos = qs_base.count()
-    kpi_confirmados = qs_confirmados.count()
-    kpi_cancelados = qs_cancelados.count()
-
-    total_servicos = qs_confirmados.aggregate(total=Coalesce(Sum("valor_no_momento"), DECIMAL0))["total"] or 0
-    qs_produtos = ProductSale.objects.filter(
-        barbearia=barbearia,
-        data_hora__date__gte=data_inicio,
-        data_hora__date__lte=data_fim,
-    )
-    total_produtos = qs_produtos.aggregate(total=Coalesce(Sum("valor_total"), DECIMAL0))["total"] or 0
-    qtd_produtos = qs_produtos.aggregate(total=Coalesce(Sum("quantidade"), Value(0)))["total"] or 0
-
-    receita_total = float(total_servicos) + float(total_produtos)
-
-    def brl(v: float) -> str:
-        return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-    kpi_receita = brl(receita_total)
-    kpi_produtos_receita = brl(float(total_produtos))
-
-    top_raw = (
-        qs_confirmados.values("servico__nome")
-        .annotate(qtd=Count("id"), receita=Coalesce(Sum("valor_no_momento"), DECIMAL0))
-        .order_by("-qtd", "-receita")[:8]
-    )
-    top_servicos = [
-        {"nome": r["servico__nome"], "qtd": int(r["qtd"]), "receita": brl(float(r["receita"] or 0))}
-        for r in top_raw
-    ]
-
-    top_produtos_raw = (
-        qs_produtos.annotate(
-            nome_p=Coalesce("produto__nome", "produto_nome", Value("—"))
-        )
-        .values("nome_p")
-        .annotate(qtd=Coalesce(Sum("quantidade"), Value(0)), receita=Coalesce(Sum("valor_total"), DECIMAL0))
-        .order_by("-receita", "-qtd")[:8]
-    )
-    top_produtos = [
-        {"nome": r["nome_p"], "qtd": int(r["qtd"] or 0), "receita": brl(float(r["receita"] or 0))}
-        for r in top_produtos_raw
-    ]
-
-    kpi_itens_produtos = qs_produtos.aggregate(total=Coalesce(Sum("quantidade"), Value(0)))["total"] or 0
-    kpi_produtos_distintos = qs_produtos.values("produto_id").distinct().count()
-
-    produtos_detalhados_raw = (
-        qs_produtos.annotate(
-            nome_p=Coalesce("produto__nome", "produto_nome", Value("—"))
-        )
-        .values("nome_p")
-        .annotate(qtd=Coalesce(Sum("quantidade"), Value(0)), receita=Coalesce(Sum("valor_total"), DECIMAL0))
-        .order_by("-receita", "-qtd", "nome_p")
-    )
-    produtos_detalhados = [
-        {"nome": r["nome_p"], "qtd": int(r["qtd"] or 0), "receita": brl(float(r["receita"] or 0))}
-        for r in produtos_detalhados_raw
-    ]
-
-    resumo_por_dia = []
-    dia = data_inicio
-    while dia <= data_fim:
-        dia_qs = qs_base.filter(inicio__date=dia)
-        resumo_por_dia.append(
-            {
-                "dia": dia.strftime("%d/%m"),
-                "agendamentos": dia_qs.count(),
-                "confirmados": dia_qs.filter(status="confirmado").count(),
-                "cancelados": dia_qs.filter(status="cancelado").count(),
-            }
-        )
-        dia += timedelta(days=1)
+    periodo, data_inicio, data_fim = periodo_do_request(request.GET, hoje)
 
     context = {
         "barbearia": barbearia,
@@ -673,22 +264,38 @@ def relatorios_view(request):
         "periodo": periodo,
         "data_inicio": data_inicio,
         "data_fim": data_fim,
-        "kpi_agendamentos": kpi_agendamentos,
-        "kpi_confirmados": kpi_confirmados,
-        "kpi_cancelados": kpi_cancelados,
-        "kpi_receita": kpi_receita,
-        "kpi_itens_produtos": int(kpi_itens_produtos or 0),
-        "kpi_produtos_distintos": kpi_produtos_distintos,
-        "kpi_produtos_qtd": int(qtd_produtos or 0),
-        "kpi_produtos_receita": kpi_produtos_receita,
-        "top_servicos": top_servicos,
-        "top_produtos": top_produtos,
-        "produtos_detalhados": produtos_detalhados,
-        "resumo_por_dia": resumo_por_dia,
     }
+
+    # período grande: calcula fora da request (run_jobs) e a página acompanha o job
+    dias = (data_fim - data_inicio).days + 1
+    if dias > getattr(settings, "REPORT_INLINE_MAX_DIAS", 62):
+        job = enfileirar_job(
+            barbearia,
+            "periodo",
+            {"inicio": data_inicio.isoformat(), "fim": data_fim.isoformat()},
+            # só o botão "Atualizar relatório" refaz um relatório que falhou (recarregar mostra o erro)
+            refazer_erro=bool(request.GET.get("atualizar")),
+        )
+        context["job"] = job
+        if job.status == ReportJob.STATUS_CONCLUIDO:
+            context.update(job.resultado)
+        return render(request, "agenda/relatorios.html", context)
+
+    with using_replica():
+        context.update(calcular_relatorio(barbearia, data_inicio, data_fim))
     return render(request, "agenda/relatorios.html", context)
 
 
+@login_required
+def relatorio_job_status(request, pk):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    job = get_object_or_404(ReportJob.objects.only("id", "status", "barbearia_id"), pk=pk, barbearia=barbearia)
+    return JsonResponse({"id": job.id, "status": job.status})
+
+
 @login_required
 def cancelar_agendamento(request, pk):
     barbearia, resp = _require_shop(request)
@@ -704,13 +311,15 @@ def cancelar_agendamento(request, pk):
     if request.method == "POST":
         form = CancelamentoForm(request.POST)
         if form.is_valid():
-            cancelamento = form.save(commit=False)
-            cancelamento.agendamento = agendamento
-            cancelamento.aprovado_por = request.user
-            cancelamento.save()
+            with transaction.atomic():
+                cancelamento = form.save(commit=False)
+                cancelamento.agendamento = agendamento
+                cancelamento.aprovado_por = request.user
+                cancelamento.save()
 
-            agendamento.status = "cancelado"
-            agendamento.save()
+                agendamento.status = "cancelado"
+                agendamento.save()
+                notificar(agendamento, EVENTO_CANCELADO, dono=False)
 
             messages.success(request, "Agendamento cancelado com sucesso.")
             return redirect("homemcom_dashboard")
@@ -735,7 +344,9 @@ def remarcar_agendamento(request, pk):
     if request.method == "POST":
         form = RemarcarAgendamentoForm(request.POST, instance=agendamento)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                agendamento = form.save()
+                notificar(agendamento, EVENTO_REMARCADO, dono=False)
             messages.success(request, "Agendamento remarcado com sucesso.")
             return redirect("homemcom_dashboard")
     else:
@@ -1071,8 +682,16 @@ def registrar_venda_produto(request):
     if request.method == "POST":
         form = ProductSaleForm(request.POST, barbearia=barbearia)
         if form.is_valid():
-            form.save(barbearia=barbearia)
+            with transaction.atomic():
+                venda = form.save(barbearia=barbearia)
             messages.success(request, "Venda registrada com sucesso.")
+            produto = venda.produto
+            if produto and produto.controla_estoque:
+                produto.refresh_from_db(fields=["estoque"])
+                if produto.estoque <= produto.estoque_minimo:
+                    messages.warning(
+                        request, f"Estoque baixo de {produto.nome}: {produto.estoque} (mínimo {produto.estoque_minimo})."
+                    )
             return redirect("homemcom_dashboard")
         messages.error(request, "Ops! Revise os campos da venda.")
     else:
@@ -1146,9 +765,11 @@ def gerar_horarios_disponiveis(barbearia, servico, data):
 # ÁREA PÚBLICA (CLIENTE)
 # ==========================
 
+@cache_publico
 def public_escolher_servico(request, slug):
-    barbearia = get_object_or_404(BarberShop, slug=slug)
+    barbearia = barbearia_por_slug(slug)
 
+    # o form agora é GET direto pra /horarios/; o POST fica pra links/abas antigas
     if request.method == "POST":
         form = PublicEscolherServicoForm(request.POST, barbearia=barbearia)
         if form.is_valid():
@@ -1159,11 +780,18 @@ def public_escolher_servico(request, slug):
         hoje = timezone.localdate()
         form = PublicEscolherServicoForm(barbearia=barbearia, initial={"data": hoje})
 
-    return render(request, "agenda/public_escolher_servico.html", {"form": form, "barbearia": barbearia})
+    # lazy: só vai no banco se o fragmento da lista não estiver em cache
+    servicos = barbearia.servicos.filter(ativo=True).order_by("id")
+
+    return render(
+        request,
+        "agenda/public_escolher_servico.html",
+        {"form": form, "barbearia": barbearia, "servicos": servicos},
+    )
 
 
 def public_escolher_horario(request, slug):
-    barbearia = get_object_or_404(BarberShop, slug=slug)
+    barbearia = barbearia_por_slug(slug)
 
     servico_id = request.GET.get("servico")
     data_str = request.GET.get("data")
@@ -1216,30 +844,26 @@ def public_confirmar_dados(request, slug):
             # Reusa cliente existente pelo telefone (ignorando máscara) ou cria um novo
             cliente = _get_or_create_client_by_phone(barbearia, nome, telefone)
 
-            duracao = timedelta(minutes=servico.duracao_minutos or 30)
-            fim = inicio + duracao
+            old_id = request.sessao_publica.get("public_remarcar_antigo_id")
+            old_cid = request.sessao_publica.get("public_remarcar_cliente_id")
+            remarcar_id = old_id if (old_id and old_cid and old_cid == cliente.id) else None
 
-            agendamento = Appointment.objects.create(
-                barbearia=barbearia,
-                cliente=cliente,
-                servico=servico,
-                inicio=inicio,
-                fim=fim,
-                status="aguardando",
-                criado_via="cliente_link",
-                valor_no_momento=servico.preco,
-            )
-
-            # Se veio do Portal do Cliente em modo "remarcar", cancela o agendamento antigo
-            old_id = request.session.pop("public_remarcar_antigo_id", None)
-            old_cid = request.session.pop("public_remarcar_cliente_id", None)
-            if old_id and old_cid and old_cid == cliente.id:
-                Appointment.objects.filter(id=old_id, barbearia=barbearia, cliente=cliente).update(status="cancelado")
+            try:
+                agendamento, remarcou = reservar(barbearia, cliente, servico, inicio, remarcar_id=remarcar_id)
+            except HorarioIndisponivel:
+                messages.error(request, "Esse horário acabou de ser reservado por outra pessoa. Escolha outro, por favor.")
+                return redirect(
+                    f"{reverse('public_escolher_horario', args=[slug])}"
+                    f"?servico={servico.id}&data={timezone.localtime(inicio).date().isoformat()}"
+                )
 
-            request.session["ultimo_agendamento_id"] = agendamento.id
+            request.sessao_publica.pop("public_remarcar_antigo_id", None)
+            request.sessao_publica.pop("public_remarcar_cliente_id", None)
+            request.sessao_publica["ultimo_agendamento_id"] = agendamento.id
+            request.sessao_publica["ultimo_evento"] = EVENTO_REMARCADO if remarcou else EVENTO_CRIADO
 
             # Se veio do Portal do Cliente (login por nome/telefone), volta pro painel.
-            if request.session.get("public_cliente_id") == cliente.id and request.session.get(
+            if request.sessao_publica.get("public_cliente_id") == cliente.id and request.sessao_publica.get(
                 "public_cliente_slug"
             ) == barbearia.slug:
                 try:
@@ -1251,10 +875,10 @@ def public_confirmar_dados(request, slug):
             return redirect("public_sucesso", slug=barbearia.slug)
     else:
         initial = {}
-        if request.session.get("public_cliente_nome"):
-            initial["nome"] = request.session.get("public_cliente_nome")
-        if request.session.get("public_cliente_tel"):
-            initial["telefone"] = request.session.get("public_cliente_tel")
+        if request.sessao_publica.get("public_cliente_nome"):
+            initial["nome"] = request.sessao_publica.get("public_cliente_nome")
+        if request.sessao_publica.get("public_cliente_tel"):
+            initial["telefone"] = request.sessao_publica.get("public_cliente_tel")
         form = PublicConfirmarDadosForm(initial=initial)
 
     return render(
@@ -1267,54 +891,25 @@ def public_confirmar_dados(request, slug):
 def public_sucesso(request, slug):
     barbearia = get_object_or_404(BarberShop, slug=slug)
 
-    agendamento_id = request.session.get("ultimo_agendamento_id")
+    agendamento_id = request.sessao_publica.get("ultimo_agendamento_id")
     agendamento = None
     if agendamento_id:
         agendamento = (
             Appointment.objects.filter(id=agendamento_id, barbearia=barbearia)
-            .select_related("servico", "cliente")
+            .select_related("servico", "cliente", "barbearia")
             .first()
         )
 
-    wa_cliente_url = None
-    wa_dono_url = None
+    # criado pelo link ou remarcado pelo portal (public_confirmar_dados grava qual foi)
+    evento = request.sessao_publica.get("ultimo_evento")
+    if evento not in (EVENTO_CRIADO, EVENTO_REMARCADO):
+        evento = EVENTO_CRIADO
 
+    msg_cliente = msg_dono = ""
     if agendamento:
-        dt = timezone.localtime(agendamento.inicio)
-        when = dt.strftime("%d/%m/%Y às %H:%M")
-        serv_nome = agendamento.servico.nome if agendamento.servico else "Serviço"
-        shop_nome = barbearia.nome or "Barbearia"
-
-        msg_cliente = (
-            f"✅ Agendamento confirmado!\n"
-            f"📍 {shop_nome}\n"
-            f"💈 {serv_nome}\n"
-            f"🗓️ {when}\n"
-            f"\n"
-            f"Qualquer coisa é só chamar aqui 😄\n"
-            f"\n🔁 Para cancelar ou remarcar depois, use o Portal do Cliente:\n"
-            f"/agendar/{barbearia.slug}/cliente/\n"
-        )
-
-        msg_dono = (
-            f"📌 Novo agendamento!\n"
-            f"👤 Cliente: {agendamento.cliente.nome if agendamento.cliente else '—'}\n"
-            f"📞 Tel: {agendamento.cliente.telefone if agendamento.cliente else '—'}\n"
-            f"💈 Serviço: {serv_nome}\n"
-            f"🗓️ {when}\n"
-        )
-
-        tel_cliente = _normalize_phone_to_wa(getattr(agendamento.cliente, "telefone", None))
-        tel_dono = _normalize_phone_to_wa(getattr(barbearia, "telefone", None))
-
-        if tel_cliente:
-            wa_cliente_url = f"https://wa.me/{tel_cliente}?text=" + request.build_absolute_uri("/")[:-1]
-            # We'll pass message via template using urlencode filter to avoid manual encoding
-
-        if tel_dono:
-            wa_dono_url = f"https://wa.me/{tel_dono}?text=" + request.build_absolute_uri("/")[:-1]
-
-        # pass messages separately; template will urlencode them properly
+        # mesmos textos que o outbox manda em segundo plano
+        msg_cliente = mensagem_cliente(agendamento, evento)
+        msg_dono = mensagem_dono(agendamento, evento)
 
     return render(
         request,
@@ -1322,10 +917,11 @@ def public_sucesso(request, slug):
         {
             "barbearia": barbearia,
             "agendamento": agendamento,
-            "wa_cliente": _normalize_phone_to_wa(getattr(agendamento.cliente, "telefone", None)) if agendamento else None,
-            "wa_dono": _normalize_phone_to_wa(getattr(barbearia, "telefone", None)) if agendamento else None,
-            "wa_msg_cliente": msg_cliente if agendamento else "",
-            "wa_msg_dono": msg_dono if agendamento else "",
+            "remarcado": evento == EVENTO_REMARCADO,
+            "wa_cliente": normalize_phone_to_wa(getattr(agendamento.cliente, "telefone", None)) if agendamento else None,
+            "wa_dono": normalize_phone_to_wa(getattr(barbearia, "telefone", None)) if agendamento else None,
+            "wa_msg_cliente": msg_cliente,
+            "wa_msg_dono": msg_dono,
         },
     )
 
@@ -1784,7 +1380,7 @@ def agenda_inteligente_delete(request, pk: int):
 # ==========================
 
 def _public_get_cliente(request, barbearia):
-    cid = request.session.get("public_cliente_id")
+    cid = request.sessao_publica.get("public_cliente_id")
     if not cid:
         return None
     return Client.objects.filter(id=cid, barbearia=barbearia).first()
@@ -1792,9 +1388,9 @@ def _public_get_cliente(request, barbearia):
 
 def public_cliente_logout(request, slug):
     # logout simples do portal público
-    request.session.pop("public_cliente_id", None)
-    request.session.pop("public_cliente_nome", None)
-    request.session.pop("public_cliente_tel", None)
+    request.sessao_publica.pop("public_cliente_id", None)
+    request.sessao_publica.pop("public_cliente_nome", None)
+    request.sessao_publica.pop("public_cliente_tel", None)
     messages.success(request, "Você saiu do seu painel. Até parte do cabelo! ✂️😄")
     return redirect("public_cliente_login", slug=slug)
 
@@ -1812,24 +1408,12 @@ def public_cliente_login(request, slug):
             nome = form.cleaned_data["nome"]
             telefone = form.cleaned_data["telefone"]
 
-            # tenta achar o cliente por telefone; se não existir, cria
-            # Obs: normalizamos telefone (somente dígitos). Mesmo assim, clientes antigos podem ter sido
-            # salvos com máscara ("(19) 99999-9999"), então fazemos um fallback comparando dígitos.
-            qs = (
-                Client.objects.filter(barbearia=barbearia)
-                .exclude(telefone__isnull=True)
-                .exclude(telefone__exact="")
+            # tenta achar o cliente por telefone (mesma chave do Client.save); se não existir, cria
+            cliente = (
+                Client.objects.filter(barbearia=barbearia, telefone=chave_telefone(telefone))
+                .order_by("id")
+                .first()
             )
-            cliente = qs.filter(telefone=telefone).first()
-            if not cliente:
-                # fallback: compara apenas dígitos
-                for c in qs.only("id", "telefone", "nome"):
-                    digits = re.sub(r"\D+", "", c.telefone or "")
-                    if len(digits) > 11 and digits.startswith("55"):
-                        digits = digits[2:]
-                    if digits == telefone:
-                        cliente = c
-                        break
 
             if not cliente:
                 cliente = Client.objects.create(barbearia=barbearia, nome=nome, telefone=telefone)
@@ -1839,14 +1423,14 @@ def public_cliente_login(request, slug):
                     cliente.nome = nome
                     cliente.save(update_fields=["nome"])
 
-            request.session["public_cliente_id"] = cliente.id
-            request.session["public_cliente_nome"] = cliente.nome
-            request.session["public_cliente_tel"] = _digits_only(cliente.telefone)
+            request.sessao_publica["public_cliente_id"] = cliente.id
+            request.sessao_publica["public_cliente_nome"] = cliente.nome
+            request.sessao_publica["public_cliente_tel"] = _digits_only(cliente.telefone)
             return redirect("public_cliente_painel", slug=slug)
     else:
         form = PublicClienteLoginForm(initial={
-            "nome": request.session.get("public_cliente_nome", ""),
-            "telefone": request.session.get("public_cliente_tel", ""),
+            "nome": request.sessao_publica.get("public_cliente_nome", ""),
+            "telefone": request.sessao_publica.get("public_cliente_tel", ""),
         })
 
     return render(request, "agenda/public_cliente_login.html", {"barbearia": barbearia, "form": form})
@@ -1859,7 +1443,7 @@ def public_cliente_painel(request, slug):
     if not cliente:
         return redirect("public_cliente_login", slug=slug)
 
-    tel_digits = request.session.get("public_cliente_tel") or ""
+    tel_digits = request.sessao_publica.get("public_cliente_tel") or ""
     client_ids = _client_ids_by_phone(barbearia, tel_digits)
 
     now = timezone.localtime(timezone.now())
@@ -1887,7 +1471,7 @@ def public_cliente_cancelar(request, slug, pk):
     cliente = _public_get_cliente(request, barbearia)
 
     # pega TODOS os clientes com o mesmo telefone (evita duplicidade e garante que os agendamentos apareçam)
-    tel_session = request.session.get("public_cliente_tel") or (cliente.telefone if cliente else "")
+    tel_session = request.sessao_publica.get("public_cliente_tel") or (cliente.telefone if cliente else "")
     cliente_ids = _client_ids_by_phone(barbearia, tel_session)
     if not cliente_ids and cliente:
         cliente_ids = [cliente.id]
@@ -1901,9 +1485,11 @@ def public_cliente_cancelar(request, slug, pk):
     ag = get_object_or_404(Appointment, id=pk, barbearia=barbearia, cliente_id__in=cliente_ids)
 
     if request.method == "POST":
-        # cancela
-        ag.status = "cancelado"
-        ag.save(update_fields=["status"])
+        # cancela + avisa o dono (outbox)
+        with transaction.atomic():
+            ag.status = "cancelado"
+            ag.save(update_fields=["status"])
+            notificar(ag, EVENTO_CANCELADO, cliente=False)
         messages.success(request, "Prontinho! Agendamento cancelado ✅")
         return redirect("public_cliente_painel", slug=slug)
 
@@ -1915,7 +1501,7 @@ def public_cliente_remarcar(request, slug, pk):
     cliente = _public_get_cliente(request, barbearia)
 
     # pega TODOS os clientes com o mesmo telefone (evita duplicidade e garante que os agendamentos apareçam)
-    tel_session = request.session.get("public_cliente_tel") or (cliente.telefone if cliente else "")
+    tel_session = request.sessao_publica.get("public_cliente_tel") or (cliente.telefone if cliente else "")
     cliente_ids = _client_ids_by_phone(barbearia, tel_session)
     if not cliente_ids and cliente:
         cliente_ids = [cliente.id]
@@ -1928,15 +1514,15 @@ def public_cliente_remarcar(request, slug, pk):
 
     # ✅ NOVO (e correto): remarcar usando o MESMO fluxo de horários disponíveis do agendamento público.
     # Isso evita sobrescrever horários já ocupados e respeita travas (horário mínimo, duração, etc.).
-    request.session["public_remarcar_antigo_id"] = ag.id
-    request.session["public_remarcar_cliente_id"] = ag.cliente_id
-    request.session["public_servico_id"] = ag.servico_id
+    request.sessao_publica["public_remarcar_antigo_id"] = ag.id
+    request.sessao_publica["public_remarcar_cliente_id"] = ag.cliente_id
+    request.sessao_publica["public_servico_id"] = ag.servico_id
 
     # pré-preenche o formulário de confirmação com os dados do cliente do portal
     if tel_session:
-        request.session["public_cliente_tel"] = tel_session
+        request.sessao_publica["public_cliente_tel"] = tel_session
     if cliente and cliente.nome:
-        request.session["public_cliente_nome"] = cliente.nome
+        request.sessao_publica["public_cliente_nome"] = cliente.nome
 
     # Vai direto para a tela que lista horários LIVRES.
     return redirect("public_escolher_horario", slug=slug)
@@ -1970,3 +1556,413 @@ def guia_sistema(request):
         "suporte_whatsapp": suporte_whatsapp,
     }
     return render(request, "agenda/guia_sistema.html", context)
+
+
+# ==========================
+# OPERADOR (staff: todas as barbearias)
+# ==========================
+
+import csv
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
+from django.utils.dateparse import parse_datetime
+
+from . import tenants
+
+
+@staff_member_required
+def operador_painel(request):
+    if request.method == "POST" and request.POST.get("acao") == "atualizar":
+        tenants.painel(atualizar=True)
+        messages.success(request, "Painel recalculado.")
+        return redirect(f"{reverse('operador_painel')}?{request.GET.urlencode()}")
+
+    dados = tenants.painel()
+    linhas = tenants.filtrar(dados["linhas"], request.GET)
+    pagina = Paginator(linhas, 100).get_page(request.GET.get("p"))
+
+    filtros = request.GET.copy()
+    filtros.pop("p", None)
+
+    context = {
+        "gerado_em": parse_datetime(dados["gerado_em"]),
+        "resumo": tenants.resumo(dados["linhas"]),
+        "resumo_filtro": tenants.resumo(linhas),
+        "pagina": pagina,
+        "situacoes": tenants.SITUACOES,
+        "planos": PlanSubscription.PLAN_CHOICES,
+        "filtros": filtros.urlencode(),
+        "q": request.GET.get("q", ""),
+        "situacao": request.GET.get("situacao", ""),
+        "plano": request.GET.get("plano", ""),
+        "ordem": request.GET.get("ordem", "atraso"),
+    }
+    return render(request, "agenda/operador_painel.html", context)
+
+
+@staff_member_required
+def operador_painel_csv(request):
+    linhas = tenants.filtrar(tenants.painel()["linhas"], request.GET)
+
+    resposta = HttpResponse(content_type="text/csv; charset=utf-8")
+    resposta["Content-Disposition"] = f'attachment; filename="kairos-barbearias-{timezone.localdate():%Y%m%d}.csv"'
+    resposta.write("﻿")  # BOM: Excel abre acentos certo
+    escritor = csv.writer(resposta, delimiter=";")
+    escritor.writerow([titulo for _, titulo in tenants.COLUNAS_CSV])
+    for l in linhas:
+        escritor.writerow([l[campo] for campo, _ in tenants.COLUNAS_CSV])
+    return resposta
+
+
+# ==========================
+# CLIENTES (histórico)
+# ==========================
+
+from . import client_stats
+from .models import normalizar_texto
+
+
+@login_required
+def clientes_view(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    ordem = request.GET.get("ordem") if request.GET.get("ordem") in client_stats.ORDENS else "gasto"
+    q = (request.GET.get("q") or "").strip()
+    clientes = client_stats.listar(barbearia, ordem)
+    if q:
+        filtro = Q(nome_normalizado__startswith=normalizar_texto(q))
+        if len(_digits_only(q)) >= 3:
+            filtro |= Q(telefone__startswith=chave_telefone(q))
+        clientes = clientes.filter(filtro)
+
+    pagina = Paginator(clientes, 50).get_page(request.GET.get("p"))
+    filtros = request.GET.copy()
+    filtros.pop("p", None)
+
+    return render(request, "agenda/clientes.html", {
+        "barbearia": barbearia,
+        "pagina": pagina,
+        "ordem": ordem,
+        "ordens": [(codigo, rotulo) for codigo, (rotulo, _) in client_stats.ORDENS.items()],
+        "q": q,
+        "filtros": filtros.urlencode(),
+    })
+
+
+@login_required
+def cliente_perfil(request, pk):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+    cliente = get_object_or_404(Client, pk=pk, barbearia=barbearia)
+    contexto = client_stats.perfil(cliente)
+    contexto["barbearia"] = barbearia
+    return render(request, "agenda/cliente_perfil.html", contexto)
+
+
+# ==========================
+# CHAMAR DE VOLTA
+# ==========================
+
+from . import retorno
+
+
+@login_required
+def chamar_de_volta_view(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    pagina = Paginator(retorno.pendentes(barbearia), 50).get_page(request.GET.get("p"))
+    hoje = timezone.localdate()
+    for c in pagina.object_list:
+        c.dias_atraso = (hoje - c.retorno_previsto).days
+
+    return render(request, "agenda/chamar_de_volta.html", {
+        "barbearia": barbearia,
+        "pagina": pagina,
+        "tolerancia_dias": retorno.TOLERANCIA_DIAS,
+        "pausa_dias": retorno.PAUSA_APOS_CHAMAR.days,
+    })
+
+
+@login_required
+@require_POST
+def chamar_de_volta(request, pk):
+    """Marca o cliente como chamado e abre a conversa no WhatsApp com a mensagem pronta."""
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+    cliente = get_object_or_404(Client, pk=pk, barbearia=barbearia)
+    retorno.marcar_chamado(cliente)
+
+    numero = normalize_phone_to_wa(cliente.telefone)
+    if not numero:
+        messages.warning(request, f"{cliente.nome} não tem telefone cadastrado.")
+        return redirect("homemcom_chamar_de_volta")
+    link = request.build_absolute_uri(reverse("public_escolher_servico", args=[barbearia.slug]))
+    return redirect(f"https://wa.me/{numero}?text={quote(retorno.mensagem(cliente, barbearia, link))}")
+
+
+# ==========================
+# CAIXA (como o cliente pagou + conciliação)
+# ==========================
+
+from . import caixa
+from .forms import PagamentoForm
+from .models import Payment, ProductSale
+
+
+def _dia_do_request(dados):
+    try:
+        return datetime.strptime(dados.get("dia") or "", "%Y-%m-%d").date()
+    except ValueError:
+        return timezone.localdate()
+
+
+def _voltar_pro_caixa(dia):
+    return redirect(f"{reverse('homemcom_caixa')}?dia={dia.isoformat()}")
+
+
+@login_required
+def caixa_view(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    dia = _dia_do_request(request.GET)
+    agendamentos, vendas = caixa.pendentes(barbearia, dia)
+    return render(request, "agenda/caixa.html", {
+        "barbearia": barbearia,
+        "dia": dia,
+        "dia_anterior": dia - timedelta(days=1),
+        "dia_seguinte": dia + timedelta(days=1),
+        "hoje": timezone.localdate(),
+        "resumo": caixa.resumo_dia(barbearia, dia),
+        "agendamentos_pendentes": agendamentos,
+        "vendas_pendentes": vendas,
+        "metodos": Payment.METODO_CHOICES,
+    })
+
+
+@login_required
+@require_POST
+def caixa_pagar(request):
+    """Pagamento de um agendamento ou venda (método, desconto, gorjeta)."""
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+    dia = _dia_do_request(request.POST)
+
+    agendamento = venda = None
+    if request.POST.get("agendamento"):
+        agendamento = get_object_or_404(Appointment, pk=request.POST["agendamento"], barbearia=barbearia)
+    else:
+        venda = get_object_or_404(ProductSale, pk=request.POST.get("venda"), barbearia=barbearia)
+
+    form = PagamentoForm(request.POST, preco=caixa.preco(agendamento=agendamento, venda=venda))
+    if not form.is_valid():
+        messages.error(request, "Pagamento inválido: " + " ".join(e for erros in form.errors.values() for e in erros))
+        return _voltar_pro_caixa(dia)
+
+    caixa.registrar(
+        barbearia, form.cleaned_data["metodo"], agendamento=agendamento, venda=venda,
+        desconto=form.cleaned_data["desconto"], gorjeta=form.cleaned_data["gorjeta"],
+    )
+    return _voltar_pro_caixa(dia)
+
+
+@login_required
+@require_POST
+def caixa_pagar_pendentes(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+    dia = _dia_do_request(request.POST)
+    metodo = request.POST.get("metodo")
+    if metodo not in caixa.METODOS:
+        messages.error(request, "Escolha o método de pagamento.")
+        return _voltar_pro_caixa(dia)
+
+    n = caixa.pagar_pendentes(barbearia, dia, metodo)
+    messages.success(request, f"{n} item(ns) marcados como pagos em {caixa.METODOS[metodo]}.")
+    return _voltar_pro_caixa(dia)
+
+
+@login_required
+@require_POST
+def caixa_conferir(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+    dia = _dia_do_request(request.POST)
+    metodo = request.POST.get("metodo") or None
+    if metodo is not None and metodo not in caixa.METODOS:
+        metodo = None
+
+    n = caixa.conferir(barbearia, dia, metodo)
+    messages.success(request, f"{n} pagamento(s) conferido(s).")
+    return _voltar_pro_caixa(dia)
+
+
+# ==========================
+# ESTOQUE
+# ==========================
+
+from . import estoque
+from .forms import MovimentoEstoqueForm
+from .models import MovimentoEstoque
+
+
+@login_required
+def estoque_view(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    return render(request, "agenda/estoque.html", {
+        "barbearia": barbearia,
+        "baixo": estoque.baixo_estoque(barbearia),
+        "produtos": Product.objects.filter(barbearia=barbearia, controla_estoque=True).order_by("-ativo", "nome"),
+        "movimentos": (
+            MovimentoEstoque.objects.filter(barbearia=barbearia).select_related("produto", "usuario")[:50]
+        ),
+        "form": MovimentoEstoqueForm(barbearia=barbearia),
+    })
+
+
+@login_required
+@require_POST
+def estoque_movimentar(request):
+    """Entrada de mercadoria ou contagem física."""
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    form = MovimentoEstoqueForm(request.POST, barbearia=barbearia)
+    if not form.is_valid():
+        messages.error(request, "Movimento inválido: " + " ".join(e for erros in form.errors.values() for e in erros))
+        return redirect("homemcom_estoque")
+
+    produto = form.cleaned_data["produto"]
+    quantidade = form.cleaned_data["quantidade"]
+    observacao = form.cleaned_data["observacao"]
+    if form.cleaned_data["tipo"] == MovimentoEstoque.TIPO_AJUSTE:
+        saldo = estoque.ajustar(produto, quantidade, observacao, usuario=request.user)
+    else:
+        saldo = estoque.movimentar(produto, quantidade, observacao=observacao, usuario=request.user)
+    messages.success(request, f"{produto.nome}: {saldo} em estoque.")
+    return redirect("homemcom_estoque")
+
+
+# ==========================
+# BALCÃO (várias vendas num POST)
+# ==========================
+
+from . import pdv
+from .forms import VendaBalcaoFormSet
+from .reports import brl
+
+
+@login_required
+def venda_balcao(request):
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    produtos = Product.objects.filter(barbearia=barbearia, ativo=True).order_by("nome")
+
+    if request.method == "POST":
+        formset = VendaBalcaoFormSet(request.POST, prefix="itens", form_kwargs={"barbearia": barbearia})
+        if formset.is_valid():
+            # linhas em branco (não mexidas) ou tiradas do carrinho não viram venda
+            itens = [
+                form.save(commit=False)
+                for form in formset
+                if form.has_changed() and form not in formset.deleted_forms
+            ]
+            vendas = pdv.registrar_lote(barbearia, itens, usuario=request.user)
+            messages.success(request, f"{len(vendas)} item(ns) registrados • {brl(pdv.total(vendas))}")
+            for produto in pdv.estoque_baixo(vendas):
+                messages.warning(
+                    request, f"Estoque baixo de {produto.nome}: {produto.estoque} (mínimo {produto.estoque_minimo})."
+                )
+            return redirect("homemcom_venda_balcao")
+        messages.error(request, "Ops! Revise os itens do carrinho.")
+    else:
+        formset = VendaBalcaoFormSet(prefix="itens", form_kwargs={"barbearia": barbearia})
+
+    return render(request, "agenda/venda_balcao.html", {
+        "barbearia": barbearia,
+        "formset": formset,
+        "produtos": produtos,
+        "hoje": pdv.resumo_hoje(barbearia),
+    })
+
+
+# ==========================
+# AGENDA EM LOTE (confirmar / cancelar / empurrar vários de uma vez)
+# ==========================
+
+from . import lote_agenda
+
+
+@login_required
+@require_POST
+def agenda_lote(request):
+    """
+    Ação em vários agendamentos: os marcados (`ids`) ou, sem marcação, todos os
+    em aberto do `dia`. acao = confirmar | cancelar | deslocar (`minutos`, pode ser negativo).
+    """
+    barbearia, resp = _require_shop(request)
+    if resp:
+        return resp
+
+    next_url = request.POST.get("next") or request.META.get("HTTP_REFERER") or reverse("homemcom_dashboard")
+    acao = request.POST.get("acao")
+    ids = [int(i) for i in request.POST.getlist("ids") if i.isdigit()] or None
+    dia = None
+    if request.POST.get("dia"):
+        dia = _dia_do_request(request.POST)
+    if ids is None and dia is None:
+        messages.warning(request, "Marque pelo menos um agendamento.")
+        return redirect(next_url)
+
+    if acao == "confirmar":
+        n = lote_agenda.confirmar(barbearia, ids=ids, dia=dia)
+        messages.success(request, f"{n} agendamento(s) confirmado(s).")
+    elif acao == "cancelar":
+        n = lote_agenda.cancelar(
+            barbearia, ids=ids, dia=dia,
+            observacao=(request.POST.get("observacao") or "").strip()[:500], usuario=request.user,
+        )
+        messages.success(request, f"{n} agendamento(s) cancelado(s). Os clientes serão avisados.")
+    elif acao == "deslocar":
+        try:
+            minutos = int(request.POST.get("minutos") or 0)
+        except ValueError:
+            minutos = 0
+        if not minutos or abs(minutos) > 12 * 60:
+            messages.error(request, "Informe quantos minutos (até 12 horas, negativo adianta).")
+            return redirect(next_url)
+        if dia is None:
+            # marcados sem dia: todos precisam ser do mesmo dia
+            inicios = Appointment.objects.filter(barbearia=barbearia, id__in=ids).values_list("inicio", flat=True)
+            dias = {timezone.localdate(inicio) for inicio in inicios}
+            if len(dias) != 1:
+                messages.error(request, "Para empurrar horários, marque agendamentos de um dia só.")
+                return redirect(next_url)
+            dia = dias.pop()
+        try:
+            n = lote_agenda.deslocar_dia(barbearia, dia, minutos, ids=ids)
+        except lote_agenda.ConflitoDeHorario as e:
+            messages.error(request, "Nada foi alterado — " + "; ".join(e.conflitos) + ".")
+            return redirect(next_url)
+        messages.success(request, f"{n} agendamento(s) movido(s) {minutos:+d} min. Os clientes serão avisados.")
+    else:
+        messages.error(request, "Ação inválida.")
+
+    return redirect(next_url)
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# Build de deploy: dependências, collectstatic (hash + gzip/brotli + CSS
+# minificado) e checagem dos templates e de static/vendor/.
+set -o errexit
+
+pip install -r requirements.txt
+python manage.py collectstatic --noinput
+python manage.py check_static
@@ -0,0 +1,37 @@
+"""
+Gunicorn (produção). Uso: gunicorn -c gunicorn.conf.py homemcom_agenda_project.wsgi:application
+
+Tudo ajustável por variável de ambiente, sem mexer no Procfile:
+WEB_CONCURRENCY (workers), GUNICORN_THREADS, GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS.
+"""
+import multiprocessing
+import os
+
+# settings.py lê isso: DEBUG off, templates em cache, cookies seguros
+os.environ.setdefault("DJANGO_ENV", "production")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# processos x threads: I/O de banco libera o GIL, então threads rendem bem;
+# cada thread mantém sua conexão persistente (CONN_MAX_AGE)
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 20
+keepalive = 5
+
+# recicla o worker de vez em quando (vazamento de memória não acumula); jitter evita reciclar todos juntos
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+# heartbeat dos workers em memória (disco do container pode travar o heartbeat)
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# atrás do proxy do Railway: confia no X-Forwarded-* recebido
+forwarded_allow_ips = "*"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
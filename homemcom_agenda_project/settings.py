@@ -1,24 +1,47 @@
 from pathlib import Path
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-SECRET_KEY = 'troque-esta-chave-em-producao'
 
-DEBUG = True
+def _env_bool(nome, padrao=False):
+    valor = os.environ.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "yes", "sim", "on")
+
+
+def _env_lista(nome):
+    return [v.strip() for v in os.environ.get(nome, "").split(",") if v.strip()]
+
+
+# Perfil: "production" (gunicorn.conf.py já define) ou "dev" (runserver/manage.py)
+DJANGO_ENV = os.environ.get("DJANGO_ENV", "dev")
+PRODUCAO = DJANGO_ENV == "production"
+
+# chave fixa só serve pra rodar local; em produção sem DJANGO_SECRET_KEY o app nem sobe
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY")
+if not SECRET_KEY:
+    if PRODUCAO:
+        raise ImproperlyConfigured("DJANGO_SECRET_KEY é obrigatória com DJANGO_ENV=production.")
+    SECRET_KEY = 'chave-so-para-desenvolvimento-local'
+
+# DEBUG guarda todo SQL executado em memória a cada request: nunca em produção
+DEBUG = _env_bool("DJANGO_DEBUG", not PRODUCAO)
 
 ALLOWED_HOSTS = [
     "127.0.0.1",
     "localhost",
     ".railway.app",
     "web-production-6e6e2.up.railway.app",
-]
+] + _env_lista("DJANGO_ALLOWED_HOSTS")
 
 CSRF_TRUSTED_ORIGINS = [
     "https://*.railway.app",
     "https://web-production-6e6e2.up.railway.app",
-]
+] + _env_lista("DJANGO_CSRF_TRUSTED_ORIGINS")
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -31,16 +54,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # /healthz responde antes de tudo: sem sessão, auth, CSRF nem PaymentGate
+    'agenda.middleware.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # logo depois do Security: static sai daqui sem passar por sessão/auth/CSRF
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # fluxo público (/agendar/) guarda estado em cookie assinado, não em django_session
+    'agenda.middleware.SessaoPublicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
-'whitenoise.middleware.WhiteNoiseMiddleware',
-
 'agenda.middleware.PaymentGateMiddleware',
 ]
 
@@ -64,17 +91,62 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCAO:
+    # templates compilados 1x por processo (sem checar o disco a cada render)
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'homemcom_agenda_project.wsgi.application'
 
 
-# Banco de dados simples (sqlite)
+# Banco: DATABASE_URL (Postgres em produção) ou sqlite local.
+# Conexão persistente por worker/thread; health check antes de reaproveitar
+# (conexão derrubada pelo banco/proxy não vira erro 500 no próximo request).
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:///db.sqlite3',
-        conn_max_age=600
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+        conn_health_checks=True,
     )
 }
 
+# SQLite (deploy de 1 nó): toda transação abre com BEGIN IMMEDIATE (pega a trava
+# de escrita no começo, não no meio) e espera até `timeout` s por ela. Com
+# SQLITE_WAL (padrão em produção) leitores não bloqueiam o escritor e vice-versa.
+# Teste de carga: `python manage.py stress_booking`.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': int(os.environ.get("SQLITE_TIMEOUT", 20)),
+    }
+    if _env_bool("SQLITE_WAL", PRODUCAO):
+        DATABASES['default']['OPTIONS']['init_command'] = (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"  # seguro com WAL; fsync só no checkpoint
+            "PRAGMA cache_size=-32000;"  # 32 MB por conexão
+            "PRAGMA mmap_size=134217728;"  # 128 MB
+            "PRAGMA temp_store=MEMORY;"
+        )
+
+# Réplica de leitura (opcional): relatórios/agregados/painel do operador leem dela
+# via agenda.db_router.using_replica(); o resto fica no primário.
+# Teste local com 2 SQLite: cp db.sqlite3 replica.sqlite3 e
+# DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 (`manage.py check_replica --shop <slug>`).
+REPLICA_DB_ALIAS = 'replica'
+if os.environ.get("DATABASE_REPLICA_URL"):
+    DATABASES[REPLICA_DB_ALIAS] = dj_database_url.parse(
+        os.environ["DATABASE_REPLICA_URL"],
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+        conn_health_checks=True,
+    )
+    DATABASES[REPLICA_DB_ALIAS]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['agenda.db_router.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,7 +172,8 @@ USE_I18N = True
 USE_TZ = True
 
 
-STATIC_URL = 'static/'
+STATIC_URL = "/static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
@@ -113,9 +186,13 @@ LOGIN_REDIRECT_URL = 'homemcom_dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
 
-STATIC_URL = "/static/"
-STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# STATICFILES_STORAGE não existe mais no Django 5.1+: o storage vai em STORAGES.
+# Nome com hash + .gz/.br (brotli) + CSS do app minificado; o WhiteNoise serve os
+# arquivos com hash com "Cache-Control: max-age=315360000, immutable".
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "agenda.storage.KairosStaticFilesStorage"},
+}
 
 # PIX (Bloco 1)
 PIX_CHAVE = "42506340866"  # seu CPF (sem pontuação)
@@ -123,4 +200,61 @@ PIX_BANCO = "Nubank"
 PIX_BENEFICIARIO = "Lucas Castiglioni Toledo de Souza"
 PIX_VALOR_SUGERIDO = None  # ou 39.90, se quiser sugerir
 PIX_QR_IMAGE = "agenda/img/pix_nubank_qr.png"  # caminho dentro de /static/
-WHATSAPP_SUPORTE = "5519981514883"  # seu número com DDI+DDD (sem +, sem espaços)
\ No newline at end of file
+WHATSAPP_SUPORTE = "5519981514883"  # seu número com DDI+DDD (sem +, sem espaços)
+
+# Notificações (outbox) — drenadas por `python manage.py run_outbox`
+NOTIFICATION_SENDER = os.environ.get("NOTIFICATION_SENDER", "agenda.notifications.LogSender")
+NOTIFICATION_FILE_PATH = BASE_DIR / "outbox_notificacoes.log"  # usado pelo FileSender
+
+# Relatórios: acima disso (em dias) o cálculo vai pra fila (`python manage.py run_jobs`)
+REPORT_INLINE_MAX_DIAS = 62
+
+# Cache compartilhado entre os workers. Padrão: em arquivo (sem serviço extra);
+# com REDIS_URL usa o Redis nativo do Django (precisa do pacote `redis`).
+# Painéis do dashboard: cada um com seu TTL (agenda/dashboard.py PAINEIS);
+# p/ ajustar sem deploy de código: DASHBOARD_CACHE_TTL = {"serie": 1800, ...}
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("KAIROS_CACHE_DIR", str(BASE_DIR / ".cache")),
+            "TIMEOUT": 300,
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+# Painel do operador (/operador/): recalculado por `manage.py refresh_operator_panel`
+# no cron (ex.: a cada 10 min); o TTL só cobre o intervalo entre execuções.
+OPERATOR_PANEL_TTL = 15 * 60
+
+# Fluxo público: estado em cookie assinado (agenda/public_session.py), válido por 30 dias.
+# Sobras antigas em django_session: `python manage.py clear_public_sessions`.
+PUBLIC_SESSION_MAX_AGE = 60 * 60 * 24 * 30
+
+# ==========================
+# PRODUÇÃO
+# ==========================
+
+if PRODUCAO:
+    # Railway termina o TLS no proxy e repassa X-Forwarded-Proto
+    SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+    SECURE_SSL_REDIRECT = _env_bool("DJANGO_SSL_REDIRECT", False)
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
+
+    # sem DEBUG, erro só aparece se for pro log (stdout do gunicorn)
+    LOGGING = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {"console": {"class": "logging.StreamHandler"}},
+        "root": {"handlers": ["console"], "level": os.environ.get("DJANGO_LOG_LEVEL", "INFO")},
+        "loggers": {"django.request": {"handlers": ["console"], "level": "ERROR", "propagate": False}},
+    }